@@ -10,20 +10,30 @@ from models.user import User
 
 load_dotenv(Path(__file__).resolve().parent / '.env')
 
-def create_app():
+def create_app(config=None):
+    """Build the app; ``config`` overrides defaults (e.g. ``DATABASE`` for scripts)."""
     app = Flask(__name__)
-    app.config['DATABASE'] = 'production_assets.db'
+    app.config['DATABASE'] = os.environ.get('DATABASE') or 'production_assets.db'
     # SECURITY: Use environment variable for secret key with fallback
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
     # Supporting documents (multiple files per asset); keep under ~50 MB per request
     app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
     
-    # Enable debug mode for development
-    app.config['DEBUG'] = True
+    # Debug (and template auto-reload) only when asked for: FLASK_DEBUG=1 or run.py
+    app.config['DEBUG'] = os.environ.get('FLASK_DEBUG', '').strip().lower() in ('1', 'true', 'yes')
+
+    # /metrics: bearer token for scrapers; loopback is only trusted without a proxy in front
+    app.config['METRICS_SCRAPE_TOKEN'] = os.environ.get('METRICS_SCRAPE_TOKEN') or None
+    app.config['METRICS_ALLOW_LOCALHOST'] = (
+        os.environ.get('METRICS_ALLOW_LOCALHOST', '').strip().lower() in ('1', 'true', 'yes')
+    )
     
     # Disable caching for static files in development
     if app.debug:
         app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
+
+    if config:
+        app.config.update(config)
     
     # Add built-in functions to Jinja2 environment
     app.jinja_env.globals.update(max=max, min=min)
@@ -35,6 +45,25 @@ def create_app():
     app.jinja_env.filters['fmt_omr'] = format_omr
     app.jinja_env.filters['fmt_location'] = format_asset_location_display
 
+    from utils.compression import init_compression
+    from utils.metrics import init_metrics
+    from utils.request_metrics import init_request_metrics
+    from utils.request_profiler import init_request_profiler
+    from utils.slow_queries import init_slow_query_log
+    from utils.static_assets import init_static_assets
+    from utils.template_cache import init_template_cache
+    from utils.write_queue import init_write_coordinator
+
+    # First: after_request hooks run in reverse, so compression sees the final body.
+    init_compression(app)
+    init_template_cache(app)
+    init_static_assets(app)
+    init_slow_query_log(app)
+    init_request_metrics(app)
+    init_request_profiler(app)
+    init_metrics(app)
+    init_write_coordinator(app)
+
     @app.template_global()
     def has_it_access():
         """Jinja: same checks as ``User.has_it_access()`` (legacy admin-equivalent)."""
@@ -80,10 +109,14 @@ def create_app():
     from routes.auth import auth_bp
     from routes.assets import assets_bp
     from routes.admin import admin_bp
+    from routes.jobs import jobs_bp
+    from routes.metrics import metrics_bp
     
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(assets_bp, url_prefix='/assets')
     app.register_blueprint(admin_bp, url_prefix='/admin')
+    app.register_blueprint(jobs_bp, url_prefix='/jobs')
+    app.register_blueprint(metrics_bp)
     
     # Root route redirects to login
     @app.route('/')
@@ -1,10 +1,13 @@
 import os
 import re
 import sqlite3
+import time
 import uuid
 from flask import current_app
 
 from utils.auth import hash_password
+from utils.metrics import observe_db_connect
+from utils.request_metrics import InstrumentedConnection
 from utils.auth_roles import (
     AUTH_ROLE_IT,
     AUTH_ROLE_MANAGEMENT,
@@ -14,10 +17,49 @@ from utils.auth_roles import (
 )
 
 def get_db_connection():
-    conn = sqlite3.connect(current_app.config['DATABASE'], timeout=10, check_same_thread=False)
+    started = time.perf_counter()
+    conn = sqlite3.connect(
+        current_app.config['DATABASE'], timeout=10, check_same_thread=False,
+        factory=InstrumentedConnection,
+    )
+    observe_db_connect(time.perf_counter() - started)
     conn.row_factory = sqlite3.Row
     return conn
 
+
+# Above this many ids, stage them in a TEMP table instead of binding one ``?`` per id.
+ID_LIST_INLINE_LIMIT = 500
+
+
+def sql_id_set(cur, ids, temp_table='staged_ids'):
+    """Return ``(sql, params)`` usable as ``col IN {sql}`` for a set of integer ids.
+
+    Small sets bind an inline ``(?, ?, …)`` list. Large selections (branch closure,
+    select-all archive) are staged once in a per-connection TEMP table so every
+    statement that follows joins against it with no extra Python work per row.
+    """
+    unique_ids = []
+    seen = set()
+    for raw_id in ids or []:
+        try:
+            value = int(raw_id)
+        except (TypeError, ValueError):
+            continue
+        if value not in seen:
+            seen.add(value)
+            unique_ids.append(value)
+
+    if len(unique_ids) <= ID_LIST_INLINE_LIMIT:
+        return '(' + ','.join('?' * len(unique_ids)) + ')', unique_ids
+
+    cur.execute(f'CREATE TEMP TABLE IF NOT EXISTS {temp_table} (id INTEGER PRIMARY KEY)')
+    cur.execute(f'DELETE FROM {temp_table}')
+    cur.executemany(
+        f'INSERT INTO {temp_table} (id) VALUES (?)',
+        ((value,) for value in unique_ids),
+    )
+    return f'(SELECT id FROM {temp_table})', []
+
 # Canonical branch label stored on assets for office-venue rows (must match admin/JS).
 OFFICE_BRANCH_LABEL = 'Office'
 
@@ -90,10 +132,9 @@ def _asset_code_prefix(cur, branch, department):
     """Restaurant: branch_code from DB. Office: HO + shortened department (e.g. HORD)."""
     if branch == OFFICE_BRANCH_LABEL:
         return _office_asset_code_prefix(department)
-    cur.execute('SELECT branch_code FROM branches WHERE name = ?', (branch,))
-    row = cur.fetchone()
-    if row and row[0] and str(row[0]).strip():
-        return str(row[0]).strip().upper()
+    code = get_branch_code_map(cur).get(branch)
+    if code:
+        return code.upper()
     return (branch or '').replace(' ', '').upper()
 
 
@@ -275,6 +316,280 @@ def _migrate_shared_asset_codes(cur):
     _mark_migration_applied(cur, 'shared_asset_codes_v1')
 
 
+def _migrate_shared_groups(cur):
+    """
+    Normalized shared-group membership: one ``shared_groups`` row per group key and one
+    ``shared_group_members`` row per shared asset, indexed by group and by branch.
+
+    Legacy shared rows (no shared_group_id) get a group id per (name, asset_type, owner)
+    once; triggers on ``assets`` keep membership in step with later writes.
+    """
+    cur.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS shared_groups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            group_key TEXT NOT NULL UNIQUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        '''
+    )
+    cur.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS shared_group_members (
+            asset_id INTEGER PRIMARY KEY,
+            group_id INTEGER NOT NULL,
+            branch TEXT,
+            FOREIGN KEY (asset_id) REFERENCES assets (id) ON DELETE CASCADE,
+            FOREIGN KEY (group_id) REFERENCES shared_groups (id)
+        )
+        '''
+    )
+    cur.execute(
+        'CREATE INDEX IF NOT EXISTS idx_shared_group_members_group '
+        'ON shared_group_members (group_id, branch)'
+    )
+    cur.execute(
+        'CREATE INDEX IF NOT EXISTS idx_shared_group_members_branch '
+        'ON shared_group_members (branch, group_id)'
+    )
+
+    if not _migration_applied(cur, 'shared_groups_v1'):
+        cur.execute(
+            '''
+            UPDATE assets SET shared_group_id = TRIM(shared_group_id)
+            WHERE shared_group_id IS NOT NULL AND shared_group_id != TRIM(shared_group_id)
+            '''
+        )
+        cur.execute(
+            '''
+            SELECT DISTINCT name, IFNULL(asset_type, ''), IFNULL(owner, '')
+            FROM assets
+            WHERE asset_kind = ?
+              AND (shared_group_id IS NULL OR TRIM(shared_group_id) = '')
+            ''',
+            (ASSET_KIND_SHARED,),
+        )
+        for name, asset_type, owner in cur.fetchall():
+            cur.execute(
+                '''
+                UPDATE assets SET shared_group_id = ?
+                WHERE asset_kind = ?
+                  AND name = ?
+                  AND IFNULL(asset_type, '') = ?
+                  AND IFNULL(owner, '') = ?
+                  AND (shared_group_id IS NULL OR TRIM(shared_group_id) = '')
+                ''',
+                (str(uuid.uuid4()), ASSET_KIND_SHARED, name, asset_type, owner),
+            )
+        # Archived legacy rows join the active group with the same identity on restore.
+        cur.execute(
+            '''
+            SELECT DISTINCT name, IFNULL(asset_type, ''), IFNULL(owner, '')
+            FROM archived_assets
+            WHERE asset_kind = ?
+              AND (shared_group_id IS NULL OR TRIM(shared_group_id) = '')
+            ''',
+            (ASSET_KIND_SHARED,),
+        )
+        for name, asset_type, owner in cur.fetchall():
+            cur.execute(
+                '''
+                SELECT shared_group_id FROM assets
+                WHERE asset_kind = ?
+                  AND name = ?
+                  AND IFNULL(asset_type, '') = ?
+                  AND IFNULL(owner, '') = ?
+                  AND IFNULL(shared_group_id, '') != ''
+                LIMIT 1
+                ''',
+                (ASSET_KIND_SHARED, name, asset_type, owner),
+            )
+            row = cur.fetchone()
+            cur.execute(
+                '''
+                UPDATE archived_assets SET shared_group_id = ?
+                WHERE asset_kind = ?
+                  AND name = ?
+                  AND IFNULL(asset_type, '') = ?
+                  AND IFNULL(owner, '') = ?
+                  AND (shared_group_id IS NULL OR TRIM(shared_group_id) = '')
+                ''',
+                (row[0] if row else str(uuid.uuid4()), ASSET_KIND_SHARED, name, asset_type, owner),
+            )
+        cur.execute(
+            '''
+            INSERT OR IGNORE INTO shared_groups (group_key)
+            SELECT DISTINCT shared_group_id FROM assets
+            WHERE asset_kind = ? AND IFNULL(shared_group_id, '') != ''
+            ''',
+            (ASSET_KIND_SHARED,),
+        )
+        cur.execute(
+            '''
+            INSERT OR REPLACE INTO shared_group_members (asset_id, group_id, branch)
+            SELECT a.id, g.id, a.branch
+            FROM assets a
+            JOIN shared_groups g ON g.group_key = a.shared_group_id
+            WHERE a.asset_kind = ?
+            ''',
+            (ASSET_KIND_SHARED,),
+        )
+        _mark_migration_applied(cur, 'shared_groups_v1')
+
+    # Table rebuilds drop triggers, so (re)create them on every start.
+    member_insert = f'''
+        INSERT OR IGNORE INTO shared_groups (group_key)
+        SELECT TRIM(NEW.shared_group_id)
+        WHERE NEW.asset_kind = '{ASSET_KIND_SHARED}' AND TRIM(IFNULL(NEW.shared_group_id, '')) != '';
+        INSERT OR REPLACE INTO shared_group_members (asset_id, group_id, branch)
+        SELECT NEW.id, g.id, NEW.branch FROM shared_groups g
+        WHERE NEW.asset_kind = '{ASSET_KIND_SHARED}' AND g.group_key = TRIM(NEW.shared_group_id);
+    '''
+    cur.execute(
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_assets_shared_members_insert
+        AFTER INSERT ON assets
+        BEGIN
+            {member_insert}
+        END
+        '''
+    )
+    cur.execute(
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_assets_shared_members_update
+        AFTER UPDATE OF asset_kind, shared_group_id, branch ON assets
+        BEGIN
+            DELETE FROM shared_group_members WHERE asset_id = OLD.id;
+            {member_insert}
+        END
+        '''
+    )
+    cur.execute(
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_assets_shared_members_delete
+        AFTER DELETE ON assets
+        BEGIN
+            DELETE FROM shared_group_members WHERE asset_id = OLD.id;
+        END
+        '''
+    )
+
+
+# Tables whose writes bump a per-table version counter (cache keys, ETags).
+DATA_VERSION_TABLES = (
+    'assets',
+    'archived_assets',
+    'asset_ownership_history',
+    'asset_spec_values',
+    'asset_name_spec_fields',
+    'asset_name_inclusions',
+    'asset_names',
+    'asset_types',
+    'asset_documents',
+    'brands',
+    'branches',
+    'departments',
+    'shared_groups',
+    'shared_group_members',
+    'users',
+)
+
+
+def _migrate_data_versions(cur):
+    """Per-table write counters maintained by triggers; read with ``get_data_versions``."""
+    cur.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS _data_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        '''
+    )
+    for table in DATA_VERSION_TABLES:
+        cur.execute(
+            'INSERT OR IGNORE INTO _data_versions (table_name, version) VALUES (?, 0)',
+            (table,),
+        )
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cur.execute(
+                f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE _data_versions SET version = version + 1
+                    WHERE table_name = '{table}';
+                END
+                '''
+            )
+
+
+def get_data_versions(cur, tables=DATA_VERSION_TABLES):
+    """Return ``{table: version}`` for the given tables (0 when never written)."""
+    tables = list(tables)
+    placeholders = ','.join('?' * len(tables))
+    cur.execute(
+        f'SELECT table_name, version FROM _data_versions WHERE table_name IN ({placeholders})',
+        tables,
+    )
+    versions = {table: 0 for table in tables}
+    versions.update({row[0]: row[1] for row in cur.fetchall()})
+    return versions
+
+
+def get_branch_code_map(cur):
+    """``{branch name: branch_code}`` (stripped, ``''`` when unset); cached until branches change."""
+    from utils.reference_cache import cached_reference
+
+    def load(cur):
+        cur.execute('SELECT name, branch_code FROM branches')
+        return {row[0]: (str(row[1]).strip() if row[1] else '') for row in cur.fetchall()}
+
+    return cached_reference(cur, 'branch_codes', ('branches',), load)
+
+
+def _migrate_import_plans(cur):
+    """Previewed (dry-run) import change plans waiting to be applied."""
+    cur.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS import_plans (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            plan TEXT NOT NULL,
+            base_versions TEXT NOT NULL,
+            created_by TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        '''
+    )
+
+
+def _migrate_jobs(cur):
+    """Background job queue (see ``utils/jobs.py`` and ``scripts/job_worker.py``)."""
+    cur.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            payload TEXT NOT NULL DEFAULT '{}',
+            result TEXT,
+            error TEXT,
+            progress_done INTEGER NOT NULL DEFAULT 0,
+            progress_total INTEGER,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            created_by_id INTEGER,
+            created_by TEXT,
+            worker TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            heartbeat_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        '''
+    )
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id)')
+
+
 def _migrate_office_asset_codes(cur):
     """Rewrite office codes from [Dept]-#### to HO[Abbrev]-#### (e.g. IT-0001 → HOIT-0001)."""
     if _migration_applied(cur, 'office_asset_codes_ho_v1'):
@@ -1369,6 +1684,9 @@ def init_db():
     _migrate_users_contact_info(conn)
     _migrate_users_employee_id_multi_branch(conn)
     _migrate_users_nullable_department(conn)
+    # Owner-contact lookups filter on users.name (served by the UNIQUE(name, department_id)
+    # index) and join departments on department_id.
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_users_department_id ON users (department_id)')
     
     # Create users_auth table for login authentication
     cur.execute('''
@@ -1517,8 +1835,14 @@ def init_db():
         'CREATE INDEX IF NOT EXISTS idx_asset_ownership_history_asset_id '
         'ON asset_ownership_history (asset_id)'
     )
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_assets_asset_code ON assets (asset_code)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_assets_branch ON assets (branch)')
+    cur.execute(
+        'CREATE INDEX IF NOT EXISTS idx_assets_shared_group_id ON assets (shared_group_id)'
+    )
     _migrate_shared_asset_codes(cur)
     _migrate_office_asset_codes(cur)
+    _migrate_shared_groups(cur)
     
     # No default business data is seeded on startup. Asset types, names, branches, etc.
     # are managed through the UI. Login: only the first Super Admin when users_auth is empty
@@ -1575,6 +1899,10 @@ def init_db():
             _apply_qr_label_layout_migrations(cur)
             _mark_migration_applied(cur, 'qr_label_layout_setup_v1')
 
+    _migrate_import_plans(cur)
+    _migrate_jobs(cur)
+    _migrate_data_versions(cur)
+
     conn.commit()
     conn.close()
 
@@ -1590,12 +1918,11 @@ def normalize_department_display_code(branch, department, cur=None):
     if cur is None:
         conn = get_db_connection()
         cur = conn.cursor()
-    cur.execute('SELECT branch_code FROM branches WHERE name = ?', (branch,))
-    row = cur.fetchone()
+    code = get_branch_code_map(cur).get(branch)
     if conn is not None:
         conn.close()
-    if row and row[0] and str(row[0]).strip():
-        return str(row[0]).strip().upper()
+    if code:
+        return code.upper()
     return branch.replace(' ', '').upper()
 
 
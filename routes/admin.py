@@ -1,19 +1,49 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, redirect, render_template, request, jsonify, url_for
 from flask_login import login_required, current_user
 from models.database import (
     get_db_connection,
+    get_data_versions,
     ensure_restaurant_default_department_for_branch,
     RESTAURANT_DEFAULT_DEPARTMENT_NAME,
 )
 from routes.assets import OFFICE_BRANCH_LABEL
+from routes.jobs import background_requested, enqueue_job_response
+from utils.conditional import etag_from_data_versions
+from utils.directory_import import (
+    DIRECTORY_TABLES,
+    BranchImporter,
+    EmployeeImporter,
+    apply_branch_plan,
+    batched,
+    branch_plan_counts,
+    iter_branch_import_rows,
+    iter_employee_import_rows,
+    load_import_plan,
+    save_import_plan,
+)
+from utils.jobs import job_handler, spool_upload
+from utils.reference_cache import invalidate_reference_data
+from utils.spreadsheet_reader import SpreadsheetError, open_spreadsheet
+from utils.write_queue import get_write_metrics
+from werkzeug.datastructures import FileStorage
+import os
 import sqlite3
 
 admin_bp = Blueprint('admin', __name__)
 
+
+@admin_bp.after_request
+def drop_cached_reference_data(response):
+    """Brands, branches, departments, employees and the catalog change here: reload them."""
+    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        invalidate_reference_data()
+    return response
+
 # ===== BRAND MANAGEMENT API =====
 
 @admin_bp.route('/brands', methods=['GET'])
 @login_required
+@etag_from_data_versions(('brands',))
 def get_brands():
     conn = get_db_connection()
     cur = conn.cursor()
@@ -97,6 +127,7 @@ def delete_brand(brand_id):
 
 @admin_bp.route('/branches', methods=['GET'])
 @login_required
+@etag_from_data_versions(('branches', 'brands'))
 def get_branches():
     conn = get_db_connection()
     cur = conn.cursor()
@@ -260,6 +291,9 @@ def import_branches():
     Only rows the client identified as restaurant branches are sent. Existing
     brands/branches/employees are kept (matched by name); missing brand/branch_code
     on an existing branch is backfilled.
+
+    With ``"dry_run": true`` nothing is written: the change plan is stored and
+    returned with a ``plan_id`` for ``/import-branches/apply``.
     """
     if not current_user.has_it_access():
         return jsonify({'error': 'Access denied. Only IT users can import branches.'}), 403
@@ -270,102 +304,108 @@ def import_branches():
         return jsonify({'error': 'No branch rows found to import. Please check the file.'}), 400
 
     conn = get_db_connection()
-    cur = conn.cursor()
+    importer = BranchImporter(conn.cursor())
+    if data.get('dry_run'):
+        importer.plan_rows(rows)
+        return _branch_plan_preview(conn, importer)
+    importer.import_rows(rows)
+    conn.commit()
+    conn.close()
+    summary = importer.summary
+    summary['success'] = True
+    return jsonify(summary)
 
-    summary = {
-        'brands_created': 0,
-        'branches_created': 0,
-        'branches_skipped': 0,
-        'employees_created': 0,
-        'employees_skipped': 0,
-        'errors': [],
-    }
-
-    brand_cache = {}
-
-    def get_or_create_brand(brand_name):
-        key = brand_name.lower()
-        if key in brand_cache:
-            return brand_cache[key]
-        cur.execute('SELECT id FROM brands WHERE name = ?', (brand_name,))
-        found = cur.fetchone()
-        if found:
-            brand_cache[key] = found[0]
-            return found[0]
-        cur.execute('INSERT INTO brands (name) VALUES (?)', (brand_name,))
-        summary['brands_created'] += 1
-        brand_cache[key] = cur.lastrowid
-        return cur.lastrowid
-
-    for idx, row in enumerate(rows):
-        if not isinstance(row, dict):
-            continue
-        name = (row.get('name') or '').strip()
-        if not name:
-            continue
-        code = ((row.get('code') or '').strip().upper()) or None
-        brand_name = (row.get('brand') or '').strip()
-        manager = (row.get('manager') or '').strip()
-        email = (row.get('email') or '').strip()
 
-        try:
-            brand_id = get_or_create_brand(brand_name) if brand_name else None
-
-            cur.execute('SELECT id, brand_id, branch_code FROM branches WHERE name = ?', (name,))
-            existing = cur.fetchone()
-            if existing:
-                branch_id = existing[0]
-                summary['branches_skipped'] += 1
-                backfills, params = [], []
-                if brand_id and not existing[1]:
-                    backfills.append('brand_id = ?')
-                    params.append(brand_id)
-                if code and not existing[2]:
-                    backfills.append('branch_code = ?')
-                    params.append(code)
-                if backfills:
-                    params.append(branch_id)
-                    cur.execute('UPDATE branches SET ' + ', '.join(backfills) + ' WHERE id = ?', params)
-            else:
-                cur.execute(
-                    'INSERT INTO branches (name, brand_id, branch_code) VALUES (?, ?, ?)',
-                    (name, brand_id, code),
-                )
-                branch_id = cur.lastrowid
-                summary['branches_created'] += 1
-
-            ensure_restaurant_default_department_for_branch(cur, branch_id)
-
-            if manager:
-                cur.execute(
-                    'SELECT id FROM departments WHERE branch_id = ? AND name = ?',
-                    (branch_id, RESTAURANT_DEFAULT_DEPARTMENT_NAME),
-                )
-                dep = cur.fetchone()
-                if dep:
-                    dep_id = dep[0]
-                    cur.execute(
-                        'SELECT id, email FROM users WHERE name = ? AND department_id = ?',
-                        (manager, dep_id),
-                    )
-                    existing_emp = cur.fetchone()
-                    if existing_emp:
-                        summary['employees_skipped'] += 1
-                    else:
-                        cur.execute(
-                            'INSERT INTO users (name, employee_id, mobile, email, department_id) VALUES (?, ?, ?, ?, ?)',
-                            (manager, None, None, email or None, dep_id),
-                        )
-                        summary['employees_created'] += 1
-        except sqlite3.Error as e:
-            summary['errors'].append(f'Row {idx + 1} ("{name}"): {str(e)}')
+@admin_bp.route('/import-branches/upload', methods=['POST'])
+@login_required
+def upload_import_branches():
+    """Import branches from an uploaded .csv/.xlsx file (multipart field ``file``).
+
+    The file is parsed on the server row by row and imported in batches, each
+    committed on its own, so large files never have to be held in memory or sent
+    as one JSON payload. If the file turns out to be damaged after some batches were
+    committed, the 400 response has ``partial: true`` and ``rows_committed``. Same column rules and response as ``/import-branches``,
+    including the ``dry_run`` preview (form field ``dry_run=1``). With
+    ``background=1`` the file is queued as a job and 202 + job id is returned.
+    """
+    if not current_user.has_it_access():
+        return jsonify({'error': 'Access denied. Only IT users can import branches.'}), 403
 
-    conn.commit()
+    return _import_uploaded_rows(
+        'import_branches',
+        dry_run=request.form.get('dry_run') in ('1', 'true'),
+    )
+
+
+@admin_bp.route('/import-branches/apply', methods=['POST'])
+@login_required
+def apply_import_branches():
+    """Apply a branch import plan previewed with ``dry_run``.
+
+    Expects JSON: { "plan_id": "..." }. The plan is written in one short
+    transaction, and only if brands, branches, departments and employees are
+    unchanged since the preview; otherwise 409 and the file must be previewed again.
+    """
+    if not current_user.has_it_access():
+        return jsonify({'error': 'Access denied. Only IT users can import branches.'}), 403
+
+    data = request.get_json(silent=True) or {}
+    plan_id = str(data.get('plan_id') or '').strip()
+    if not plan_id:
+        return jsonify({'error': 'Missing import preview id.'}), 400
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute('BEGIN IMMEDIATE')
+    stored = load_import_plan(cur, plan_id, 'branches')
+    if not stored:
+        conn.rollback()
+        conn.close()
+        return jsonify({'error': 'This import preview has expired. Please preview the file again.'}), 404
+    payload, base_versions = stored
+    if get_data_versions(cur, DIRECTORY_TABLES) != base_versions:
+        conn.rollback()
+        conn.close()
+        return jsonify({
+            'error': 'Branches, brands or employees changed since this preview was made. '
+                     'Please preview the import again.'
+        }), 409
+    try:
+        apply_branch_plan(cur, payload['changes'])
+        cur.execute('DELETE FROM import_plans WHERE id = ?', (plan_id,))
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        conn.close()
+        return jsonify({'error': f'Import failed: {str(e)}'}), 500
     conn.close()
+    summary = payload['summary']
     summary['success'] = True
     return jsonify(summary)
 
 
+def _branch_plan_preview(conn, importer):
+    summary = importer.summary
+    plan_id = save_import_plan(
+        conn.cursor(),
+        'branches',
+        {'changes': importer.plan, 'summary': summary},
+        importer.base_versions,
+        current_user.display_name,
+    )
+    conn.commit()
+    conn.close()
+    response = dict(summary)
+    response.update({
+        'success': True,
+        'dry_run': True,
+        'plan_id': plan_id,
+        'changes': branch_plan_counts(importer.plan),
+        'plan': importer.plan,
+    })
+    return jsonify(response)
+
+
 @admin_bp.route('/import-office-employees', methods=['POST'])
 @login_required
 def import_office_employees():
@@ -384,196 +424,227 @@ def import_office_employees():
         return jsonify({'error': 'No employee rows found to import. Please check the file.'}), 400
 
     conn = get_db_connection()
-    cur = conn.cursor()
+    importer = EmployeeImporter(conn.cursor())
+    importer.import_rows(rows)
+    conn.commit()
+    conn.close()
+    summary = importer.summary
+    summary['success'] = True
+    return jsonify(summary)
 
-    summary = {
-        'departments_created': 0,
-        'office_employees_created': 0,
-        'restaurant_employees_created': 0,
-        'employees_created': 0,
-        'employees_skipped': 0,
-        'employees_updated': 0,
-        'errors': [],
-    }
-
-    dept_cache = {}
-    branch_dept_cache = {}
-
-    def get_or_create_office_department(dept_name):
-        key = dept_name.lower()
-        if key in dept_cache:
-            return dept_cache[key]
-        cur.execute(
-            'SELECT id FROM departments WHERE name = ? AND branch_id IS NULL',
-            (dept_name,),
-        )
-        found = cur.fetchone()
-        if found:
-            dept_cache[key] = found[0]
-            return found[0]
-        cur.execute(
-            'INSERT INTO departments (name, branch_id) VALUES (?, NULL)',
-            (dept_name,),
-        )
-        summary['departments_created'] += 1
-        dept_cache[key] = cur.lastrowid
-        return cur.lastrowid
-
-    def optional_text(value):
-        text = (value or '').strip()
-        return text or None
-
-    def find_restaurant_department(branch_code):
-        key = (branch_code or '').strip().upper()
-        if not key:
-            return None
-        if key in branch_dept_cache:
-            return branch_dept_cache[key]
-        cur.execute(
-            '''
-            SELECT d.id
-            FROM departments d
-            JOIN branches b ON d.branch_id = b.id
-            WHERE UPPER(COALESCE(b.branch_code, '')) = ? AND d.name = ?
-            ''',
-            (key, RESTAURANT_DEFAULT_DEPARTMENT_NAME),
-        )
-        found = cur.fetchone()
-        branch_dept_cache[key] = found[0] if found else None
-        return branch_dept_cache[key]
-
-    def is_office_department_name(dept_name):
-        value = (dept_name or '').strip().lower()
-        return value not in ('', 'restaurant', 'muscat', 'al batinah', 'al dakhilia', 'al sharqiah', 'al dhahira', 'office')
-
-    def backfill_employee_rows(existing_rows, new_employee_id, new_mobile, new_email, new_department_id):
-        changed = False
-        for existing in existing_rows:
-            existing_row_id, current_employee_id, current_mobile, current_email, current_department_id = existing
-            updates = []
-            params = []
-            if new_employee_id and not current_employee_id:
-                updates.append('employee_id = ?')
-                params.append(new_employee_id)
-            if new_mobile and not current_mobile:
-                updates.append('mobile = ?')
-                params.append(new_mobile)
-            if new_email and not current_email:
-                updates.append('email = ?')
-                params.append(new_email)
-            if new_department_id and not current_department_id:
-                updates.append('department_id = ?')
-                params.append(new_department_id)
-            if not updates:
-                continue
-            params.append(existing_row_id)
-            cur.execute('UPDATE users SET ' + ', '.join(updates) + ' WHERE id = ?', params)
-            changed = True
-        return changed
 
-    for idx, row in enumerate(rows):
-        if not isinstance(row, dict):
-            continue
-        name = (row.get('name') or '').strip()
-        if not name:
-            continue
-        department = (row.get('department') or '').strip()
-        employee_id = optional_text(row.get('employee_id'))
-        mobile = optional_text(row.get('mobile'))
-        email = optional_text(row.get('email'))
-        venue = ((row.get('venue') or 'office').strip().lower()) or 'office'
-        branch_code = optional_text((row.get('branch_code') or '').upper())
+@admin_bp.route('/import-office-employees/upload', methods=['POST'])
+@login_required
+def upload_import_office_employees():
+    """Import employees from an uploaded .csv/.xlsx file (multipart field ``file``).
 
+    Same column rules and response as ``/import-office-employees``; rows are parsed
+    on the server and imported in committed batches. ``background=1`` queues a job.
+    """
+    if not current_user.has_it_access():
+        return jsonify({'error': 'Access denied. Only IT users can import employees.'}), 403
+
+    return _import_uploaded_rows('import_employees')
+
+
+# kind -> (importer class, sheet rows -> import dicts, message when nothing matched)
+_FILE_IMPORTS = {
+    'import_branches': (
+        BranchImporter,
+        iter_branch_import_rows,
+        'No branch rows found to import. Please check the file.',
+    ),
+    'import_employees': (
+        EmployeeImporter,
+        iter_employee_import_rows,
+        'No employee rows found to import. Please check the file.',
+    ),
+}
+
+
+def _import_uploaded_rows(kind, dry_run=False):
+    importer_cls, iter_rows, empty_message = _FILE_IMPORTS[kind]
+    upload = request.files.get('file')
+    if upload is None or not (upload.filename or '').strip():
+        return jsonify({'error': 'Please choose a file to import.'}), 400
+
+    try:
+        reader = open_spreadsheet(upload)
+    except SpreadsheetError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if background_requested() and not dry_run:
+        upload.stream.seek(0)
+        return enqueue_job_response(kind, {'path': spool_upload(upload), 'filename': upload.filename})
+
+    conn = get_db_connection()
+    importer = importer_cls(conn.cursor())
+    committed_rows = 0
+    try:
         try:
-            dep_id = None
-            if venue == 'restaurant':
-                dep_id = find_restaurant_department(branch_code) if branch_code else None
-            elif is_office_department_name(department):
-                dep_id = get_or_create_office_department(department)
-
-            if employee_id:
-                cur.execute(
-                    'SELECT id, employee_id, mobile, email, department_id FROM users WHERE employee_id = ?',
-                    (employee_id,),
-                )
-                existing_rows = cur.fetchall()
-                if existing_rows:
-                    if backfill_employee_rows(existing_rows, employee_id, mobile, email, dep_id):
-                        summary['employees_updated'] += 1
-                    summary['employees_skipped'] += 1
-                    continue
-
-            if dep_id:
-                cur.execute(
-                    'SELECT id, employee_id, mobile, email, department_id FROM users WHERE LOWER(TRIM(name)) = LOWER(TRIM(?)) AND department_id = ?',
-                    (name, dep_id),
-                )
-                existing_rows = cur.fetchall()
-            else:
-                existing_rows = []
-            if not existing_rows:
-                if venue == 'restaurant':
-                    cur.execute(
-                        '''
-                        SELECT u.id, u.employee_id, u.mobile, u.email, u.department_id
-                        FROM users u
-                        JOIN departments d ON u.department_id = d.id
-                        WHERE LOWER(TRIM(u.name)) = LOWER(TRIM(?)) AND d.branch_id IS NOT NULL
-                        ''',
-                        (name,),
-                    )
+            for batch in batched(iter_rows(reader)):
+                if dry_run:
+                    importer.plan_rows(batch)
                 else:
-                    cur.execute(
-                        '''
-                        SELECT u.id, u.employee_id, u.mobile, u.email, u.department_id
-                        FROM users u
-                        LEFT JOIN departments d ON u.department_id = d.id
-                        WHERE LOWER(TRIM(u.name)) = LOWER(TRIM(?))
-                          AND (u.department_id IS NULL OR d.branch_id IS NULL)
-                        ''',
-                        (name,),
-                    )
-                existing_rows = cur.fetchall()
-            if not existing_rows:
-                cur.execute(
-                    'SELECT id, employee_id, mobile, email, department_id FROM users WHERE LOWER(TRIM(name)) = LOWER(TRIM(?))',
-                    (name,),
-                )
-                existing_rows = cur.fetchall()
-            if existing_rows:
-                if backfill_employee_rows(existing_rows, employee_id, mobile, email, dep_id):
-                    summary['employees_updated'] += 1
-                summary['employees_skipped'] += 1
-                continue
+                    importer.import_rows(batch)
+                    conn.commit()
+                    committed_rows = importer.rows_seen
+        except SpreadsheetError as e:
+            conn.rollback()
+            if not committed_rows:
+                return jsonify({'error': str(e)}), 400
+            # Earlier batches are already committed: say how far the import got.
+            summary = importer.summary
+            summary.update({
+                'success': False,
+                'partial': True,
+                'rows_read': committed_rows,
+                'rows_committed': committed_rows,
+                'error': _partial_import_message(e, committed_rows),
+            })
+            return jsonify(summary), 400
+
+        if not importer.rows_seen:
+            return jsonify({'error': empty_message}), 400
+        if dry_run:
+            return _branch_plan_preview(conn, importer)
+    finally:
+        conn.close()
+    summary = importer.summary
+    summary['rows_read'] = importer.rows_seen
+    summary['success'] = True
+    return jsonify(summary)
 
-            if venue == 'restaurant' and not dep_id:
-                summary['errors'].append(
-                    f'Row {idx + 1} ("{name}"): could not determine the restaurant branch/location.'
-                )
-                continue
 
-            cur.execute(
-                'INSERT INTO users (name, employee_id, mobile, email, department_id) '
-                'VALUES (?, ?, ?, ?, ?)',
-                (name, employee_id, mobile, email, dep_id),
-            )
-            summary['employees_created'] += 1
-            if venue == 'restaurant':
-                summary['restaurant_employees_created'] += 1
-            else:
-                summary['office_employees_created'] += 1
-        except sqlite3.Error as e:
-            summary['errors'].append(f'Row {idx + 1} ("{name}"): {str(e)}')
+def _partial_import_message(error, committed_rows):
+    return (
+        f'{error} The first {committed_rows} rows were imported; fix the file and upload it '
+        'again (rows already imported are skipped).'
+    )
 
-    conn.commit()
-    conn.close()
+
+def _import_spooled_file(ctx, payload, kind):
+    """Job body for a queued upload: same batches as the inline import, with progress."""
+    importer_cls, iter_rows, empty_message = _FILE_IMPORTS[kind]
+    path = payload['path']
+    conn = get_db_connection()
+    try:
+        with open(path, 'rb') as fh:
+            reader = open_spreadsheet(FileStorage(stream=fh, filename=payload.get('filename') or path))
+            importer = importer_cls(conn.cursor())
+            try:
+                for batch in batched(iter_rows(reader)):
+                    importer.import_rows(batch)
+                    conn.commit()
+                    ctx.progress(importer.rows_seen)
+            except SpreadsheetError as e:
+                conn.rollback()
+                if importer.rows_seen:
+                    raise SpreadsheetError(_partial_import_message(e, importer.rows_seen)) from e
+                raise
+    finally:
+        conn.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    if not importer.rows_seen:
+        raise ValueError(empty_message)
+    summary = importer.summary
+    summary['rows_read'] = importer.rows_seen
     summary['success'] = True
-    return jsonify(summary)
+    return summary
+
+
+@job_handler('import_branches')
+def _import_branches_job(ctx, payload):
+    return _import_spooled_file(ctx, payload, 'import_branches')
+
+
+@job_handler('import_employees')
+def _import_employees_job(ctx, payload):
+    return _import_spooled_file(ctx, payload, 'import_employees')
+
+@admin_bp.route('/write-queue/metrics', methods=['GET'])
+@login_required
+def write_queue_metrics():
+    """Queue depth, group-commit sizes and lock/queue wait times of the writer thread."""
+    if not current_user.has_it_access():
+        return jsonify({'error': 'Access denied.'}), 403
+    return jsonify(get_write_metrics())
+
+@admin_bp.route('/slow-queries', methods=['GET'])
+@login_required
+def slow_queries():
+    """Recent statements over ``SLOW_QUERY_MS`` with their query plans (``?format=json`` for raw entries)."""
+    if not current_user.has_it_access():
+        if request.args.get('format') == 'json':
+            return jsonify({'error': 'Access denied.'}), 403
+        return redirect(url_for('assets.dashboard'))
+    slow_log = current_app.extensions['slow_query_log']
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'threshold_ms': round(slow_log.threshold_seconds * 1000, 1),
+            'entries': slow_log.entries(),
+        })
+    return render_template(
+        'slow_queries.html',
+        threshold_ms=round(slow_log.threshold_seconds * 1000, 1),
+        groups=slow_log.summary(),
+        entries=slow_log.entries(),
+    )
+
+
+@admin_bp.route('/slow-queries/clear', methods=['POST'])
+@login_required
+def clear_slow_queries():
+    if not current_user.has_it_access():
+        return jsonify({'error': 'Access denied.'}), 403
+    current_app.extensions['slow_query_log'].clear()
+    return jsonify({'success': True})
+
+
+@admin_bp.route('/profiles', methods=['GET'])
+@login_required
+def request_profiles():
+    """Requests profiled with ``?_profile=1`` / ``X-Profile: 1``, newest first."""
+    if not current_user.has_it_access():
+        return jsonify({'error': 'Access denied.'}), 403
+    return jsonify({'profiles': current_app.extensions['request_profiles'].summaries()})
+
+
+@admin_bp.route('/profiles/<int:profile_id>', methods=['GET'])
+@login_required
+def request_profile(profile_id):
+    """One profile: top frames, SQL timeline and folded stacks."""
+    if not current_user.has_it_access():
+        return jsonify({'error': 'Access denied.'}), 403
+    profile = current_app.extensions['request_profiles'].get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found (only the most recent ones are kept).'}), 404
+    return jsonify(profile)
+
+
+@admin_bp.route('/profiles/<int:profile_id>/collapsed', methods=['GET'])
+@login_required
+def request_profile_collapsed(profile_id):
+    """Folded stacks for flamegraph.pl or speedscope."""
+    if not current_user.has_it_access():
+        return jsonify({'error': 'Access denied.'}), 403
+    profile = current_app.extensions['request_profiles'].get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found (only the most recent ones are kept).'}), 404
+    return Response(
+        profile['collapsed'],
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename=profile-{profile_id}.folded'},
+    )
 
 # ===== DEPARTMENT MANAGEMENT API =====
 
 @admin_bp.route('/departments', methods=['GET'])
 @login_required
+@etag_from_data_versions(('departments', 'branches'))
 def get_departments():
     branch_id = request.args.get('branch_id') or request.args.get('building_id')
     office_only = (request.args.get('office_only') or '').strip().lower() in ('1', 'true', 'yes')
@@ -1285,6 +1356,7 @@ def delete_user(user_id):
 
 @admin_bp.route('/asset-types', methods=['GET'])
 @login_required
+@etag_from_data_versions(('asset_types',))
 def get_asset_types():
     conn = get_db_connection()
     cur = conn.cursor()
@@ -1670,6 +1742,7 @@ def _sync_inclusions_for_asset_name(cur, asset_name_id, updates):
 
 @admin_bp.route('/asset-names', methods=['GET'])
 @login_required
+@etag_from_data_versions(('asset_names', 'asset_types', 'asset_name_spec_fields', 'asset_name_inclusions'))
 def get_asset_names():
     asset_type_id = request.args.get('asset_type_id')
     conn = get_db_connection()
@@ -9,11 +9,14 @@ from flask import (
     send_file,
     make_response,
     flash,
+    Response,
+    stream_with_context,
 )
 from flask_login import login_required, current_user
 import base64
 from models.database import (
     get_db_connection,
+    get_branch_code_map,
     generate_asset_code,
     generate_shared_asset_code,
     SHARED_ASSET_CODE_PREFIX,
@@ -23,6 +26,7 @@ from models.database import (
     qr_layout_to_api_dict,
     upsert_qr_label_layout_updates,
     RESTAURANT_DEFAULT_DEPARTMENT_NAME,
+    ID_LIST_INLINE_LIMIT,
     RESTAURANT_AREA_OPTIONS,
     ensure_restaurant_area_department_for_branch,
     OFFICE_BRANCH_LABEL,
@@ -32,16 +36,42 @@ from models.database import (
     asset_type_for_venue_matches,
     format_branch_with_code,
     format_asset_location_display,
+    sql_id_set,
 )
 from utils.asset_documents import (
     list_documents_for_asset,
     list_documents_grouped_by_asset_ids,
     save_uploaded_files_for_assets,
+    stage_uploaded_files,
+    attach_staged_documents,
+    remove_placed_documents,
+    discard_staged_documents,
     delete_document_record,
     delete_all_documents_for_assets,
     document_path,
 )
+from utils.asset_archive import (
+    archive_assets,
+    permanent_delete_archived_assets,
+    restore_archived_assets,
+)
+from utils.register_export import (
+    EXPORT_FORMATS,
+    cached_export_path,
+    iter_csv_chunks,
+    iter_ndjson_chunks,
+    iter_register_pages,
+    iter_register_xlsx_chunks,
+    tee_to_export_cache,
+    workbook_cache_key,
+)
+from utils.conditional import etag_from_data_versions
+from utils.jobs import job_handler
+from utils.reference_cache import cached_reference
+from routes.jobs import background_requested, enqueue_job_response
+from utils.write_queue import WriteRejected, WriteTimeout, run_write
 import qrcode
+from functools import lru_cache
 from io import BytesIO
 import uuid
 import json
@@ -49,6 +79,17 @@ import datetime
 
 assets_bp = Blueprint('assets', __name__)
 
+# Rendered QR PNGs keyed by target URL (a few hundred bytes each); label batches and
+# the register re-request the same codes constantly.
+QR_PNG_CACHE_SIZE = 4096
+
+# Everything a dashboard ``partial=1`` response reads (rows, owner contacts, shared
+# group locations, document links); its ETag follows their data versions.
+DASHBOARD_PARTIAL_TABLES = (
+    'assets', 'asset_documents', 'branches', 'brands', 'departments',
+    'shared_groups', 'shared_group_members', 'users',
+)
+
 
 def _parse_asset_date(raw_value):
     """Return YYYY-MM-DD or today's date if missing/invalid."""
@@ -82,14 +123,6 @@ def _parse_asset_kind(raw):
     return kind if kind in ASSET_KINDS else ASSET_KIND_BRANCH
 
 
-def _branch_code_map(cur):
-    cur.execute('SELECT name, branch_code FROM branches')
-    return {
-        row[0]: (str(row[1]).strip() if row[1] else '')
-        for row in cur.fetchall()
-    }
-
-
 # Dashboard: one register row per shared group (not one row per branch).
 _ASSET_DISPLAY_KEY_SQL = """
 CASE
@@ -104,40 +137,35 @@ END
 
 
 def _append_dashboard_branch_filter(where_clauses, params, branch_filter):
-    """Include shared groups when any sibling branch matches the filter."""
+    """Include shared groups when any sibling branch matches the filter.
+
+    Compiled as a UNION of index-driven row sets (rows in the branch, group peers via
+    shared_group_members, legacy ungrouped siblings) so the cost follows the branch,
+    not the size of the register.
+    """
     where_clauses.append(
-        f'''(
-            branch = ?
-            OR (
-                COALESCE(asset_kind, 'branch') = ?
-                AND COALESCE(TRIM(shared_group_id), '') != ''
-                AND shared_group_id IN (
-                    SELECT shared_group_id FROM assets
-                    WHERE branch = ?
-                      AND COALESCE(asset_kind, 'branch') = ?
-                      AND COALESCE(TRIM(shared_group_id), '') != ''
-                )
-            )
-            OR (
-                COALESCE(asset_kind, 'branch') = ?
-                AND (shared_group_id IS NULL OR TRIM(shared_group_id) = '')
-                AND EXISTS (
-                    SELECT 1 FROM assets s
-                    WHERE COALESCE(s.asset_kind, 'branch') = ?
-                      AND (s.shared_group_id IS NULL OR TRIM(s.shared_group_id) = '')
-                      AND s.name = assets.name
-                      AND IFNULL(s.asset_type, '') = IFNULL(assets.asset_type, '')
-                      AND IFNULL(s.owner, '') = IFNULL(assets.owner, '')
-                      AND s.branch = ?
-                )
-            )
+        '''id IN (
+            SELECT id FROM assets WHERE branch = ?
+            UNION
+            SELECT peer.asset_id
+            FROM shared_group_members hit
+            JOIN shared_group_members peer ON peer.group_id = hit.group_id
+            WHERE hit.branch = ?
+            UNION
+            SELECT s.id
+            FROM assets hit
+            JOIN assets s
+              ON s.name = hit.name
+             AND s.asset_kind = hit.asset_kind
+             AND IFNULL(s.asset_type, '') = IFNULL(hit.asset_type, '')
+             AND IFNULL(s.owner, '') = IFNULL(hit.owner, '')
+             AND (s.shared_group_id IS NULL OR TRIM(s.shared_group_id) = '')
+            WHERE hit.branch = ?
+              AND hit.asset_kind = ?
+              AND (hit.shared_group_id IS NULL OR TRIM(hit.shared_group_id) = '')
         )'''
     )
-    params.extend([
-        branch_filter,
-        ASSET_KIND_SHARED, branch_filter, ASSET_KIND_SHARED,
-        ASSET_KIND_SHARED, ASSET_KIND_SHARED, branch_filter,
-    ])
+    params.extend([branch_filter, branch_filter, branch_filter, ASSET_KIND_SHARED])
 
 
 def _append_dashboard_department_filter(where_clauses, params, department_filter):
@@ -188,46 +216,40 @@ def _fetch_dashboard_assets(cur, where_sql, params, sort_by, sort_dir, limit, of
 
 
 def _expand_shared_group_asset_ids(cur, asset_ids):
-    """When acting on a shared asset row, include all sibling branch rows."""
-    expanded = set()
-    for raw_id in asset_ids:
-        try:
-            asset_id = int(raw_id)
-        except (TypeError, ValueError):
-            continue
-        cur.execute(
-            '''
-            SELECT id, asset_kind, shared_group_id, name, asset_type, owner
-            FROM assets WHERE id = ?
-            ''',
-            (asset_id,),
+    """When acting on a shared asset row, include all sibling branch rows.
+
+    Resolves every submitted id, its shared_group_id siblings and legacy
+    (name, asset_type, owner) siblings in one compound query over the staged id set.
+    """
+    id_set, params = sql_id_set(cur, asset_ids, temp_table='expand_asset_ids')
+    cur.execute(
+        f'''
+        WITH picked AS (
+            SELECT id, asset_kind, TRIM(IFNULL(shared_group_id, '')) AS gid,
+                   name, asset_type, owner
+            FROM assets
+            WHERE id IN {id_set}
         )
-        row = cur.fetchone()
-        if not row:
-            continue
-        expanded.add(row['id'])
-        if (row['asset_kind'] or ASSET_KIND_BRANCH) != ASSET_KIND_SHARED:
-            continue
-        gid = (row['shared_group_id'] or '').strip()
-        if gid:
-            cur.execute('SELECT id FROM assets WHERE shared_group_id = ?', (gid,))
-            for sibling in cur.fetchall():
-                expanded.add(sibling[0])
-        else:
-            cur.execute(
-                '''
-                SELECT id FROM assets
-                WHERE asset_kind = ?
-                  AND name = ?
-                  AND IFNULL(asset_type, '') = IFNULL(?, '')
-                  AND IFNULL(owner, '') = IFNULL(?, '')
-                  AND (shared_group_id IS NULL OR TRIM(shared_group_id) = '')
-                ''',
-                (ASSET_KIND_SHARED, row['name'], row['asset_type'], row['owner']),
-            )
-            for sibling in cur.fetchall():
-                expanded.add(sibling[0])
-    return list(expanded)
+        SELECT id FROM picked
+        UNION
+        SELECT s.id
+        FROM picked p
+        JOIN assets s ON s.shared_group_id = p.gid
+        WHERE p.asset_kind = ? AND p.gid != ''
+        UNION
+        SELECT s.id
+        FROM picked p
+        JOIN assets s
+          ON s.asset_kind = ?
+         AND s.name = p.name
+         AND IFNULL(s.asset_type, '') = IFNULL(p.asset_type, '')
+         AND IFNULL(s.owner, '') = IFNULL(p.owner, '')
+         AND (s.shared_group_id IS NULL OR TRIM(s.shared_group_id) = '')
+        WHERE p.asset_kind = ? AND p.gid = ''
+        ''',
+        params + [ASSET_KIND_SHARED, ASSET_KIND_SHARED, ASSET_KIND_SHARED],
+    )
+    return [row[0] for row in cur.fetchall()]
 
 
 def _sync_shared_group_status(cur, asset_id, used_status):
@@ -264,7 +286,7 @@ def _attach_asset_location_displays(cur, assets):
     """Set location_lines on each asset (branch code + name; all branches for shared)."""
     if not assets:
         return
-    codes = _branch_code_map(cur)
+    codes = get_branch_code_map(cur)
 
     group_ids = sorted({
         (a.get('shared_group_id') or '').strip()
@@ -277,10 +299,11 @@ def _attach_asset_location_displays(cur, assets):
         placeholders = ','.join('?' * len(group_ids))
         cur.execute(
             f'''
-            SELECT shared_group_id, branch
-            FROM assets
-            WHERE shared_group_id IN ({placeholders})
-            ORDER BY branch
+            SELECT g.group_key, m.branch
+            FROM shared_groups g
+            JOIN shared_group_members m ON m.group_id = g.id
+            WHERE g.group_key IN ({placeholders})
+            ORDER BY m.branch
             ''',
             group_ids,
         )
@@ -427,17 +450,19 @@ def _upsert_asset_row(cur, asset_name, price, owner, branch, department, used_st
     return cur.lastrowid
 
 
-def _get_asset_name_id(cur, asset_name, asset_type):
+def _load_asset_name_ids(cur):
     cur.execute(
         '''
-        SELECT an.id FROM asset_names an
+        SELECT an.name, at.name, an.id FROM asset_names an
         JOIN asset_types at ON an.asset_type_id = at.id
-        WHERE an.name = ? AND at.name = ?
-        ''',
-        (asset_name, asset_type),
+        '''
     )
-    row = cur.fetchone()
-    return row[0] if row else None
+    return {(row[0], row[1]): row[2] for row in cur.fetchall()}
+
+
+def _get_asset_name_id(cur, asset_name, asset_type):
+    ids = cached_reference(cur, 'asset_name_ids', ('asset_names', 'asset_types'), _load_asset_name_ids)
+    return ids.get((asset_name, asset_type))
 
 
 def _get_spec_fields_for_asset_name(cur, asset_name_id):
@@ -627,6 +652,41 @@ def _compute_chart_data_from_asset_rows(rows):
     }
 
 
+def _load_owner_contacts(cur, owners):
+    """Contact lookups by (name, department), (name, branch) and name for ``owners``.
+
+    Only the given names are read (through the ``users`` name index), so the cost
+    follows the page size rather than the size of the employee roster.
+    """
+    by_dept = {}
+    by_branch = {}
+    by_name = {}
+    owners = sorted(owners)
+    for start in range(0, len(owners), ID_LIST_INLINE_LIMIT):
+        chunk = owners[start:start + ID_LIST_INLINE_LIMIT]
+        placeholders = ','.join('?' * len(chunk))
+        cur.execute(
+            f'''
+            SELECT u.name, d.name AS department, b.name AS branch, u.mobile, u.email
+            FROM users u
+            JOIN departments d ON u.department_id = d.id
+            LEFT JOIN branches b ON d.branch_id = b.id
+            WHERE u.name IN ({placeholders})
+            ORDER BY u.id
+            ''',
+            chunk,
+        )
+        for name, dept, branch, mobile, email in cur.fetchall():
+            contact = {'mobile': mobile or '', 'email': email or ''}
+            if not contact['mobile'] and not contact['email']:
+                continue
+            by_dept[(name, dept)] = contact
+            if branch:
+                by_branch[(name, branch)] = contact
+            by_name.setdefault(name, contact)
+    return by_dept, by_branch, by_name
+
+
 def _attach_owner_contacts(cur, assets):
     """Attach owner mobile/email onto asset dicts for table display.
 
@@ -635,25 +695,8 @@ def _attach_owner_contacts(cur, assets):
     (Kitchen, Dining, …) or blank — so also resolve by branch / Restaurant /
     owner name alone.
     """
-    cur.execute(
-        '''
-        SELECT u.name, d.name AS department, b.name AS branch, u.mobile, u.email
-        FROM users u
-        JOIN departments d ON u.department_id = d.id
-        LEFT JOIN branches b ON d.branch_id = b.id
-        '''
-    )
-    by_dept = {}
-    by_branch = {}
-    by_name = {}
-    for name, dept, branch, mobile, email in cur.fetchall():
-        contact = {'mobile': mobile or '', 'email': email or ''}
-        if not contact['mobile'] and not contact['email']:
-            continue
-        by_dept[(name, dept)] = contact
-        if branch:
-            by_branch[(name, branch)] = contact
-        by_name.setdefault(name, contact)
+    owners = {asset.get('owner') for asset in assets} - {None, '', 'No Owner'}
+    by_dept, by_branch, by_name = _load_owner_contacts(cur, owners) if owners else ({}, {}, {})
 
     for asset in assets:
         owner = asset.get('owner') or ''
@@ -676,6 +719,7 @@ def _attach_owner_contacts(cur, assets):
 
 @assets_bp.route('/dashboard')
 @login_required
+@etag_from_data_versions(DASHBOARD_PARTIAL_TABLES, when=lambda: request.args.get('partial') == '1')
 def dashboard():
     page = int(request.args.get('page', 1))
     sort_by = request.args.get('sort_by', 'id')
@@ -1013,12 +1057,16 @@ def _form_getlist(data, key):
     return [raw]
 
 
-def _create_assets_from_payload(cur, form_data, uploaded_files=None, force_insert=False):
+def _create_assets_from_payload(cur, form_data, staged_documents=None, force_insert=False,
+                                placed_documents=None):
     """
     Create asset row(s) from one form-like payload.
     Returns (created_asset_ids, error_message). On error, created_asset_ids is [].
     Does not commit; caller owns the transaction.
 
+    ``staged_documents`` come from ``stage_uploaded_files``; their stored names are
+    added to ``placed_documents`` so the caller can remove them if the write fails.
+
     When ``force_insert`` is True, always insert new rows (used by multi-asset bulk add).
     """
     selected_asset_names = _form_get(form_data, 'selected_asset_names', '')
@@ -1126,17 +1174,41 @@ def _create_assets_from_payload(cur, form_data, uploaded_files=None, force_inser
             _save_spec_values_for_asset(cur, asset_id, asset_name, asset_type, spec_values_by_name)
             _save_inclusion_values_for_asset(cur, asset_id, asset_name, asset_type, inclusion_values_by_name)
 
-    files = uploaded_files or []
-    files = [f for f in files if f and getattr(f, 'filename', None)]
-    if files and created_asset_ids:
+    if staged_documents and created_asset_ids:
         unique_ids = list(dict.fromkeys(created_asset_ids))
-        _, doc_err = save_uploaded_files_for_assets(cur, unique_ids, files)
+        placed = placed_documents if placed_documents is not None else []
+        doc_err = attach_staged_documents(cur, unique_ids, staged_documents, placed)
         if doc_err:
             return [], doc_err
 
     return created_asset_ids, None
 
 
+def _run_asset_write(apply, staged, placed):
+    """``run_write(apply)`` for units that attach staged uploads.
+
+    The unit drops the staged copies itself once it has linked them, so a unit still
+    running after ``WriteTimeout`` keeps its sources; the caller only drops them when
+    the unit never ran. Documents linked by a unit that was rolled back are removed.
+    """
+    def unit(cur):
+        try:
+            return apply(cur)
+        finally:
+            discard_staged_documents(staged)
+
+    try:
+        return run_write(unit)
+    except WriteTimeout as e:
+        if e.cancelled:
+            discard_staged_documents(staged)
+        raise
+    except Exception:
+        remove_placed_documents(placed)
+        discard_staged_documents(staged)
+        raise
+
+
 @assets_bp.route('/new', methods=['GET'])
 @login_required
 def add_asset_page():
@@ -1146,18 +1218,27 @@ def add_asset_page():
 @assets_bp.route('/add', methods=['POST'])
 @login_required
 def add_asset():
-    conn = get_db_connection()
-    cur = conn.cursor()
-    created_asset_ids, err = _create_assets_from_payload(
-        cur, request.form, request.files.getlist('supporting_documents')
-    )
+    # Uploads are written to disk before the write unit so the writer thread only inserts rows.
+    staged, err = stage_uploaded_files(request.files.getlist('supporting_documents'))
     if err:
-        conn.rollback()
-        conn.close()
         flash(err, 'error')
         return redirect(url_for('assets.add_asset_page'))
-    conn.commit()
-    conn.close()
+
+    placed = []
+
+    def apply(cur):
+        created_asset_ids, err = _create_assets_from_payload(
+            cur, request.form, staged, placed_documents=placed
+        )
+        if err:
+            raise WriteRejected(err)
+        return created_asset_ids
+
+    try:
+        _run_asset_write(apply, staged, placed)
+    except WriteRejected as e:
+        flash(str(e), 'error')
+        return redirect(url_for('assets.add_asset_page'))
     return redirect(url_for('assets.dashboard'))
 
 
@@ -1185,31 +1266,41 @@ def add_assets_bulk():
     if not isinstance(payloads, list) or not payloads:
         return fail('Please add at least one asset.')
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    all_created = []
-    for index, payload in enumerate(payloads):
-        if not isinstance(payload, dict):
-            conn.rollback()
-            conn.close()
-            return fail(f'Invalid data for asset {index + 1}.')
-        # Normalize branch for non-shared: accept list or string
-        branches = payload.get('branch')
-        if isinstance(branches, list) and payload.get('asset_kind') != 'shared':
-            payload = dict(payload)
-            payload['branch'] = branches[0] if branches else ''
-        files = request.files.getlist(f'docs_{index}')
-        created_ids, err = _create_assets_from_payload(
-            cur, payload, files, force_insert=True
-        )
+    staged_by_index = {}
+    all_staged = []
+    placed = []
+
+    def apply(cur):
+        all_created = []
+        for index, payload in enumerate(payloads):
+            if not isinstance(payload, dict):
+                raise WriteRejected(f'Invalid data for asset {index + 1}.')
+            # Normalize branch for non-shared: accept list or string
+            branches = payload.get('branch')
+            if isinstance(branches, list) and payload.get('asset_kind') != 'shared':
+                payload = dict(payload)
+                payload['branch'] = branches[0] if branches else ''
+            created_ids, err = _create_assets_from_payload(
+                cur, payload, staged_by_index.get(index), force_insert=True, placed_documents=placed
+            )
+            if err:
+                raise WriteRejected(f'Asset {index + 1}: {err}')
+            all_created.extend(created_ids)
+        return all_created
+
+    # Uploads are written to disk before the write unit so the writer thread only inserts rows.
+    for index in range(len(payloads)):
+        staged, err = stage_uploaded_files(request.files.getlist(f'docs_{index}'))
         if err:
-            conn.rollback()
-            conn.close()
+            discard_staged_documents(all_staged)
             return fail(f'Asset {index + 1}: {err}')
-        all_created.extend(created_ids)
+        staged_by_index[index] = staged
+        all_staged.extend(staged)
 
-    conn.commit()
-    conn.close()
+    try:
+        all_created = _run_asset_write(apply, all_staged, placed)
+    except WriteRejected as e:
+        return fail(str(e))
     record_count = len(all_created)
     flash(
         f'Successfully added {record_count} asset{"s" if record_count != 1 else ""}.',
@@ -1540,9 +1631,11 @@ def _list_shared_group_branches(cur, shared_group_id):
         return []
     cur.execute(
         '''
-        SELECT DISTINCT branch FROM assets
-        WHERE shared_group_id = ?
-        ORDER BY branch COLLATE NOCASE
+        SELECT DISTINCT m.branch
+        FROM shared_groups g
+        JOIN shared_group_members m ON m.group_id = g.id
+        WHERE g.group_key = ?
+        ORDER BY m.branch COLLATE NOCASE
         ''',
         (gid,),
     )
@@ -1612,7 +1705,14 @@ def _get_shared_sibling_rows(cur, asset):
     gid = (asset['shared_group_id'] or '').strip() if 'shared_group_id' in asset.keys() else ''
     if gid:
         cur.execute(
-            'SELECT id, branch, department, owner FROM assets WHERE shared_group_id = ? ORDER BY branch COLLATE NOCASE',
+            '''
+            SELECT a.id, a.branch, a.department, a.owner
+            FROM shared_groups g
+            JOIN shared_group_members m ON m.group_id = g.id
+            JOIN assets a ON a.id = m.asset_id
+            WHERE g.group_key = ?
+            ORDER BY m.branch COLLATE NOCASE
+            ''',
             (gid,),
         )
         return [dict(row) for row in cur.fetchall()]
@@ -1733,96 +1833,91 @@ def handover_asset(asset_id):
     if not owner:
         return jsonify({'error': 'Select a new owner, or mark No Owner Required.'}), 400
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute(
-        '''
-        SELECT id, name, owner, branch, department, asset_code, asset_kind, shared_group_id, asset_type
-        FROM assets WHERE id = ?
-        ''',
-        (asset_id,),
-    )
-    asset = cur.fetchone()
-    if not asset:
-        conn.close()
-        return jsonify({'error': 'Asset not found'}), 404
-
-    source_branch = (request.form.get('source_branch') or request.form.get('handover_source_branch') or '').strip()
-    is_shared_asset = (asset['asset_kind'] or ASSET_KIND_BRANCH) == ASSET_KIND_SHARED
-    if is_shared_asset:
-        if not source_branch:
-            source_branch = (asset['branch'] or '').strip()
-    elif not source_branch:
-        source_branch = (branch or '').strip()
-
-    target_asset_id = asset_id
-    if is_shared_asset and source_branch:
-        target_asset_id = _resolve_shared_asset_row_id(cur, asset, source_branch)
+    def apply(cur):
+        nonlocal branch, department
         cur.execute(
             '''
             SELECT id, name, owner, branch, department, asset_code, asset_kind, shared_group_id, asset_type
             FROM assets WHERE id = ?
             ''',
-            (target_asset_id,),
+            (asset_id,),
         )
-        target_row = cur.fetchone()
-        if target_row:
-            asset = target_row
-            if not branch:
-                branch = asset['branch']
-            if not department and venue != 'office':
-                department = asset['department'] or department
-
-    err = _validate_asset_venue_location(cur, venue, branch, department)
-    if err:
-        conn.close()
-        return jsonify({'error': err}), 400
+        asset = cur.fetchone()
+        if not asset:
+            return {'error': 'Asset not found'}, 404
+
+        source_branch = (request.form.get('source_branch') or request.form.get('handover_source_branch') or '').strip()
+        is_shared_asset = (asset['asset_kind'] or ASSET_KIND_BRANCH) == ASSET_KIND_SHARED
+        if is_shared_asset:
+            if not source_branch:
+                source_branch = (asset['branch'] or '').strip()
+        elif not source_branch:
+            source_branch = (branch or '').strip()
+
+        target_asset_id = asset_id
+        if is_shared_asset and source_branch:
+            target_asset_id = _resolve_shared_asset_row_id(cur, asset, source_branch)
+            cur.execute(
+                '''
+                SELECT id, name, owner, branch, department, asset_code, asset_kind, shared_group_id, asset_type
+                FROM assets WHERE id = ?
+                ''',
+                (target_asset_id,),
+            )
+            target_row = cur.fetchone()
+            if target_row:
+                asset = target_row
+                if not branch:
+                    branch = asset['branch']
+                if not department and venue != 'office':
+                    department = asset['department'] or department
 
-    from_owner = asset['owner'] or ''
-    from_branch = asset['branch'] or ''
-    from_department = asset['department'] or ''
-    current_asset_code = asset['asset_code']
-    from_kind = (asset['asset_kind'] or ASSET_KIND_BRANCH).strip().lower()
-    shared_group_id = (asset['shared_group_id'] or '').strip() or None
-    is_shared_split = from_kind == ASSET_KIND_SHARED
+        err = _validate_asset_venue_location(cur, venue, branch, department)
+        if err:
+            return {'error': err}, 400
+
+        from_owner = asset['owner'] or ''
+        from_branch = asset['branch'] or ''
+        from_department = asset['department'] or ''
+        current_asset_code = asset['asset_code']
+        from_kind = (asset['asset_kind'] or ASSET_KIND_BRANCH).strip().lower()
+        shared_group_id = (asset['shared_group_id'] or '').strip() or None
+        is_shared_split = from_kind == ASSET_KIND_SHARED
+
+        owner_changed = from_owner != owner
+        branch_changed = from_branch != branch
+        department_changed = from_department != department
+
+        # Shared split itself is a structural change; still require owner/location
+        # change so accidental opens don't peel a branch with no transfer intent.
+        if not (owner_changed or branch_changed or department_changed):
+            return {
+                'error': 'Nothing to hand over. Change the owner, branch, or department.',
+            }, 400
+
+        shared_branches_before = []
+        if is_shared_split:
+            if shared_group_id:
+                shared_branches_before = _list_shared_group_branches(cur, shared_group_id)
+            if from_branch and from_branch not in shared_branches_before:
+                shared_branches_before = sorted(
+                    set(shared_branches_before + [from_branch]),
+                    key=lambda b: b.casefold(),
+                )
 
-    owner_changed = from_owner != owner
-    branch_changed = from_branch != branch
-    department_changed = from_department != department
+        new_asset_code = current_asset_code
+        if branch_changed or department_changed:
+            new_asset_code = generate_asset_code(branch, department, cur=cur)
 
-    # Shared split itself is a structural change; still require owner/location
-    # change so accidental opens don't peel a branch with no transfer intent.
-    if not (owner_changed or branch_changed or department_changed):
-        conn.close()
-        return jsonify({
-            'error': 'Nothing to hand over. Change the owner, branch, or department.',
-        }), 400
-
-    shared_branches_before = []
-    if is_shared_split:
-        if shared_group_id:
-            shared_branches_before = _list_shared_group_branches(cur, shared_group_id)
-        if from_branch and from_branch not in shared_branches_before:
-            shared_branches_before = sorted(
-                set(shared_branches_before + [from_branch]),
-                key=lambda b: b.casefold(),
+        history_notes = notes
+        if is_shared_split:
+            split_note = (
+                'Split from Shared Asset covering: '
+                + (', '.join(shared_branches_before) if shared_branches_before else from_branch)
+                + f'. This record is now a Branch Asset at {branch}.'
             )
+            history_notes = f'{notes}\n{split_note}'.strip() if notes else split_note
 
-    new_asset_code = current_asset_code
-    if branch_changed or department_changed:
-        new_asset_code = generate_asset_code(branch, department, cur=cur)
-
-    history_notes = notes
-    if is_shared_split:
-        split_note = (
-            'Split from Shared Asset covering: '
-            + (', '.join(shared_branches_before) if shared_branches_before else from_branch)
-            + f'. This record is now a Branch Asset at {branch}.'
-        )
-        history_notes = f'{notes}\n{split_note}'.strip() if notes else split_note
-
-    try:
         if is_shared_split:
             cur.execute(
                 '''
@@ -1879,9 +1974,7 @@ def handover_asset(asset_id):
             )
             remaining_shared_branches = _list_shared_group_branches(cur, shared_group_id)
 
-        conn.commit()
-        conn.close()
-        return jsonify({
+        return {
             'success': True,
             'asset_code_changed': branch_changed or department_changed,
             'old_asset_code': current_asset_code,
@@ -1896,11 +1989,15 @@ def handover_asset(asset_id):
             'from_shared_branches': shared_branches_before,
             'remaining_shared_branches': remaining_shared_branches,
             'converted_last_sibling': converted_sibling_id is not None,
-        })
+        }, 200
+
+    try:
+        result, status = run_write(apply)
+    except WriteTimeout:
+        raise
     except Exception as e:
-        conn.rollback()
-        conn.close()
         return jsonify({'error': str(e)}), 500
+    return jsonify(result), status
 
 
 @assets_bp.route('/<int:asset_id>/group-info', methods=['GET'])
@@ -2129,32 +2226,8 @@ def delete_asset(asset_id):
         return jsonify({'error': 'Asset not found'}), 404
 
     asset_ids_to_archive = _expand_shared_group_asset_ids(cur, [asset_id])
-    
-    # Insert into archived_assets table
-    for aid in asset_ids_to_archive:
-        cur.execute('SELECT * FROM assets WHERE id=?', (aid,))
-        asset_row = cur.fetchone()
-        if not asset_row:
-            continue
-        cur.execute('''
-            INSERT INTO archived_assets 
-            (original_id, name, price, owner, branch, department, asset_code, qr_random_code, used_status, asset_type, asset_kind, shared_group_id, asset_date, archived_by, archive_reason)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            asset_row['id'], asset_row['name'], asset_row['price'] if asset_row['price'] is not None else 0.0, asset_row['owner'], 
-            asset_row['branch'], asset_row['department'], asset_row['asset_code'], 
-            asset_row['qr_random_code'], asset_row['used_status'], asset_row['asset_type'],
-            asset_row['asset_kind'] if asset_row['asset_kind'] else ASSET_KIND_BRANCH,
-            asset_row['shared_group_id'] if 'shared_group_id' in asset_row.keys() else None,
-            asset_row['asset_date'] if 'asset_date' in asset_row.keys() else None,
-            current_user.display_name, archive_reason
-        ))
-
-    delete_all_documents_for_assets(cur, asset_ids_to_archive)
-    
-    placeholders = ','.join(['?'] * len(asset_ids_to_archive))
-    cur.execute(f'DELETE FROM assets WHERE id IN ({placeholders})', asset_ids_to_archive)
-    
+    archive_assets(cur, asset_ids_to_archive, current_user.display_name, archive_reason)
+
     conn.commit()
     conn.close()
     return jsonify({'success': True})
@@ -2167,11 +2240,7 @@ def update_status(asset_id):
     if used_status not in valid_statuses:
         return jsonify({'error': 'Invalid status'}), 400
     
-    conn = get_db_connection()
-    cur = conn.cursor()
-    _sync_shared_group_status(cur, asset_id, used_status)
-    conn.commit()
-    conn.close()
+    run_write(lambda cur: _sync_shared_group_status(cur, asset_id, used_status))
     
     return jsonify({'success': True})
 
@@ -2184,16 +2253,13 @@ def bulk_update_status():
     
     if not asset_ids or used_status not in valid_statuses:
         return jsonify({'error': 'Invalid data'}), 400
-    
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    expanded_ids = _expand_shared_group_asset_ids(cur, asset_ids)
-    placeholders = ','.join(['?'] * len(expanded_ids))
-    cur.execute(f'UPDATE assets SET used_status=? WHERE id IN ({placeholders})', [used_status] + expanded_ids)
-    
-    conn.commit()
-    conn.close()
+
+    def apply(cur):
+        expanded_ids = _expand_shared_group_asset_ids(cur, asset_ids)
+        id_set, id_params = sql_id_set(cur, expanded_ids)
+        cur.execute(f'UPDATE assets SET used_status=? WHERE id IN {id_set}', [used_status] + id_params)
+
+    run_write(apply)
     
     return jsonify({'success': True, 'updated': len(asset_ids)})
 
@@ -2205,50 +2271,173 @@ def bulk_delete():
     
     if not asset_ids:
         return jsonify({'error': 'No assets selected'}), 400
+
+    if background_requested():
+        return enqueue_job_response('archive_assets', {
+            'asset_ids': asset_ids,
+            'archived_by': current_user.display_name,
+            'archive_reason': archive_reason,
+        })
     
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
         expanded_ids = _expand_shared_group_asset_ids(cur, asset_ids)
-        placeholders = ','.join(['?'] * len(expanded_ids))
-        cur.execute(f'SELECT * FROM assets WHERE id IN ({placeholders})', expanded_ids)
-        assets = cur.fetchall()
-        
-        if not assets:
+        archived = archive_assets(cur, expanded_ids, current_user.display_name, archive_reason)
+
+        if not archived:
+            conn.rollback()
             conn.close()
             return jsonify({'error': 'No valid assets found to archive'}), 404
-        
-        # Insert into archived_assets table
-        for asset in assets:
-            cur.execute('''
-                INSERT INTO archived_assets 
-                (original_id, name, price, owner, branch, department, asset_code, qr_random_code, used_status, asset_type, asset_kind, shared_group_id, asset_date, archived_by, archive_reason)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                asset['id'], asset['name'], asset['price'] if asset['price'] is not None else 0.0, asset['owner'], 
-                asset['branch'], asset['department'], asset['asset_code'], 
-                asset['qr_random_code'], asset['used_status'], asset['asset_type'],
-                asset['asset_kind'] if asset['asset_kind'] else ASSET_KIND_BRANCH,
-                asset['shared_group_id'] if 'shared_group_id' in asset.keys() else None,
-                asset['asset_date'] if 'asset_date' in asset.keys() else None,
-                current_user.display_name, archive_reason
-            ))
-
-        delete_all_documents_for_assets(cur, [a['id'] for a in assets])
-        
-        cur.execute(f'DELETE FROM assets WHERE id IN ({placeholders})', expanded_ids)
-        
+
         conn.commit()
         conn.close()
-        
-        return jsonify({'success': True, 'archived': len(assets), 'message': f'Successfully archived {len(assets)} assets'})
-        
+
+        return jsonify({'success': True, 'archived': archived, 'message': f'Successfully archived {archived} assets'})
+
     except Exception as e:
         conn.rollback()
         conn.close()
         return jsonify({'error': f'Failed to archive assets: {str(e)}'}), 500
 
+
+# Background jobs commit bulk archive / restore / delete in chunks of this many ids so
+# progress is visible and a cancel stops between chunks.
+JOB_CHUNK_SIZE = 500
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), JOB_CHUNK_SIZE):
+        yield ids[start:start + JOB_CHUNK_SIZE]
+
+
+def _shared_group_chunks(cur, asset_ids):
+    """Like ``_chunks``, but every shared group (by shared_group_id, or legacy name +
+    type + owner) stays whole in one chunk, so a cancel or failure between commits
+    never leaves a group partly archived. A group larger than a chunk is its own chunk.
+    """
+    id_set, params = sql_id_set(cur, asset_ids, temp_table='chunk_asset_ids')
+    cur.execute(
+        f'''
+        SELECT id,
+               CASE
+                   WHEN IFNULL(asset_kind, '') != ? THEN 'id:' || id
+                   WHEN TRIM(IFNULL(shared_group_id, '')) != '' THEN 'gid:' || TRIM(shared_group_id)
+                   ELSE 'legacy:' || json_array(name, IFNULL(asset_type, ''), IFNULL(owner, ''))
+               END
+        FROM assets
+        WHERE id IN {id_set}
+        ORDER BY id
+        ''',
+        [ASSET_KIND_SHARED] + params,
+    )
+    groups = {}
+    for asset_id, group_key in cur.fetchall():
+        groups.setdefault(group_key, []).append(asset_id)
+    chunk = []
+    for group_ids in groups.values():
+        if chunk and len(chunk) + len(group_ids) > JOB_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+        chunk.extend(group_ids)
+    if chunk:
+        yield chunk
+
+
+@job_handler('archive_assets')
+def _archive_assets_job(ctx, payload):
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        expanded_ids = _expand_shared_group_asset_ids(cur, payload['asset_ids'])
+        chunks = list(_shared_group_chunks(cur, expanded_ids))
+        conn.commit()
+        archived = done = 0
+        for chunk in chunks:
+            archived += archive_assets(cur, chunk, payload['archived_by'], payload['archive_reason'])
+            conn.commit()
+            done += len(chunk)
+            ctx.progress(done, len(expanded_ids))
+    finally:
+        conn.close()
+    if not archived:
+        raise ValueError('No valid assets found to archive')
+    return {'success': True, 'archived': archived, 'message': f'Successfully archived {archived} assets'}
+
+
+def _archived_ids_job(ctx, payload, apply_chunk):
+    """Shared body of the restore / permanent-delete jobs: ``(count, missing ids)``."""
+    archived_ids = list(payload['archived_ids'])
+    conn = get_db_connection()
+    count, missing_ids = 0, []
+    try:
+        cur = conn.cursor()
+        for done, chunk in enumerate(_chunks(archived_ids), start=1):
+            chunk_count, chunk_missing = apply_chunk(cur, chunk)
+            conn.commit()
+            count += chunk_count
+            missing_ids.extend(chunk_missing)
+            ctx.progress(min(done * JOB_CHUNK_SIZE, len(archived_ids)), len(archived_ids))
+    finally:
+        conn.close()
+    return count, [f'Archived asset ID {archived_id} not found' for archived_id in missing_ids]
+
+
+@job_handler('restore_assets')
+def _restore_assets_job(ctx, payload):
+    restored_count, errors = _archived_ids_job(ctx, payload, restore_archived_assets)
+    result = {'success': True, 'restored': restored_count}
+    if errors:
+        result['errors'] = errors
+        result['message'] = f'Restored {restored_count} assets with {len(errors)} errors'
+    else:
+        result['message'] = f'Successfully restored {restored_count} assets'
+    return result
+
+
+@job_handler('permanent_delete_archived_assets')
+def _permanent_delete_archived_assets_job(ctx, payload):
+    deleted_count, errors = _archived_ids_job(ctx, payload, permanent_delete_archived_assets)
+    result = {'success': True, 'deleted': deleted_count}
+    if errors:
+        result['errors'] = errors
+        result['message'] = f'Permanently deleted {deleted_count} assets with {len(errors)} errors'
+    else:
+        result['message'] = f'Successfully permanently deleted {deleted_count} assets'
+    return result
+
+
+@job_handler('register_export')
+def _register_export_job(ctx, payload):
+    """Build the cached XLSX workbook; the result links to the (now cached) download."""
+    where_sql, params = payload['where_sql'], payload['params']
+    per_branch, include_archive = payload['per_branch'], payload['include_archive']
+    analysis = payload.get('analysis', False)
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        cache_key = workbook_cache_key(cur, where_sql, params, per_branch, include_archive, analysis)
+        if cached_export_path(cache_key) is None:
+            chunks = tee_to_export_cache(
+                iter_register_xlsx_chunks(
+                    cur, where_sql, params, per_branch, include_archive, analysis,
+                ),
+                cache_key,
+            )
+            try:
+                written = 0
+                for chunk in chunks:
+                    written += len(chunk)
+                    ctx.progress(written)
+            finally:
+                chunks.close()
+    finally:
+        conn.close()
+    return {'success': True, 'download_url': payload['download_url'], 'cache_key': cache_key}
+
+
+@lru_cache(maxsize=QR_PNG_CACHE_SIZE)
 def _png_qr_for_string(link_url):
     """Render link_url as a compact black-on-white PNG (shared by image + print views)."""
     qr = qrcode.QRCode(
@@ -2265,6 +2454,10 @@ def _png_qr_for_string(link_url):
     return buf.getvalue()
 
 
+def qr_png_cache_info():
+    return _png_qr_for_string.cache_info()
+
+
 def _png_bytes_asset_qrcode(asset_id):
     conn = get_db_connection()
     cur = conn.cursor()
@@ -2600,42 +2793,8 @@ def restore_asset(archived_id):
         return jsonify({'error': 'Archived asset not found'}), 404
     
     try:
-        # Check if an asset with the same asset code already exists
-        cur.execute('SELECT id FROM assets WHERE asset_code=?', (archived_asset['asset_code'],))
-        existing_asset_by_code = cur.fetchone()
-        
-        if existing_asset_by_code:
-            # Asset code already exists, update the existing asset
-            cur.execute(
-                'UPDATE assets SET used_status=?, asset_type=?, asset_kind=?, shared_group_id=?, price=? WHERE id=?',
-                (
-                    archived_asset['used_status'],
-                    archived_asset['asset_type'],
-                    archived_asset['asset_kind'] if archived_asset['asset_kind'] else ASSET_KIND_BRANCH,
-                    archived_asset['shared_group_id'] if 'shared_group_id' in archived_asset.keys() else None,
-                    archived_asset['price'] if archived_asset['price'] is not None else 0.0,
-                    existing_asset_by_code[0],
-                ),
-            )
-        else:
-            # Create new asset with original asset code
-            asset_code = archived_asset['asset_code']  # Use the original asset code
-            qr_random_code = archived_asset['qr_random_code'] if archived_asset['qr_random_code'] else str(uuid.uuid4())
-            cur.execute('''
-                INSERT INTO assets (name, price, owner, branch, department, asset_code, qr_random_code, used_status, asset_type, asset_kind, shared_group_id, asset_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (
-                    archived_asset['name'], archived_asset['price'] if archived_asset['price'] is not None else 0.0, archived_asset['owner'],
-                    archived_asset['branch'], archived_asset['department'], asset_code, qr_random_code,
-                    archived_asset['used_status'], archived_asset['asset_type'],
-                    archived_asset['asset_kind'] if archived_asset['asset_kind'] else ASSET_KIND_BRANCH,
-                    archived_asset['shared_group_id'] if 'shared_group_id' in archived_asset.keys() else None,
-                    archived_asset['asset_date'] if 'asset_date' in archived_asset.keys() else None,
-                ))
-        
-        # Delete from archived_assets table
-        cur.execute('DELETE FROM archived_assets WHERE id=?', (archived_id,))
-        
+        restore_archived_assets(cur, [archived_id])
+
         conn.commit()
         conn.close()
         return jsonify({'success': True, 'message': 'Asset restored successfully'})
@@ -2655,60 +2814,17 @@ def bulk_restore_assets():
     
     if not archived_ids:
         return jsonify({'error': 'No assets selected for restoration'}), 400
+
+    if background_requested():
+        return enqueue_job_response('restore_assets', {'archived_ids': archived_ids})
     
     conn = get_db_connection()
     cur = conn.cursor()
     
-    restored_count = 0
-    errors = []
-    
     try:
-        for archived_id in archived_ids:
-            # Get the archived asset data
-            cur.execute('SELECT * FROM archived_assets WHERE id=?', (archived_id,))
-            archived_asset = cur.fetchone()
-            
-            if not archived_asset:
-                errors.append(f'Archived asset ID {archived_id} not found')
-                continue
-            
-            # Check if an asset with the same asset code already exists
-            cur.execute('SELECT id FROM assets WHERE asset_code=?', (archived_asset['asset_code'],))
-            existing_asset_by_code = cur.fetchone()
-            
-            if existing_asset_by_code:
-                # Asset code already exists, update the existing asset
-                cur.execute(
-                    'UPDATE assets SET used_status=?, asset_type=?, asset_kind=?, shared_group_id=?, price=? WHERE id=?',
-                    (
-                        archived_asset['used_status'],
-                        archived_asset['asset_type'],
-                        archived_asset['asset_kind'] if archived_asset['asset_kind'] else ASSET_KIND_BRANCH,
-                        archived_asset['shared_group_id'] if 'shared_group_id' in archived_asset.keys() else None,
-                        archived_asset['price'] if archived_asset['price'] is not None else 0.0,
-                        existing_asset_by_code[0],
-                    ),
-                )
-            else:
-                # Create new asset with original asset code
-                asset_code = archived_asset['asset_code']  # Use the original asset code
-                qr_random_code = archived_asset['qr_random_code'] if archived_asset['qr_random_code'] else str(uuid.uuid4())
-                cur.execute('''
-                    INSERT INTO assets (name, price, owner, branch, department, asset_code, qr_random_code, used_status, asset_type, asset_kind, shared_group_id, asset_date)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                                ''', (
-                        archived_asset['name'], archived_asset['price'] if archived_asset['price'] is not None else 0.0, archived_asset['owner'],
-                        archived_asset['branch'], archived_asset['department'], asset_code, qr_random_code,
-                        archived_asset['used_status'], archived_asset['asset_type'],
-                        archived_asset['asset_kind'] if archived_asset['asset_kind'] else ASSET_KIND_BRANCH,
-                        archived_asset['shared_group_id'] if 'shared_group_id' in archived_asset.keys() else None,
-                        archived_asset['asset_date'] if 'asset_date' in archived_asset.keys() else None,
-                    ))
-            
-            # Delete from archived_assets table
-            cur.execute('DELETE FROM archived_assets WHERE id=?', (archived_id,))
-            restored_count += 1
-        
+        restored_count, missing_ids = restore_archived_assets(cur, archived_ids)
+        errors = [f'Archived asset ID {archived_id} not found' for archived_id in missing_ids]
+
         conn.commit()
         conn.close()
         
@@ -2770,27 +2886,17 @@ def bulk_permanent_delete_archived_assets():
     
     if not archived_ids:
         return jsonify({'error': 'No assets selected for permanent deletion'}), 400
+
+    if background_requested():
+        return enqueue_job_response('permanent_delete_archived_assets', {'archived_ids': archived_ids})
     
     conn = get_db_connection()
     cur = conn.cursor()
     
-    deleted_count = 0
-    errors = []
-    
     try:
-        for archived_id in archived_ids:
-            # Get the archived asset data for confirmation
-            cur.execute('SELECT name FROM archived_assets WHERE id=?', (archived_id,))
-            archived_asset = cur.fetchone()
-            
-            if not archived_asset:
-                errors.append(f'Archived asset ID {archived_id} not found')
-                continue
-            
-            # Permanently delete from archived_assets table
-            cur.execute('DELETE FROM archived_assets WHERE id=?', (archived_id,))
-            deleted_count += 1
-        
+        deleted_count, missing_ids = permanent_delete_archived_assets(cur, archived_ids)
+        errors = [f'Archived asset ID {archived_id} not found' for archived_id in missing_ids]
+
         conn.commit()
         conn.close()
         
@@ -2813,50 +2919,94 @@ def bulk_permanent_delete_archived_assets():
         conn.close()
         return jsonify({'error': f'Failed to permanently delete assets: {str(e)}'}), 500 
 
-@assets_bp.route('/get-all-assets-for-export')
+@assets_bp.route('/export')
 @login_required
-def get_all_assets_for_export():
-    """Get all assets for export functionality"""
-    try:
+def export_register():
+    """Stream active assets matching the dashboard filters as CSV (default), NDJSON or XLSX.
+
+    XLSX adds spec values (plus archive and ownership history for IT users), takes
+    ``per_branch=1`` for one asset sheet per branch and ``analysis=1`` (IT only) for the
+    price analysis summary sheets, and is cached by data version.
+    With ``background=1`` an uncached workbook is built by a job whose result links
+    back to this URL.
+    """
+    export_format = (request.args.get('format') or 'csv').strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported export format: {export_format}'}), 400
+    where_sql, params = _register_filter_where_from_request()
+    filename = f'assets_export_{datetime.date.today():%Y%m%d}.{export_format}'
+
+    if export_format == 'xlsx':
+        per_branch = request.args.get('per_branch') == '1'
+        include_archive = current_user.has_it_access()
+        analysis = include_archive and request.args.get('analysis') == '1'
+        if analysis:
+            filename = f'asset_price_analysis_{datetime.date.today():%Y%m%d}.xlsx'
         conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Get all assets with their details
-        cur.execute('''
-            SELECT name, asset_code, branch, department, price, used_status, asset_type, asset_kind, owner
-            FROM assets 
-            ORDER BY branch, department, name
-        ''')
-        all_assets = cur.fetchall()
-        
-        # Convert to list of dictionaries
-        assets_list = []
-        for asset in all_assets:
-            name, asset_code, branch, department, price, status, asset_type, asset_kind, owner = asset
-            assets_list.append({
-                'name': name,
-                'asset_code': asset_code,
-                'branch': branch,
-                'department': department,
-                'price': price or 0.0,
-                'used_status': status or 'Not Specified',
-                'asset_type': asset_type or 'Not Specified',
-                'asset_kind': asset_kind or ASSET_KIND_BRANCH,
-                'owner': owner or 'Not Specified'
+        try:
+            cache_key = workbook_cache_key(
+                conn.cursor(), where_sql, params, per_branch, include_archive, analysis,
+            )
+        finally:
+            conn.close()
+        cached = cached_export_path(cache_key)
+        if cached is not None:
+            response = send_file(
+                cached,
+                mimetype=EXPORT_FORMATS['xlsx'],
+                as_attachment=True,
+                download_name=filename,
+                etag=cache_key,
+                conditional=True,
+                max_age=0,
+            )
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        if request.if_none_match.contains(cache_key):
+            return Response(status=304)
+        if background_requested():
+            args = request.args.to_dict(flat=False)
+            args.pop('background', None)
+            return enqueue_job_response('register_export', {
+                'where_sql': where_sql,
+                'params': list(params),
+                'per_branch': per_branch,
+                'include_archive': include_archive,
+                'analysis': analysis,
+                'download_url': url_for('assets.export_register', **args),
             })
-        
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'assets': assets_list
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+
+    def generate():
+        # Opened here, not in the view: a response that is never iterated (HEAD, early
+        # disconnect) then holds no connection, and close() on the iterable releases it.
+        # stream_with_context keeps the app context get_db_connection needs.
+        conn = get_db_connection()
+        try:
+            cur = conn.cursor()
+            if export_format == 'xlsx':
+                yield from tee_to_export_cache(
+                    iter_register_xlsx_chunks(
+                        cur, where_sql, params, per_branch, include_archive, analysis,
+                    ),
+                    cache_key,
+                )
+                return
+            pages = iter_register_pages(cur, where_sql, params)
+            if export_format == 'csv':
+                yield from iter_csv_chunks(pages)
+            else:
+                yield from iter_ndjson_chunks(pages)
+        finally:
+            conn.close()
+
+    response = Response(stream_with_context(generate()), content_type=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if export_format == 'xlsx':
+        response.set_etag(cache_key)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    else:
+        response.headers['Cache-Control'] = 'no-store'
+    return response
 
 
 # --- QR label print (software-defined layout; printer does not choose positions) ---
@@ -0,0 +1,93 @@
+from flask import Blueprint, jsonify, request, url_for
+from flask_login import login_required, current_user
+from models.database import get_db_connection
+from utils.jobs import (
+    JOB_CANCELLED,
+    enqueue_job,
+    get_job,
+    list_jobs,
+    request_job_cancel,
+)
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+def background_requested():
+    """True when the client asked for a job instead of an inline result (``background=1``)."""
+    value = request.values.get('background')
+    if value is None and request.is_json:
+        value = (request.get_json(silent=True) or {}).get('background')
+    return str(value).strip().lower() in ('1', 'true', 'yes')
+
+
+def enqueue_job_response(kind, payload):
+    """Queue a job for the current user and answer 202 with where to poll it."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    job_id = enqueue_job(cur, kind, payload, current_user.id, current_user.display_name)
+    conn.commit()
+    conn.close()
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('jobs.get_job_status', job_id=job_id),
+        'cancel_url': url_for('jobs.cancel_job', job_id=job_id),
+    }), 202
+
+
+def _can_see(job):
+    return current_user.has_it_access() or str(job['created_by_id']) == str(current_user.id)
+
+
+def _public(job):
+    job = dict(job)
+    job.pop('payload', None)
+    return job
+
+
+@jobs_bp.route('/', methods=['GET'])
+@login_required
+def get_jobs():
+    """Recent jobs: all of them for IT users, otherwise the caller's own."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    created_by_id = None if current_user.has_it_access() else current_user.id
+    jobs = list_jobs(cur, created_by_id=created_by_id)
+    conn.close()
+    return jsonify([_public(job) for job in jobs])
+
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+@login_required
+def get_job_status(job_id):
+    """Status, progress ({done, total}) and, once finished, the result or error of a job."""
+    conn = get_db_connection()
+    job = get_job(conn.cursor(), job_id)
+    conn.close()
+    if not job or not _can_see(job):
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(_public(job))
+
+
+@jobs_bp.route('/<int:job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_job(job_id):
+    """Cancel a queued job, or ask a running one to stop at its next progress report."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    job = get_job(cur, job_id)
+    if not job or not _can_see(job):
+        conn.close()
+        return jsonify({'error': 'Job not found'}), 404
+    status = request_job_cancel(cur, job_id)
+    conn.commit()
+    conn.close()
+    if status is None:
+        return jsonify({'error': f'Job already {job["status"]}'}), 409
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': status,
+        'message': 'Job cancelled' if status == JOB_CANCELLED else 'Cancel requested; the job stops at its next checkpoint',
+    })
@@ -0,0 +1,100 @@
+import hmac
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_login import current_user
+from models.database import get_db_connection
+from routes.assets import qr_png_cache_info
+from utils.jobs import JOB_QUEUED, JOB_RUNNING
+from utils.metrics import REGISTRY
+from utils.write_queue import get_write_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+_WRITE_QUEUE_SAMPLES = (
+    ('queue_depth', 'gauge', 'Write units waiting for the writer thread.'),
+    ('units_committed', 'counter', 'Write units committed.'),
+    ('units_failed', 'counter', 'Write units rolled back.'),
+    ('units_timed_out', 'counter', 'Write units whose caller gave up waiting (503).'),
+    ('groups_committed', 'counter', 'Group commits.'),
+    ('queue_wait_seconds_total', 'counter', 'Time write units spent queued.'),
+    ('lock_wait_seconds_total', 'counter', 'Time spent waiting for the SQLite write lock.'),
+    ('lock_wait_seconds_max', 'gauge', 'Longest wait for the SQLite write lock.'),
+    ('execute_seconds_total', 'counter', 'Time spent running write units.'),
+    ('commit_seconds_total', 'counter', 'Time spent committing.'),
+)
+
+
+@REGISTRY.collector
+def _database_samples():
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute('SELECT COUNT(*) FROM assets')
+    assets = cur.fetchone()[0]
+    cur.execute('SELECT COUNT(*) FROM archived_assets')
+    archived = cur.fetchone()[0]
+    cur.execute('SELECT COUNT(*), COALESCE(SUM(file_size), 0) FROM asset_documents')
+    documents, document_bytes = cur.fetchone()
+    cur.execute('SELECT status, COUNT(*) FROM jobs WHERE status IN (?, ?) GROUP BY status', (JOB_QUEUED, JOB_RUNNING))
+    jobs = dict(cur.fetchall())
+    conn.close()
+    return [
+        ('asset_tracker_assets', 'gauge', 'Assets in the register.', [({}, assets)]),
+        ('asset_tracker_archived_assets', 'gauge', 'Archived assets.', [({}, archived)]),
+        ('asset_tracker_documents', 'gauge', 'Supporting documents stored.', [({}, documents)]),
+        ('asset_tracker_document_storage_bytes', 'gauge', 'Bytes of supporting documents stored.',
+         [({}, document_bytes)]),
+        ('asset_tracker_jobs', 'gauge', 'Background jobs waiting or running.',
+         [({'status': status}, jobs.get(status, 0)) for status in (JOB_QUEUED, JOB_RUNNING)]),
+    ]
+
+
+@REGISTRY.collector
+def _process_samples():
+    qr = qr_png_cache_info()
+    write = get_write_metrics()
+    slow_log = current_app.extensions.get('slow_query_log')
+    samples = [
+        ('asset_tracker_qr_cache_hits_total', 'counter', 'QR PNGs served from the in-process cache.',
+         [({}, qr.hits)]),
+        ('asset_tracker_qr_cache_misses_total', 'counter', 'QR PNGs rendered.', [({}, qr.misses)]),
+        ('asset_tracker_qr_cache_entries', 'gauge', 'QR PNGs currently cached.', [({}, qr.currsize)]),
+    ]
+    for key, kind, documentation in _WRITE_QUEUE_SAMPLES:
+        name = f'asset_tracker_write_queue_{key}'
+        if kind == 'counter' and not name.endswith('_total'):
+            name += '_total'
+        samples.append((name, kind, documentation, [({}, write[key])]))
+    if slow_log is not None:
+        samples.append((
+            'asset_tracker_slow_queries_total', 'counter', 'Statements slower than SLOW_QUERY_MS.',
+            [({}, slow_log.recorded_count)],
+        ))
+    return samples
+
+
+def _has_scrape_token():
+    token = current_app.config.get('METRICS_SCRAPE_TOKEN')
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    if not token or scheme.lower() != 'bearer' or not supplied:
+        return False
+    return hmac.compare_digest(supplied.strip().encode('utf-8'), token.encode('utf-8'))
+
+
+def _may_scrape():
+    if _has_scrape_token():
+        return True
+    # Behind a reverse proxy on the same host every request comes from loopback, so
+    # trusting it is opt-in for deployments where clients reach the app directly.
+    if current_app.config.get('METRICS_ALLOW_LOCALHOST') and request.remote_addr in LOCAL_ADDRESSES:
+        return True
+    return current_user.is_authenticated and current_user.has_it_access()
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition; IT users, or scrapers with the token (or on loopback, if allowed)."""
+    if not _may_scrape():
+        return jsonify({'error': 'Access denied.'}), 403
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
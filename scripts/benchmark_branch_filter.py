@@ -0,0 +1,158 @@
+"""Benchmark the dashboard branch filter as the register grows.
+
+Builds throwaway databases where the filtered branch always holds the same number of
+rows while the rest of the register grows, then times the dashboard count + page
+queries with the current filter and with the previous correlated-subquery filter.
+
+    python scripts/benchmark_branch_filter.py
+    python scripts/benchmark_branch_filter.py --sizes 1000 10000 100000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from models.database import ASSET_KIND_BRANCH, ASSET_KIND_SHARED, get_db_connection, init_db  # noqa: E402
+from routes.assets import (  # noqa: E402
+    _append_dashboard_branch_filter,
+    _count_dashboard_assets,
+    _fetch_dashboard_assets,
+)
+
+TARGET_BRANCH = 'Benchmark Branch'
+TARGET_ROWS = 200
+PER_PAGE = 50
+
+
+def _previous_branch_filter(where_clauses, params, branch_filter):
+    """The filter before the UNION rewrite, kept here for comparison."""
+    where_clauses.append(
+        '''(
+            branch = ?
+            OR (
+                COALESCE(asset_kind, 'branch') = ?
+                AND COALESCE(TRIM(shared_group_id), '') != ''
+                AND shared_group_id IN (
+                    SELECT shared_group_id FROM assets
+                    WHERE branch = ?
+                      AND COALESCE(asset_kind, 'branch') = ?
+                      AND COALESCE(TRIM(shared_group_id), '') != ''
+                )
+            )
+            OR (
+                COALESCE(asset_kind, 'branch') = ?
+                AND (shared_group_id IS NULL OR TRIM(shared_group_id) = '')
+                AND EXISTS (
+                    SELECT 1 FROM assets s
+                    WHERE COALESCE(s.asset_kind, 'branch') = ?
+                      AND (s.shared_group_id IS NULL OR TRIM(s.shared_group_id) = '')
+                      AND s.name = assets.name
+                      AND IFNULL(s.asset_type, '') = IFNULL(assets.asset_type, '')
+                      AND IFNULL(s.owner, '') = IFNULL(assets.owner, '')
+                      AND s.branch = ?
+                )
+            )
+        )'''
+    )
+    params.extend([
+        branch_filter,
+        ASSET_KIND_SHARED, branch_filter, ASSET_KIND_SHARED,
+        ASSET_KIND_SHARED, ASSET_KIND_SHARED, branch_filter,
+    ])
+
+
+def _populate(cur, total_rows, rng):
+    branches = [f'Branch {i:03d}' for i in range(50)]
+    rows = []
+
+    def add(name, branch, kind, group_id, code):
+        rows.append((
+            name, 10.0, f'Owner {rng.randint(1, 500)}', branch, 'Restaurant', code,
+            uuid.uuid4().hex, 'Used', 'Equipment', kind, group_id,
+        ))
+
+    shared_seq = 0
+    while len(rows) < TARGET_ROWS:
+        if rng.random() < 0.2:
+            shared_seq += 1
+            gid = str(uuid.uuid4())
+            for branch in [TARGET_BRANCH] + rng.sample(branches, 2):
+                add(f'Shared {shared_seq}', branch, ASSET_KIND_SHARED, gid, f'SHR-{shared_seq:06d}')
+        else:
+            add(f'Item {len(rows)}', TARGET_BRANCH, ASSET_KIND_BRANCH, None, f'T-{len(rows):07d}')
+    while len(rows) < total_rows:
+        if rng.random() < 0.1:
+            shared_seq += 1
+            gid = str(uuid.uuid4())
+            for branch in rng.sample(branches, 3):
+                add(f'Shared {shared_seq}', branch, ASSET_KIND_SHARED, gid, f'SHR-{shared_seq:06d}')
+        else:
+            add(f'Item {len(rows)}', rng.choice(branches), ASSET_KIND_BRANCH, None, f'B-{len(rows):07d}')
+
+    cur.executemany(
+        '''
+        INSERT INTO assets (
+            name, price, owner, branch, department, asset_code, qr_random_code,
+            used_status, asset_type, asset_kind, shared_group_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+        rows,
+    )
+    return len(rows)
+
+
+def _time_filter(cur, append_filter, repeat):
+    where_clauses, params = [], []
+    append_filter(where_clauses, params, TARGET_BRANCH)
+    where_sql = 'WHERE ' + ' AND '.join(where_clauses)
+    timings = []
+    total = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        total = _count_dashboard_assets(cur, where_sql, params)
+        _fetch_dashboard_assets(cur, where_sql, params, 'id', 'asc', PER_PAGE, 0)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--skip-previous', action='store_true', help='only time the current filter')
+    args = parser.parse_args()
+
+    print(f'{"assets":>10} {"current ms":>12} {"previous ms":>12} {"rows":>6}')
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = Flask(__name__)
+            app.config['DATABASE'] = os.path.join(tmp, 'bench.db')
+            with app.app_context():
+                init_db()
+                conn = get_db_connection()
+                cur = conn.cursor()
+                inserted = _populate(cur, size, random.Random(size))
+                conn.commit()
+                cur.execute('ANALYZE')
+
+                current_ms, current_rows = _time_filter(cur, _append_dashboard_branch_filter, args.repeat)
+                previous = '-'
+                if not args.skip_previous:
+                    previous_ms, previous_rows = _time_filter(cur, _previous_branch_filter, args.repeat)
+                    if previous_rows != current_rows:
+                        print(f'row count mismatch: current={current_rows} previous={previous_rows}')
+                    previous = f'{previous_ms:.2f}'
+                conn.close()
+        print(f'{inserted:>10} {current_ms:>12.2f} {previous:>12} {current_rows:>6}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,372 @@
+"""Benchmark the hot dashboard routes and helpers against generated datasets.
+
+Each benchmark runs a few warm-up calls and then ``--rounds`` timed calls on a
+database built by ``generate_dataset.py`` (cached in ``--data-dir`` per scale and
+seed). Results can be saved as a named baseline and later runs compared against it;
+anything whose median got slower than ``--threshold`` is reported as a regression.
+
+    python scripts/benchmark_suite.py --scale 100k --save main
+    python scripts/benchmark_suite.py --scale 100k --compare main --fail-on-regression
+    python scripts/benchmark_suite.py --scale 1k -k dashboard
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from __init__ import create_app  # noqa: E402
+from generate_dataset import SCALES, build_dataset  # noqa: E402
+from models.database import allocate_asset_codes, get_db_connection  # noqa: E402
+from routes.admin import fetch_grouped_employees  # noqa: E402
+from routes.assets import (  # noqa: E402
+    _attach_asset_location_displays,
+    _attach_owner_contacts,
+    _count_dashboard_assets,
+    _fetch_dashboard_assets,
+    _png_qr_for_string,
+)
+from utils.directory_import import BranchImporter, EmployeeImporter  # noqa: E402
+
+DEFAULT_BASELINE_DIR = os.path.join(REPO_ROOT, '.benchmarks')
+DEFAULT_THRESHOLD = 0.15
+PAGE_SIZE = 50
+
+
+class Bench:
+    """One benchmark: ``run(ctx)`` is timed; ``setup(ctx)`` runs untimed before each round."""
+
+    def __init__(self, name, run, setup=None, mutates=False, rounds=None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.mutates = mutates
+        self.rounds = rounds
+
+
+class BenchContext:
+    """The app, a logged-in IT client and sample values picked from the dataset."""
+
+    def __init__(self, app, database):
+        self.app = app
+        self.database = database
+        self.client = app.test_client()
+        conn = sqlite3.connect(database)
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM users_auth WHERE role = 'IT' ORDER BY id LIMIT 1")
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(cur.fetchone()[0])
+            session['_fresh'] = True
+        cur.execute(
+            '''
+            SELECT branch, COUNT(*) FROM assets WHERE branch != 'Office'
+            GROUP BY branch ORDER BY COUNT(*) DESC LIMIT 1
+            '''
+        )
+        self.busiest_branch = cur.fetchone()[0]
+        cur.execute("SELECT asset_code FROM assets WHERE asset_kind = 'shared' AND shared_group_id IS NOT NULL LIMIT 1")
+        row = cur.fetchone()
+        cur.execute('SELECT asset_code FROM assets ORDER BY id LIMIT 1')
+        self.asset_code = (row or cur.fetchone())[0]
+        cur.execute('SELECT id FROM assets ORDER BY id LIMIT ?', (PAGE_SIZE,))
+        self.label_ids = [r[0] for r in cur.fetchall()]
+        cur.execute('SELECT id FROM assets ORDER BY id DESC LIMIT 200')
+        self.delete_ids = [str(r[0]) for r in cur.fetchall()]
+        cur.execute(
+            '''
+            SELECT b.name, b.branch_code, br.name FROM branches b JOIN brands br ON br.id = b.brand_id
+            ORDER BY b.id LIMIT 200
+            '''
+        )
+        existing = cur.fetchall()
+        self.branch_rows = [
+            {'code': code, 'name': name, 'brand': brand, 'manager': f'Manager {i}', 'email': ''}
+            for i, (name, code, brand) in enumerate(existing)
+        ] + [
+            {'code': f'BX-MU{i:03d}', 'name': f'Benchmark Branch {i}', 'brand': 'Benchmark Brand',
+             'manager': f'Benchmark Manager {i}', 'email': f'bx-mu{i:03d}@example.com'}
+            for i in range(200)
+        ]
+        cur.execute(
+            '''
+            SELECT u.employee_id, u.name, d.name, u.mobile, u.email FROM users u
+            JOIN departments d ON d.id = u.department_id WHERE d.branch_id IS NULL LIMIT 500
+            '''
+        )
+        self.employee_rows = [
+            {'employee_id': emp_id, 'name': name, 'department': dept, 'mobile': mobile,
+             'email': email, 'venue': 'office', 'branch_code': ''}
+            for emp_id, name, dept, mobile, email in cur.fetchall()
+        ] + [
+            {'employee_id': f'BX{i:05d}', 'name': f'Benchmark Employee {i}', 'department': 'Finance',
+             'mobile': f'9{i:07d}', 'email': f'bx{i}@example.com', 'venue': 'office', 'branch_code': ''}
+            for i in range(500)
+        ]
+        conn.close()
+        self.page = []
+
+    def get(self, url):
+        response = self.client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'GET {url} -> {response.status_code}')
+        return response
+
+    def post(self, url, **kwargs):
+        response = self.client.post(url, **kwargs)
+        if response.status_code != 200:
+            raise RuntimeError(f'POST {url} -> {response.status_code}')
+        return response
+
+
+def _with_cursor(fn):
+    """Run ``fn(ctx, cur)`` on a fresh connection, rolling back anything it wrote."""
+    def run(ctx):
+        with ctx.app.app_context():
+            conn = get_db_connection()
+            try:
+                return fn(ctx, conn.cursor())
+            finally:
+                conn.rollback()
+                conn.close()
+    return run
+
+
+def _load_page(ctx, cur):
+    ctx.page = _fetch_dashboard_assets(cur, '', [], 'id', 'asc', PAGE_SIZE, 0)
+
+
+def _dashboard_partial(query):
+    return lambda ctx: ctx.get(f'/assets/dashboard?partial=1&per_page={PAGE_SIZE}&{query}')
+
+
+def _import_branches(ctx, cur):
+    importer = BranchImporter(cur)
+    importer.import_rows(ctx.branch_rows)
+    return importer.summary
+
+
+def _import_employees(ctx, cur):
+    importer = EmployeeImporter(cur)
+    importer.import_rows(ctx.employee_rows)
+    return importer.summary
+
+
+BENCHMARKS = [
+    Bench('dashboard.full', lambda ctx: ctx.get('/assets/dashboard')),
+    Bench('dashboard.partial', _dashboard_partial('')),
+    Bench('dashboard.partial.branch', lambda ctx: ctx.get(
+        f'/assets/dashboard?partial=1&per_page={PAGE_SIZE}&branch={ctx.busiest_branch}'
+    )),
+    Bench('dashboard.partial.department.office', _dashboard_partial('department=Finance')),
+    Bench('dashboard.partial.department.restaurant', _dashboard_partial('department=Restaurant')),
+    Bench('dashboard.partial.status', _dashboard_partial('status=Used')),
+    Bench('dashboard.partial.asset_type', _dashboard_partial('asset_type=Electronics')),
+    Bench('dashboard.partial.search', _dashboard_partial('search=Laptop')),
+    Bench('dashboard.partial.sorted_last_page', _dashboard_partial('sort_by=owner&sort_dir=desc&page=50')),
+    Bench('dashboard.partial.combined', lambda ctx: ctx.get(
+        f'/assets/dashboard?partial=1&per_page={PAGE_SIZE}&branch={ctx.busiest_branch}&status=Used&search=a'
+    )),
+    Bench('helpers.count_dashboard_assets', _with_cursor(lambda ctx, cur: _count_dashboard_assets(cur, '', []))),
+    Bench('helpers.fetch_dashboard_assets', _with_cursor(
+        lambda ctx, cur: _fetch_dashboard_assets(cur, '', [], 'id', 'asc', PAGE_SIZE, 0)
+    )),
+    Bench(
+        'helpers.attach_asset_location_displays',
+        _with_cursor(lambda ctx, cur: _attach_asset_location_displays(cur, ctx.page)),
+        setup=_with_cursor(_load_page),
+    ),
+    Bench(
+        'helpers.attach_owner_contacts',
+        _with_cursor(lambda ctx, cur: _attach_owner_contacts(cur, ctx.page)),
+        setup=_with_cursor(_load_page),
+    ),
+    Bench('helpers.allocate_asset_codes', _with_cursor(
+        lambda ctx, cur: allocate_asset_codes(cur, ctx.busiest_branch, 'Restaurant', 10)
+    )),
+    Bench('helpers.fetch_grouped_employees', _with_cursor(lambda ctx, cur: fetch_grouped_employees(cur))),
+    Bench('routes.asset_info', lambda ctx: ctx.get(f'/assets/asset/{ctx.asset_code}')),
+    Bench(
+        'routes.qr_label_print_batch',
+        lambda ctx: ctx.post('/assets/qr-label-print/batch', json={
+            'items': [{'kind': 'asset', 'id': asset_id} for asset_id in ctx.label_ids],
+            'autoprint': False,
+        }),
+        setup=lambda ctx: _png_qr_for_string.cache_clear(),
+    ),
+    Bench('imports.branches', _with_cursor(_import_branches), rounds=5),
+    Bench('imports.employees', _with_cursor(_import_employees), rounds=5),
+    Bench(
+        'routes.bulk_delete',
+        lambda ctx: ctx.post('/assets/bulk_delete', data={'asset_ids[]': ctx.delete_ids}),
+        mutates=True, rounds=3,
+    ),
+]
+
+
+def _dataset_path(data_dir, scale_name, seed):
+    path = os.path.join(data_dir, f'bench_{scale_name}_seed{seed}.db')
+    if not os.path.exists(path):
+        print(f'generating {scale_name} dataset -> {path}')
+        partial = path + '.part'
+        if os.path.exists(partial):
+            os.remove(partial)
+        build_dataset(partial, SCALES[scale_name], seed=seed)
+        os.replace(partial, path)
+    return path
+
+
+def _summarize(timings):
+    timings = sorted(timings)
+    return {
+        'rounds': len(timings),
+        'min_ms': round(timings[0] * 1000, 3),
+        'max_ms': round(timings[-1] * 1000, 3),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+        'median_ms': round(statistics.median(timings) * 1000, 3),
+        'stddev_ms': round(statistics.pstdev(timings) * 1000, 3),
+    }
+
+
+def run_bench(ctx, bench, rounds, warmup, work_dir):
+    rounds = min(rounds, bench.rounds) if bench.rounds else rounds
+    if bench.mutates:
+        # Every round gets a fresh copy of the dataset, so there is nothing to warm.
+        warmup = 0
+    timings = []
+    for index in range(warmup + rounds):
+        if bench.mutates:
+            work_db = os.path.join(work_dir, 'work.db')
+            shutil.copyfile(ctx.database, work_db)
+            ctx.app.config['DATABASE'] = work_db
+        try:
+            if bench.setup:
+                bench.setup(ctx)
+            started = time.perf_counter()
+            bench.run(ctx)
+            elapsed = time.perf_counter() - started
+        finally:
+            ctx.app.config['DATABASE'] = ctx.database
+        if index >= warmup:
+            timings.append(elapsed)
+    return _summarize(timings)
+
+
+def _machine_info():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'commit': commit,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Rows of (name, baseline ms, current ms, change, verdict), slowest change first."""
+    rows = []
+    for name, stats in results.items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            rows.append((name, None, stats['median_ms'], None, 'new'))
+            continue
+        change = stats['median_ms'] / before['median_ms'] - 1 if before['median_ms'] else 0.0
+        if change > threshold:
+            verdict = 'REGRESSION'
+        elif change < -threshold:
+            verdict = 'faster'
+        else:
+            verdict = 'ok'
+        rows.append((name, before['median_ms'], stats['median_ms'], change, verdict))
+    rows.sort(key=lambda row: row[3] if row[3] is not None else float('-inf'), reverse=True)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='1k')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'asset_tracker_bench'))
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('-k', dest='match', help='only run benchmarks whose name contains this')
+    parser.add_argument('--baseline-dir', default=DEFAULT_BASELINE_DIR)
+    parser.add_argument('--save', metavar='NAME', help='store the results as baseline NAME')
+    parser.add_argument('--compare', metavar='NAME', help='compare against baseline NAME')
+    parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD,
+        help='relative median slowdown reported as a regression (default 0.15 = 15%%)',
+    )
+    parser.add_argument('--fail-on-regression', action='store_true', help='exit 1 if anything regressed')
+    args = parser.parse_args()
+
+    logging.getLogger('asset_tracker.requests').setLevel(logging.WARNING)
+    os.makedirs(args.data_dir, exist_ok=True)
+    database = _dataset_path(args.data_dir, args.scale, args.seed)
+    app = create_app({'DATABASE': database, 'SLOW_QUERY_MS': 10_000})
+    ctx = BenchContext(app, database)
+
+    benches = [b for b in BENCHMARKS if not args.match or args.match in b.name]
+    results = {}
+    print(f'{"benchmark":<44} {"median ms":>10} {"min ms":>10} {"max ms":>10} {"rounds":>6}')
+    with tempfile.TemporaryDirectory() as work_dir:
+        for bench in benches:
+            stats = run_bench(ctx, bench, args.rounds, args.warmup, work_dir)
+            results[bench.name] = stats
+            print(
+                f'{bench.name:<44} {stats["median_ms"]:>10.2f} {stats["min_ms"]:>10.2f} '
+                f'{stats["max_ms"]:>10.2f} {stats["rounds"]:>6}'
+            )
+
+    report = {
+        'scale': args.scale,
+        'seed': args.seed,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'machine': _machine_info(),
+        'results': results,
+    }
+    exit_code = 0
+    if args.compare:
+        path = os.path.join(args.baseline_dir, f'{args.compare}.json')
+        with open(path, encoding='utf-8') as fh:
+            baseline = json.load(fh)
+        if baseline.get('scale') != args.scale:
+            print(f'warning: baseline {args.compare} was recorded at scale {baseline.get("scale")}')
+        print(f'\ncompared with {args.compare} ({baseline.get("created_at")}, '
+              f'commit {baseline.get("machine", {}).get("commit")}), threshold {args.threshold:.0%}')
+        print(f'{"benchmark":<44} {"before":>10} {"after":>10} {"change":>8}  verdict')
+        regressions = 0
+        for name, before, after, change, verdict in compare(results, baseline, args.threshold):
+            before_text = f'{before:.2f}' if before is not None else '-'
+            change_text = f'{change:+.0%}' if change is not None else '-'
+            print(f'{name:<44} {before_text:>10} {after:>10.2f} {change_text:>8}  {verdict}')
+            regressions += verdict == 'REGRESSION'
+        print(f'{regressions} regression(s)')
+        if regressions and args.fail_on_regression:
+            exit_code = 1
+    if args.save:
+        os.makedirs(args.baseline_dir, exist_ok=True)
+        path = os.path.join(args.baseline_dir, f'{args.save}.json')
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+        print(f'saved baseline {path}')
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
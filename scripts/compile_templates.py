@@ -0,0 +1,42 @@
+"""Compile every template into the Jinja bytecode cache before workers start.
+
+Run it as a deploy step (after the code is in place, before restarting the app) so
+no worker pays for parsing the template tree on its first request. It also fails
+when a template does not compile and reports whether templates would auto-reload.
+
+    python scripts/compile_templates.py
+    python scripts/compile_templates.py --clear   # drop stale entries first
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from __init__ import create_app  # noqa: E402
+from utils.template_cache import get_template_cache_root, precompile_templates  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clear', action='store_true', help='empty the bytecode cache before compiling')
+    args = parser.parse_args()
+
+    app = create_app()
+    cache = app.jinja_env.bytecode_cache
+    if cache is None:
+        print('TEMPLATE_BYTECODE_CACHE is off; nothing to fill.')
+        return 1
+    if args.clear:
+        cache.clear()
+
+    compiled, seconds, errors = precompile_templates(app)
+    print(f'compiled {compiled} templates into {get_template_cache_root(app)} in {seconds:.2f}s')
+    print(f'DEBUG={app.debug} auto_reload={app.jinja_env.auto_reload}')
+    for name, message in sorted(errors.items()):
+        print(f'  {name}: {message}', file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Write precompressed .gz (and .br, if brotli is installed) copies of static files.
+
+The app serves these instead of compressing CSS / JS / SVG on every request (see
+``utils/compression.py``). A copy older than its source is ignored, so rerun this
+after changing static files, e.g. as a deploy step next to ``compile_templates.py``.
+
+    python scripts/compress_static.py
+    python scripts/compress_static.py --clean   # remove the copies
+"""
+import argparse
+import gzip
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.compression import (  # noqa: E402
+    BROTLI_AVAILABLE,
+    DEFAULT_COMPRESS_MIN_SIZE,
+    PRECOMPRESSED_SUFFIXES,
+)
+
+STATIC_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+COMPRESSIBLE_SUFFIXES = ('.js', '.css', '.svg', '.json', '.txt', '.html', '.csv')
+
+
+def _write_if_smaller(path, data, source_size):
+    if len(data) >= source_size:
+        return False
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clean', action='store_true', help='delete precompressed copies and exit')
+    parser.add_argument('--min-size', type=int, default=DEFAULT_COMPRESS_MIN_SIZE)
+    args = parser.parse_args()
+
+    suffixes = tuple(PRECOMPRESSED_SUFFIXES.values())
+    written = removed = 0
+    saved = 0
+    for root, _dirs, files in os.walk(STATIC_ROOT):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(suffixes):
+                if args.clean:
+                    os.remove(path)
+                    removed += 1
+                continue
+            if args.clean or not name.endswith(COMPRESSIBLE_SUFFIXES):
+                continue
+            size = os.path.getsize(path)
+            if size < args.min_size:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            outputs = {'.gz': lambda: gzip.compress(data, compresslevel=9, mtime=0)}
+            if BROTLI_AVAILABLE:
+                import brotli
+
+                outputs['.br'] = lambda: brotli.compress(data, quality=11)
+            for suffix, build in outputs.items():
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                packed = build()
+                if _write_if_smaller(target, packed, size):
+                    written += 1
+                    saved += size - len(packed)
+
+    if args.clean:
+        print(f'removed {removed} precompressed files')
+    else:
+        print(f'wrote {written} precompressed files, {saved / 1024:.0f} KB smaller than the originals'
+              + ('' if BROTLI_AVAILABLE else ' (brotli not installed: gzip only)'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
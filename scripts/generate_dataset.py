@@ -0,0 +1,546 @@
+"""Generate a synthetic asset register database for load and scale testing.
+
+Builds a fresh SQLite database with the app's schema, then fills it with brands,
+branches (with codes), restaurant areas and office departments, employees, asset
+types / names with specification fields and inclusions, and assets: branch and
+office assets, shared groups, legacy shared rows (no group id), archived rows,
+ownership history and document records. The same seed gives the same rows (dates
+are relative to today).
+
+    python scripts/generate_dataset.py --output /tmp/assets_100k.db --scale 100k
+    python scripts/generate_dataset.py --output /tmp/a.db --scale 1k --assets 5000 --logins 20
+
+Point the app at the result with ``app.config['DATABASE']`` (or copy it over
+``production_assets.db`` on a test machine). Login with the bootstrap Super Admin
+(admin@gmail.com / admin123 unless BOOTSTRAP_ADMIN_* is set) or the generated
+``loadtest-NNN@example.com`` accounts.
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from models.database import (  # noqa: E402
+    ASSET_KIND_BRANCH,
+    ASSET_KIND_SHARED,
+    OFFICE_BRANCH_LABEL,
+    RESTAURANT_AREA_OPTIONS,
+    RESTAURANT_DEFAULT_DEPARTMENT_NAME,
+    SHARED_ASSET_CODE_PREFIX,
+    _office_asset_code_prefix,
+    get_db_connection,
+    init_db,
+)
+from utils.asset_documents import get_documents_root  # noqa: E402
+from utils.auth import hash_password  # noqa: E402
+from utils.auth_roles import AUTH_ROLES, AUTH_ROLE_OPERATIONS  # noqa: E402
+
+SCALES = {
+    '1k': {'assets': 1_000, 'brands': 4, 'branches_per_brand': 5,
+           'employees_per_branch': 4, 'employees_per_office_department': 8},
+    '100k': {'assets': 100_000, 'brands': 10, 'branches_per_brand': 30,
+             'employees_per_branch': 8, 'employees_per_office_department': 60},
+    '1m': {'assets': 1_000_000, 'brands': 20, 'branches_per_brand': 100,
+           'employees_per_branch': 10, 'employees_per_office_department': 300},
+}
+
+# Share of generated asset rows per kind; the rest are plain branch/office assets.
+OFFICE_SHARE = 0.2
+SHARED_GROUP_SHARE = 0.06
+LEGACY_SHARED_SHARE = 0.01
+ARCHIVED_SHARE = 0.05
+HISTORY_SHARE = 0.15
+DOCUMENT_SHARE = 0.03
+SPEC_FILL_SHARE = 0.7
+BATCH_SIZE = 5000
+
+BRAND_NAMES = (
+    'Kucu', 'Boom Burger', 'Thoum', 'Cartoon', 'Saffron House', 'Dune Grill', 'Karak Corner',
+    'Marina Bites', 'Olive Tree', 'Spice Route', 'Harbour Fish', 'Date Palm', 'Frankincense',
+    'Wadi Cafe', 'Sidr Bakery', 'Majlis', 'Falaj Kitchen', 'Qurum Pizza', 'Jebel Shawarma',
+    'Sur Seafood', 'Nakhal Noodles', 'Bahla Burgers',
+)
+LOCALITIES = (
+    'Al Khoud', 'Al Maabilah', 'Al Amerat', 'Al Hail', 'Qurum', 'Ruwi', 'Ghubrah', 'Bausher',
+    'Seeb', 'Nizwa', 'Sohar', 'Sur', 'Ibri', 'Barka', 'Rustaq', 'Salalah', 'Buraimi', 'Ibra',
+    'Bidbid', 'Samail', 'Khasab', 'Duqm', 'Adam', 'Izki', 'Bahla', 'Saham', 'Shinas', 'Liwa',
+)
+REGION_CODES = ('MU', 'DA', 'BA', 'SH', 'DH', 'SO', 'WU', 'BU')
+OFFICE_DEPARTMENTS = (
+    'Information Technology', 'Finance', 'Human Resources', 'Procurement', 'Marketing',
+    'Operations', 'Quality Control', 'Research & Development', 'Legal', 'Training',
+    'Maintenance', 'Logistics',
+)
+FIRST_NAMES = (
+    'Mohammed', 'Ahmed', 'Salim', 'Said', 'Khalid', 'Hamed', 'Yousuf', 'Ali', 'Fatma', 'Aisha',
+    'Maryam', 'Zainab', 'Noor', 'Huda', 'John', 'Maria', 'Jose', 'Ana', 'Ramesh', 'Suresh',
+    'Priya', 'Anil', 'Deepa', 'Ravi', 'Junrix', 'Ermie', 'Dennis', 'Kervin', 'Grace', 'Joy',
+    'Imran', 'Bilal', 'Sara', 'Layla', 'Omar', 'Hassan', 'Rashid', 'Nasser', 'Talal', 'Saif',
+)
+LAST_NAMES = (
+    'Al Kamiyani', 'Al Balushi', 'Al Harthy', 'Al Busaidi', 'Al Rawahi', 'Al Hinai', 'Al Saadi',
+    'Al Maskari', 'Al Shukaili', 'Al Abri', 'Suan', 'Ocom', 'Abao', 'Ybanez', 'Estrella', 'Santos',
+    'Reyes', 'Cruz', 'Garcia', 'Nair', 'Pillai', 'Menon', 'Kumar', 'Sharma', 'Khan', 'Hussain',
+    'Qureshi', 'Farooq', 'Rahman', 'Haddad',
+)
+# (type, for_venue, [(asset name, price range, spec fields, inclusions)])
+ASSET_CATALOG = (
+    ('Electronics', 'both', (
+        ('Laptop', (180, 650), ('Processor', 'RAM', 'Storage', 'Serial Number'), ('Charger', 'Bag', 'Mouse')),
+        ('Desktop PC', (150, 500), ('Processor', 'RAM', 'Storage'), ('Keyboard', 'Mouse', 'Monitor Cable')),
+        ('POS Terminal', (200, 450), ('Serial Number', 'Firmware'), ('Receipt Printer', 'Cash Drawer')),
+        ('Printer', (60, 300), ('Model', 'Serial Number'), ('Power Cable', 'USB Cable')),
+        ('Mobile Phone', (80, 350), ('IMEI', 'Storage'), ('Charger', 'Case')),
+        ('CCTV Camera', (40, 160), ('Resolution', 'Serial Number'), ('Mount',)),
+    )),
+    ('Kitchen Equipment', 'restaurant', (
+        ('Fryer', (300, 1200), ('Capacity', 'Power'), ('Baskets',)),
+        ('Oven', (500, 2500), ('Capacity', 'Power', 'Serial Number'), ('Trays', 'Racks')),
+        ('Refrigerator', (350, 1800), ('Capacity', 'Serial Number'), ('Shelves',)),
+        ('Griddle', (250, 900), ('Plate Size',), ()),
+        ('Blender', (40, 200), ('Power',), ('Jar', 'Lid')),
+    )),
+    ('Furniture', 'both', (
+        ('Table', (30, 150), (), ()),
+        ('Chair', (10, 60), (), ()),
+        ('Cabinet', (40, 220), ('Material',), ('Keys',)),
+    )),
+    ('Office Equipment', 'office', (
+        ('Projector', (200, 700), ('Resolution', 'Serial Number'), ('Remote', 'HDMI Cable')),
+        ('Shredder', (50, 180), (), ()),
+        ('Scanner', (80, 300), ('Model',), ('USB Cable',)),
+    )),
+)
+SPEC_SAMPLE_VALUES = {
+    'Processor': ('Intel i5', 'Intel i7', 'Ryzen 5', 'Apple M2'),
+    'RAM': ('8 GB', '16 GB', '32 GB'),
+    'Storage': ('256 GB SSD', '512 GB SSD', '1 TB SSD', '128 GB'),
+    'Resolution': ('1080p', '4K', '720p'),
+    'Capacity': ('10 L', '20 L', '300 L', '500 L'),
+    'Power': ('1.5 kW', '3 kW', '6 kW'),
+    'Material': ('Steel', 'Wood', 'Aluminium'),
+    'Firmware': ('v1.2', 'v2.0', 'v2.4'),
+    'Plate Size': ('60 cm', '90 cm'),
+}
+USED_STATUSES = ('Used', 'Used', 'Used', 'Not Used', 'Out of Service')
+DOCUMENT_KINDS = (
+    ('Invoice.pdf', 'application/pdf'),
+    ('Warranty.pdf', 'application/pdf'),
+    ('Asset Ownership Acknowledgement.docx',
+     'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    ('Photo.jpg', 'image/jpeg'),
+)
+
+
+class DatasetBuilder:
+    """Keeps the generated reference data and per-scope code sequences while rows are written."""
+
+    def __init__(self, cur, rng, scale):
+        self.cur = cur
+        self.rng = rng
+        self.scale = scale
+        self.today = datetime.date.today()
+        self.branches = []            # (name, code)
+        self.restaurant_staff = {}    # branch name -> [(department, employee name)]
+        self.office_staff = {}        # office department -> [employee name]
+        self.catalog = []             # (type, for_venue, name, price range, spec field ids, inclusion ids)
+        self.code_sequences = {}
+        self.shared_sequence = 0
+        self.next_asset_id = 1
+        self.counts = {}
+
+    def _count(self, key, amount=1):
+        self.counts[key] = self.counts.get(key, 0) + amount
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _random_date(self, days_back):
+        return self.today - datetime.timedelta(days=self.rng.randint(0, days_back))
+
+    # ----- reference data -----
+
+    def build_directory(self):
+        cur, rng = self.cur, self.rng
+        brand_count = min(self.scale['brands'], len(BRAND_NAMES))
+        used_prefixes = set()
+        department_id = 0
+        employee_seq = 0
+        user_rows = []
+        for brand_index, brand in enumerate(BRAND_NAMES[:brand_count]):
+            cur.execute('INSERT INTO brands (name) VALUES (?)', (brand,))
+            brand_id = cur.lastrowid
+            prefix = ''.join(word[0] for word in brand.split()).upper()
+            if prefix in used_prefixes:
+                prefix = f'{prefix}{brand_index}'
+            used_prefixes.add(prefix)
+            for n in range(self.scale['branches_per_brand']):
+                locality = LOCALITIES[n % len(LOCALITIES)]
+                name = f'{brand} {locality}'
+                if n >= len(LOCALITIES):
+                    name = f'{name} {n // len(LOCALITIES) + 1}'
+                code = f'{prefix}-{REGION_CODES[n % len(REGION_CODES)]}{n + 1:03d}'
+                cur.execute(
+                    'INSERT INTO branches (name, brand_id, branch_code) VALUES (?, ?, ?)',
+                    (name, brand_id, code),
+                )
+                branch_id = cur.lastrowid
+                self.branches.append((name, code))
+                areas = [RESTAURANT_DEFAULT_DEPARTMENT_NAME] + rng.sample(
+                    RESTAURANT_AREA_OPTIONS, rng.randint(0, 2),
+                )
+                staff = self.restaurant_staff[name] = []
+                for area in areas:
+                    cur.execute('INSERT INTO departments (name, branch_id) VALUES (?, ?)', (area, branch_id))
+                    department_id = cur.lastrowid
+                    per_area = max(1, self.scale['employees_per_branch'] // len(areas))
+                    for employee in self._unique_names(per_area):
+                        employee_seq += 1
+                        staff.append((area, employee))
+                        user_rows.append(self._user_row(employee, employee_seq, department_id, code))
+        for department in OFFICE_DEPARTMENTS:
+            cur.execute('INSERT INTO departments (name, branch_id) VALUES (?, NULL)', (department,))
+            department_id = cur.lastrowid
+            staff = self.office_staff[department] = []
+            for employee in self._unique_names(self.scale['employees_per_office_department']):
+                employee_seq += 1
+                staff.append(employee)
+                user_rows.append(self._user_row(employee, employee_seq, department_id, 'office'))
+        cur.executemany(
+            'INSERT INTO users (name, employee_id, mobile, email, department_id) VALUES (?, ?, ?, ?, ?)',
+            user_rows,
+        )
+        self._count('brands', brand_count)
+        self._count('branches', len(self.branches))
+        self._count('employees', len(user_rows))
+
+    def _unique_names(self, count):
+        names = set()
+        while len(names) < count:
+            name = f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'
+            if name in names:
+                name = f'{name} {self.rng.randint(2, 99)}'
+            names.add(name)
+        return sorted(names)
+
+    def _user_row(self, name, seq, department_id, mailbox):
+        mobile = f'9{self.rng.randint(0, 9999999):07d}'
+        email = f'{mailbox.lower()}.{seq}@example.com'
+        return (name, f'EMP{seq:06d}', mobile, email, department_id)
+
+    def build_catalog(self):
+        cur = self.cur
+        for type_name, for_venue, names in ASSET_CATALOG:
+            cur.execute('INSERT INTO asset_types (name, for_venue) VALUES (?, ?)', (type_name, for_venue))
+            type_id = cur.lastrowid
+            for name, price_range, spec_labels, inclusion_labels in names:
+                cur.execute('INSERT INTO asset_names (name, asset_type_id) VALUES (?, ?)', (name, type_id))
+                name_id = cur.lastrowid
+                spec_fields = []
+                for order, label in enumerate(spec_labels):
+                    cur.execute(
+                        'INSERT INTO asset_name_spec_fields (asset_name_id, label, sort_order) VALUES (?, ?, ?)',
+                        (name_id, label, order),
+                    )
+                    spec_fields.append((cur.lastrowid, label))
+                inclusions = []
+                for order, label in enumerate(inclusion_labels):
+                    cur.execute(
+                        'INSERT INTO asset_name_inclusions (asset_name_id, label, sort_order) VALUES (?, ?, ?)',
+                        (name_id, label, order),
+                    )
+                    inclusions.append(cur.lastrowid)
+                self.catalog.append((type_name, for_venue, name, price_range, spec_fields, inclusions))
+        self.restaurant_catalog = [item for item in self.catalog if item[1] in ('restaurant', 'both')]
+        self.office_catalog = [item for item in self.catalog if item[1] in ('office', 'both')]
+
+    def build_logins(self, count, role, password):
+        if count < 1:
+            return
+        password_hash = hash_password(password)
+        self.cur.executemany(
+            '''
+            INSERT INTO users_auth (email, password_hash, encrypted_password, full_name, role)
+            VALUES (?, ?, 'DEPRECATED', ?, ?)
+            ''',
+            [
+                (f'loadtest-{i:03d}@example.com', password_hash, f'Load Test {i:03d}', role)
+                for i in range(1, count + 1)
+            ],
+        )
+        self._count('logins', count)
+
+    # ----- assets -----
+
+    def _next_code(self, branch, department, prefix):
+        key = (branch, department) if branch == OFFICE_BRANCH_LABEL else (branch,)
+        seq = self.code_sequences.get(key, 0) + 1
+        self.code_sequences[key] = seq
+        return f'{prefix}-{seq:04d}'
+
+    def _asset_row(self, item, owner, branch, department, code, kind=ASSET_KIND_BRANCH, group_id=None):
+        type_name, _, name, (low, high), _, _ = item
+        asset_id = self.next_asset_id
+        self.next_asset_id += 1
+        return (
+            asset_id, name, round(self.rng.uniform(low, high), 3), owner, branch, department, code,
+            str(self._uuid()), self.rng.choice(USED_STATUSES), type_name, kind, group_id,
+            self._random_date(5 * 365).isoformat(),
+        )
+
+    def _restaurant_asset(self):
+        branch, code = self.rng.choice(self.branches)
+        department, owner = self.rng.choice(self.restaurant_staff[branch])
+        item = self.rng.choice(self.restaurant_catalog)
+        return item, self._asset_row(item, owner, branch, department, self._next_code(branch, department, code))
+
+    def _office_asset(self):
+        department = self.rng.choice(OFFICE_DEPARTMENTS)
+        owner = self.rng.choice(self.office_staff[department])
+        item = self.rng.choice(self.office_catalog)
+        code = self._next_code(OFFICE_BRANCH_LABEL, department, _office_asset_code_prefix(department))
+        return item, self._asset_row(item, owner, OFFICE_BRANCH_LABEL, department, code)
+
+    def _shared_group(self, legacy):
+        """One shared asset spread over 2-5 branches (legacy rows carry no group id)."""
+        size = min(len(self.branches), self.rng.randint(2, 5))
+        item = self.rng.choice(self.restaurant_catalog)
+        owner = self.rng.choice(self.office_staff[self.rng.choice(OFFICE_DEPARTMENTS)])
+        group_id = None if legacy else str(self._uuid())
+        if not legacy:
+            self.shared_sequence += 1
+            shared_code = f'{SHARED_ASSET_CODE_PREFIX}-{self.shared_sequence:04d}'
+        rows = []
+        for branch, branch_code in self.rng.sample(self.branches, size):
+            department = RESTAURANT_DEFAULT_DEPARTMENT_NAME
+            code = self._next_code(branch, department, branch_code) if legacy else shared_code
+            rows.append((item, self._asset_row(
+                item, owner, branch, department, code, kind=ASSET_KIND_SHARED, group_id=group_id,
+            )))
+        return rows
+
+    def _generate_assets(self, total):
+        produced = 0
+        while produced < total:
+            # Shared groups average 3.5 rows, so they are drawn that much less often.
+            roll = self.rng.random()
+            if roll < SHARED_GROUP_SHARE / 3.5:
+                rows = self._shared_group(legacy=False)
+                self._count('shared_groups')
+            elif roll < (SHARED_GROUP_SHARE + LEGACY_SHARED_SHARE) / 3.5:
+                rows = self._shared_group(legacy=True)
+                self._count('legacy_shared_groups')
+            elif roll < OFFICE_SHARE:
+                rows = [self._office_asset()]
+            else:
+                rows = [self._restaurant_asset()]
+            for item_row in rows[:total - produced]:
+                produced += 1
+                yield item_row
+
+    def build_assets(self, total, document_files=False):
+        archived_total = int(total * ARCHIVED_SHARE)
+        batch = []
+        for item_row in self._generate_assets(total - archived_total):
+            batch.append(item_row)
+            if len(batch) >= BATCH_SIZE:
+                self._write_asset_batch(batch, document_files)
+                batch = []
+        if batch:
+            self._write_asset_batch(batch, document_files)
+
+        batch = []
+        for item, row in self._generate_assets(archived_total):
+            batch.append(self._archived_row(row))
+            if len(batch) >= BATCH_SIZE:
+                self._write_archived_batch(batch)
+                batch = []
+        if batch:
+            self._write_archived_batch(batch)
+
+    def _archived_row(self, row):
+        (asset_id, name, price, owner, branch, department, code, qr_code, used_status,
+         asset_type, kind, group_id, asset_date) = row
+        archived_at = datetime.datetime.combine(self._random_date(365), datetime.time(9, 0))
+        reason = self.rng.choice(('Assets bulk archived by user', 'Disposed', 'Damaged beyond repair'))
+        return (
+            asset_id, name, price, owner, branch, department, code, qr_code, used_status, asset_type,
+            kind, group_id, asset_date, archived_at.strftime('%Y-%m-%d %H:%M:%S'), 'Super Admin', reason,
+        )
+
+    def _write_archived_batch(self, rows):
+        self.cur.executemany(
+            '''
+            INSERT INTO archived_assets (
+                original_id, name, price, owner, branch, department, asset_code, qr_random_code,
+                used_status, asset_type, asset_kind, shared_group_id, asset_date,
+                archived_at, archived_by, archive_reason
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            rows,
+        )
+        self._count('archived_assets', len(rows))
+
+    def _write_asset_batch(self, batch, document_files):
+        cur, rng = self.cur, self.rng
+        cur.executemany(
+            '''
+            INSERT INTO assets (
+                id, name, price, owner, branch, department, asset_code, qr_random_code,
+                used_status, asset_type, asset_kind, shared_group_id, asset_date
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            [row for _, row in batch],
+        )
+        spec_rows, inclusion_rows, history_rows, document_rows = [], [], [], []
+        for item, row in batch:
+            asset_id, owner, branch, department, code, group_id = row[0], row[3], row[4], row[5], row[6], row[11]
+            _, _, _, _, spec_fields, inclusions = item
+            if spec_fields and rng.random() < SPEC_FILL_SHARE:
+                for field_id, label in spec_fields:
+                    samples = SPEC_SAMPLE_VALUES.get(label)
+                    value = rng.choice(samples) if samples else f'{label[:2].upper()}{rng.randint(10000, 99999)}'
+                    spec_rows.append((asset_id, field_id, value))
+                for inclusion_id in inclusions:
+                    if rng.random() < 0.5:
+                        inclusion_rows.append((asset_id, inclusion_id))
+            if rng.random() < HISTORY_SHARE:
+                history_rows.extend(self._history_rows(asset_id, code, owner, branch, department, group_id))
+            if rng.random() < DOCUMENT_SHARE:
+                document_rows.extend(self._document_rows(asset_id, document_files))
+        cur.executemany(
+            'INSERT INTO asset_spec_values (asset_id, spec_field_id, value) VALUES (?, ?, ?)', spec_rows,
+        )
+        cur.executemany(
+            'INSERT INTO asset_inclusion_values (asset_id, inclusion_id) VALUES (?, ?)', inclusion_rows,
+        )
+        cur.executemany(
+            '''
+            INSERT INTO asset_ownership_history (
+                asset_id, asset_code, from_owner, to_owner, from_branch, to_branch,
+                from_department, to_department, handed_over_by, notes, handed_over_at, shared_group_id
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            history_rows,
+        )
+        cur.executemany(
+            '''
+            INSERT INTO asset_documents (
+                asset_id, original_filename, stored_filename, content_type, file_size, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?)
+            ''',
+            document_rows,
+        )
+        self._count('assets', len(batch))
+        self._count('spec_values', len(spec_rows))
+        self._count('inclusion_values', len(inclusion_rows))
+        self._count('ownership_history', len(history_rows))
+        self._count('documents', len(document_rows))
+
+    def _history_rows(self, asset_id, code, owner, branch, department, group_id):
+        """1-3 earlier hand-overs ending with the current owner and location."""
+        hops = self.rng.randint(1, 3)
+        previous = []
+        for _ in range(hops):
+            from_branch, _ = self.rng.choice(self.branches)
+            from_department, from_owner = self.rng.choice(self.restaurant_staff[from_branch])
+            previous.append((from_owner, from_branch, from_department))
+        chain = previous + [(owner, branch, department)]
+        days = sorted((self.rng.randint(1, 720) for _ in range(hops)), reverse=True)
+        rows = []
+        for (from_owner, from_branch, from_dept), (to_owner, to_branch, to_dept), days_ago in zip(
+            chain, chain[1:], days,
+        ):
+            handed_over_at = datetime.datetime.combine(
+                self.today - datetime.timedelta(days=days_ago), datetime.time(10, 30),
+            )
+            rows.append((
+                asset_id, code, from_owner, to_owner, from_branch, to_branch, from_dept, to_dept,
+                'Super Admin', None, handed_over_at.strftime('%Y-%m-%d %H:%M:%S'), group_id,
+            ))
+        return rows
+
+    def _document_rows(self, asset_id, document_files):
+        rows = []
+        for original_filename, content_type in self.rng.sample(DOCUMENT_KINDS, self.rng.randint(1, 2)):
+            extension = os.path.splitext(original_filename)[1]
+            stored_filename = f'{asset_id}_{self._uuid().hex}{extension}'
+            size = self.rng.randint(20_000, 2_000_000)
+            if document_files:
+                content = f'Synthetic document for asset {asset_id}: {original_filename}\n'.encode()
+                (get_documents_root() / stored_filename).write_bytes(content)
+                size = len(content)
+            created_at = datetime.datetime.combine(self._random_date(720), datetime.time(12, 0))
+            rows.append((
+                asset_id, original_filename, stored_filename, content_type, size,
+                created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            ))
+        return rows
+
+
+def build_dataset(output, scale, seed=1, logins=0, login_role=AUTH_ROLE_OPERATIONS,
+                  login_password='loadtest123', document_files=False):
+    """Create ``output`` (must not exist) at ``scale`` (a ``SCALES`` entry); returns row counts."""
+    app = Flask(__name__)
+    app.config['DATABASE'] = output
+    with app.app_context():
+        init_db()
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('PRAGMA synchronous = OFF')
+        builder = DatasetBuilder(cur, random.Random(seed), scale)
+        builder.build_directory()
+        builder.build_catalog()
+        builder.build_logins(logins, login_role, login_password)
+        builder.build_assets(scale['assets'], document_files=document_files)
+        conn.commit()
+        cur.execute('ANALYZE')
+        conn.commit()
+        conn.close()
+    return builder.counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', required=True, help='database file to create')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='1k')
+    parser.add_argument('--assets', type=int, help='override the number of asset rows (active + archived)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--logins', type=int, default=0, help='extra login accounts loadtest-NNN@example.com')
+    parser.add_argument('--login-role', choices=AUTH_ROLES, default=AUTH_ROLE_OPERATIONS)
+    parser.add_argument('--login-password', default='loadtest123')
+    parser.add_argument(
+        '--document-files', action='store_true',
+        help='also write small placeholder files into uploads/asset_documents',
+    )
+    parser.add_argument('--force', action='store_true', help='replace --output if it exists')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    if os.path.exists(output):
+        if not args.force:
+            parser.error(f'{output} exists; pass --force to replace it')
+        os.remove(output)
+    scale = dict(SCALES[args.scale])
+    if args.assets is not None:
+        scale['assets'] = args.assets
+
+    started = time.perf_counter()
+    counts = build_dataset(
+        output, scale, seed=args.seed, logins=args.logins, login_role=args.login_role,
+        login_password=args.login_password, document_files=args.document_files,
+    )
+    print(f'wrote {output} in {time.perf_counter() - started:.1f}s')
+    for key, value in sorted(counts.items()):
+        print(f'  {key:>22}: {value:,}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Run queued background jobs (imports, bulk archive/restore, XLSX exports).
+
+Run it next to the web app, from the same directory as ``run.py`` so it opens the
+same database. Jobs run one at a time; several workers may share the queue.
+
+    python scripts/job_worker.py
+    python scripts/job_worker.py --once          # drain the queue, then exit
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from __init__ import create_app  # noqa: E402
+from models.database import get_db_connection  # noqa: E402
+from utils.jobs import claim_next_job, fail_stale_jobs, run_job, sweep_job_spool  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--once', action='store_true', help='exit when the queue is empty')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='seconds between polls when idle')
+    parser.add_argument(
+        '--stale-after', type=int, default=900,
+        help='fail running jobs with no progress for this many seconds (crashed workers)',
+    )
+    parser.add_argument(
+        '--sweep-interval', type=float, default=300.0,
+        help='seconds between sweeps of spooled uploads no live job refers to',
+    )
+    args = parser.parse_args()
+
+    app = create_app()
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    print(f'job worker {worker_id} started')
+    last_sweep = None
+    with app.app_context():
+        while True:
+            conn = get_db_connection()
+            try:
+                stale = fail_stale_jobs(conn, args.stale_after)
+                if stale:
+                    print(f'marked {stale} abandoned job(s) as failed')
+                if last_sweep is None or time.monotonic() - last_sweep >= args.sweep_interval:
+                    last_sweep = time.monotonic()
+                    swept = sweep_job_spool(conn)
+                    if swept:
+                        print(f'removed {swept} orphaned spool file(s)')
+                job = claim_next_job(conn, worker_id)
+                if job:
+                    started = time.perf_counter()
+                    status = run_job(conn, job)
+                    elapsed = time.perf_counter() - started
+                    print(f'job {job["id"]} ({job["kind"]}) {status} in {elapsed:.1f}s')
+            finally:
+                conn.close()
+            if job:
+                continue
+            if args.once:
+                break
+            try:
+                time.sleep(args.poll_interval)
+            except KeyboardInterrupt:
+                break
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,410 @@
+"""Drive a running instance with concurrent scripted user journeys and report capacity.
+
+Each virtual user logs in once, then loops over weighted tasks with think time in
+between, the way branch staff use the register:
+
+- live search: types a term key by key and sends ``/assets/dashboard?partial=1``
+  requests only where the browser's 280 ms debounce would fire
+- paging: walks a few result pages, sometimes jumping to the last one
+- QR scan: opens ``/assets/asset/<code>`` (what a phone camera lands on)
+- label print: posts a batch to ``/assets/qr-label-print/batch``
+- hand-over: moves a branch asset to another employee (same branch / area, so the
+  asset code does not change)
+- document upload: uploads a small text file to an asset and deletes it again
+
+Sample asset ids, codes, branches, search terms and employee names are read from the
+instance's SQLite file (read-only), so run this against a generated dataset, not
+production data: hand-overs and uploads write. ``--read-only`` skips them.
+
+    python scripts/generate_dataset.py --output /tmp/load.db --scale 100k --logins 50
+    DATABASE=/tmp/load.db python run.py
+    python scripts/load_test.py --database /tmp/load.db --users 50 --duration 120
+
+Only the standard library is used (threads + ``urllib``). Per step it prints request
+count, throughput, error rate and p50 / p95 / p99 latency; ``--json`` saves the same.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from http.cookiejar import CookieJar
+from urllib import error as urlerror
+from urllib import parse, request as urlrequest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import ASSET_KIND_BRANCH, OFFICE_BRANCH_LABEL  # noqa: E402
+
+SEARCH_DEBOUNCE_SECONDS = 0.28  # static/js/live-search.js default delay
+KEYSTROKE_GAP_SECONDS = (0.08, 0.45)
+PER_PAGE = 10
+LABEL_BATCH_SIZE = (4, 24)
+REQUEST_TIMEOUT_SECONDS = 60
+
+# (task, weight); run_<task> methods on VirtualUser.
+TASKS = (
+    ('search', 5),
+    ('paging', 3),
+    ('qr_scan', 4),
+    ('label_print', 1),
+    ('handover', 1),
+    ('document_upload', 1),
+)
+WRITE_TASKS = frozenset({'handover', 'document_upload'})
+
+
+class _NoRedirect(urlrequest.HTTPRedirectHandler):
+    """Surface 3xx responses so each request is timed on its own."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class StepStats:
+    """Latencies and errors per step, shared by all virtual users."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._errors = {}
+        self._error_samples = {}
+
+    def record(self, step, seconds, error=None):
+        with self._lock:
+            self._latencies.setdefault(step, []).append(seconds)
+            if error:
+                self._errors[step] = self._errors.get(step, 0) + 1
+                samples = self._error_samples.setdefault(step, [])
+                if len(samples) < 5 and error not in samples:
+                    samples.append(error)
+
+    def report(self, elapsed):
+        with self._lock:
+            steps = {step: sorted(values) for step, values in self._latencies.items()}
+            errors = dict(self._errors)
+            samples = {step: list(values) for step, values in self._error_samples.items()}
+        rows = []
+        for step, values in sorted(steps.items()):
+            rows.append(_summarize(step, values, errors.get(step, 0), elapsed, samples.get(step, [])))
+        everything = sorted(value for values in steps.values() for value in values)
+        total = _summarize('TOTAL', everything, sum(errors.values()), elapsed, [])
+        return rows, total
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def _summarize(step, values, errors, elapsed, error_samples):
+    count = len(values)
+    return {
+        'step': step,
+        'requests': count,
+        'errors': errors,
+        'error_rate': errors / count if count else 0.0,
+        'rps': count / elapsed if elapsed else 0.0,
+        'p50_ms': _percentile(values, 50) * 1000,
+        'p95_ms': _percentile(values, 95) * 1000,
+        'p99_ms': _percentile(values, 99) * 1000,
+        'max_ms': (values[-1] if values else 0.0) * 1000,
+        'error_samples': error_samples,
+    }
+
+
+def load_samples(database, limit=500):
+    """Asset ids / codes, branches, search terms and employee names from the instance DB."""
+    conn = sqlite3.connect(f'file:{database}?mode=ro', uri=True)
+    cur = conn.cursor()
+    cur.execute(
+        '''
+        SELECT id, asset_code, branch, department, owner FROM assets
+        WHERE COALESCE(asset_kind, ?) = ? AND branch != ? AND asset_code IS NOT NULL
+        ORDER BY RANDOM() LIMIT ?
+        ''',
+        (ASSET_KIND_BRANCH, ASSET_KIND_BRANCH, OFFICE_BRANCH_LABEL, limit),
+    )
+    assets = cur.fetchall()
+    cur.execute('SELECT asset_code FROM assets WHERE asset_code IS NOT NULL ORDER BY RANDOM() LIMIT ?', (limit,))
+    codes = [row[0] for row in cur.fetchall()]
+    cur.execute('SELECT name FROM branches ORDER BY name')
+    branches = [row[0] for row in cur.fetchall()]
+    cur.execute('SELECT name FROM users ORDER BY RANDOM() LIMIT ?', (limit,))
+    employees = [row[0] for row in cur.fetchall()]
+    cur.execute('SELECT DISTINCT name FROM assets ORDER BY RANDOM() LIMIT ?', (limit,))
+    terms = sorted({
+        word for (name,) in cur.fetchall() for word in (name or '').split() if len(word) >= 3 and word.isalnum()
+    })
+    cur.execute('SELECT COUNT(*) FROM assets')
+    total_assets = cur.fetchone()[0]
+    conn.close()
+    if not assets or not codes:
+        raise SystemExit(f'{database} has no assets to drive the journeys with')
+    return {
+        'assets': assets,
+        'codes': codes,
+        'branches': branches,
+        'employees': employees or ['Load Test Owner'],
+        'terms': (terms + branches) or ['a'],
+        'pages': max(1, -(-total_assets // PER_PAGE)),
+    }
+
+
+class VirtualUser:
+    """One logged-in browser session running weighted tasks until the deadline."""
+
+    def __init__(self, options, account, samples, stats, seed):
+        self.options = options
+        self.email, self.password = account
+        self.samples = samples
+        self.stats = stats
+        self.rng = random.Random(seed)
+        self.opener = urlrequest.build_opener(
+            urlrequest.HTTPCookieProcessor(CookieJar()), _NoRedirect(),
+        )
+        tasks = [(name, weight) for name, weight in TASKS if not (options.read_only and name in WRITE_TASKS)]
+        self.task_names = [name for name, _ in tasks]
+        self.task_weights = [weight for _, weight in tasks]
+
+    # -- HTTP ---------------------------------------------------------------
+
+    def _request(self, step, path, data=None, headers=None, method=None, expect=(200,)):
+        """Time one request; return ``(status, body bytes)`` or ``(None, b'')`` on failure."""
+        req = urlrequest.Request(
+            self.options.base_url + path, data=data, headers=headers or {}, method=method,
+        )
+        started = time.perf_counter()
+        status, body, err = None, b'', None
+        try:
+            with self.opener.open(req, timeout=REQUEST_TIMEOUT_SECONDS) as resp:
+                status, body = resp.status, resp.read()
+        except urlerror.HTTPError as e:
+            status, body = e.code, e.read()
+        except (urlerror.URLError, OSError) as e:
+            err = f'{type(e).__name__}: {getattr(e, "reason", e)}'
+        seconds = time.perf_counter() - started
+        if err is None and status not in expect:
+            err = f'HTTP {status}'
+        self.stats.record(step, seconds, err)
+        return (status, body) if err is None else (None, b'')
+
+    def _get(self, step, path, params=None, **kwargs):
+        if params:
+            path = f'{path}?{parse.urlencode(params)}'
+        return self._request(step, path, **kwargs)
+
+    def _post_form(self, step, path, fields, **kwargs):
+        return self._request(
+            step, path, data=parse.urlencode(fields).encode(),
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}, **kwargs,
+        )
+
+    def _post_json(self, step, path, payload, **kwargs):
+        return self._request(
+            step, path, data=json.dumps(payload).encode(),
+            headers={'Content-Type': 'application/json'}, **kwargs,
+        )
+
+    def _partial(self, step, params):
+        query = dict(params, partial='1', per_page=str(PER_PAGE))
+        return self._get(step, '/assets/dashboard', query, headers={'X-Requested-With': 'XMLHttpRequest'})
+
+    # -- journeys -----------------------------------------------------------
+
+    def login(self):
+        self._get('login_page', '/auth/login')
+        status, _ = self._post_form(
+            'login', '/auth/login', {'email': self.email, 'password': self.password}, expect=(302,),
+        )
+        if status is None:
+            return False
+        self._get('dashboard', '/assets/dashboard')
+        return True
+
+    def run_search(self):
+        """Type a term; only send the keystrokes after which the debounce timer would fire."""
+        term = self.rng.choice(self.samples['terms'])
+        typed = ''
+        for i, char in enumerate(term):
+            typed += char
+            if i == len(term) - 1:
+                time.sleep(SEARCH_DEBOUNCE_SECONDS)
+                self._partial('search', {'search': typed, 'page': '1'})
+                break
+            gap = self.rng.uniform(*KEYSTROKE_GAP_SECONDS)
+            if gap >= SEARCH_DEBOUNCE_SECONDS:
+                time.sleep(SEARCH_DEBOUNCE_SECONDS)
+                self._partial('search', {'search': typed, 'page': '1'})
+                time.sleep(gap - SEARCH_DEBOUNCE_SECONDS)
+            else:
+                time.sleep(gap)
+        if self.samples['branches'] and self.rng.random() < 0.5:
+            self._think(0.5)
+            branch = self.rng.choice(self.samples['branches'])
+            self._partial('filter', {'search': typed, 'branch': branch, 'page': '1'})
+
+    def run_paging(self):
+        pages = self.samples['pages']
+        start = self.rng.randint(1, min(pages, 20))
+        for page in range(start, min(pages, start + self.rng.randint(1, 4)) + 1):
+            self._partial('page', {'page': str(page)})
+            self._think(0.3)
+        if pages > 1 and self.rng.random() < 0.2:
+            self._partial('page', {'page': str(pages)})
+
+    def run_qr_scan(self):
+        code = self.rng.choice(self.samples['codes'])
+        self._get('qr_scan', '/assets/asset/' + parse.quote(code, safe=''))
+
+    def run_label_print(self):
+        count = self.rng.randint(*LABEL_BATCH_SIZE)
+        picked = self.rng.sample(self.samples['assets'], min(count, len(self.samples['assets'])))
+        payload = {
+            'items': [{'kind': 'asset', 'id': row[0]} for row in picked],
+            'autoprint': False,
+        }
+        self._post_json('label_print', '/assets/qr-label-print/batch', payload)
+
+    def run_handover(self):
+        asset_id, _code, branch, department, owner = self.rng.choice(self.samples['assets'])
+        candidates = [name for name in self.samples['employees'] if name != owner] or ['Load Test Owner']
+        fields = {
+            'owner': self.rng.choice(candidates),
+            'asset_venue': 'restaurant',
+            'branch': branch,
+            'department': department or '',
+            'notes': 'load test',
+        }
+        # A concurrent hand-over may have taken the owner first: "nothing to hand over" is a 400.
+        self._post_form('handover', f'/assets/handover/{asset_id}', fields, expect=(200, 400))
+
+    def run_document_upload(self):
+        asset_id = self.rng.choice(self.samples['assets'])[0]
+        filename = f'load-test-{uuid.UUID(int=self.rng.getrandbits(128)).hex[:12]}.txt'
+        content = ('load test document\n' * self.rng.randint(50, 500)).encode()
+        boundary = uuid.UUID(int=self.rng.getrandbits(128)).hex
+        body = b''.join([
+            f'--{boundary}\r\n'.encode(),
+            f'Content-Disposition: form-data; name="supporting_documents"; filename="{filename}"\r\n'.encode(),
+            b'Content-Type: text/plain\r\n\r\n',
+            content,
+            f'\r\n--{boundary}--\r\n'.encode(),
+        ])
+        status, response = self._request(
+            'document_upload', f'/assets/{asset_id}/documents', data=body,
+            headers={'Content-Type': f'multipart/form-data; boundary={boundary}'},
+        )
+        if status is None:
+            return
+        try:
+            documents = json.loads(response).get('documents') or []
+        except ValueError:
+            return
+        for doc in documents:
+            if doc.get('original_filename') == filename:
+                self._request('document_delete', f'/assets/{asset_id}/documents/{doc["id"]}', method='DELETE')
+
+    def _think(self, scale=1.0):
+        low, high = self.options.think_time
+        time.sleep(self.rng.uniform(low, high) * scale)
+
+    def run(self, deadline):
+        if not self.login():
+            return
+        while time.monotonic() < deadline:
+            task = self.rng.choices(self.task_names, weights=self.task_weights)[0]
+            getattr(self, f'run_{task}')()
+            self._think()
+
+
+def _accounts(args):
+    if args.account:
+        accounts = []
+        for spec in args.account:
+            email, sep, password = spec.partition(':')
+            if not sep:
+                raise SystemExit(f'--account expects EMAIL:PASSWORD, got {spec!r}')
+            accounts.append((email, password))
+        return accounts
+    return [(f'loadtest-{i:03d}@example.com', args.password) for i in range(1, args.logins + 1)]
+
+
+def print_report(rows, total, elapsed, users):
+    print(f'\n{users} users, {elapsed:.1f}s')
+    header = f'{"step":<18} {"reqs":>7} {"req/s":>8} {"err%":>6} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"max ms":>9}'
+    print(header)
+    for row in rows + [total]:
+        print(
+            f'{row["step"]:<18} {row["requests"]:>7} {row["rps"]:>8.2f} {row["error_rate"] * 100:>5.1f}% '
+            f'{row["p50_ms"]:>9.1f} {row["p95_ms"]:>9.1f} {row["p99_ms"]:>9.1f} {row["max_ms"]:>9.1f}'
+        )
+    for row in rows:
+        for sample in row['error_samples']:
+            print(f'  {row["step"]}: {sample}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://127.0.0.1:5001')
+    parser.add_argument('--database', required=True, help="the instance's SQLite file, read for sample data")
+    parser.add_argument('--users', type=int, default=10, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60.0, help='seconds to run after ramp-up starts')
+    parser.add_argument('--ramp-up', type=float, default=10.0, help='seconds over which users start')
+    parser.add_argument('--think-time', type=float, nargs=2, default=(1.0, 3.0), metavar=('MIN', 'MAX'))
+    parser.add_argument('--logins', type=int, default=20, help='loadtest-NNN@example.com accounts to cycle')
+    parser.add_argument('--password', default='loadtest123', help='password of the loadtest accounts')
+    parser.add_argument('--account', action='append', help='EMAIL:PASSWORD (repeatable; replaces --logins)')
+    parser.add_argument('--read-only', action='store_true', help='skip hand-over and document upload')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+    args.base_url = args.base_url.rstrip('/')
+
+    accounts = _accounts(args)
+    if not accounts:
+        raise SystemExit('no accounts: pass --logins N or --account EMAIL:PASSWORD')
+    samples = load_samples(args.database)
+    stats = StepStats()
+
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = []
+    for i in range(args.users):
+        user = VirtualUser(args, accounts[i % len(accounts)], samples, stats, seed=args.seed * 100_003 + i)
+        thread = threading.Thread(target=user.run, args=(deadline,), daemon=True)
+        delay = args.ramp_up * i / args.users if args.users else 0
+        threads.append((delay, thread))
+
+    for delay, thread in threads:
+        wait = started + delay - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        thread.start()
+    for _, thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    rows, total = stats.report(elapsed)
+    print_report(rows, total, elapsed, args.users)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'base_url': args.base_url,
+                'users': args.users,
+                'duration_seconds': round(elapsed, 2),
+                'steps': rows,
+                'total': total,
+            }, f, indent=2)
+        print(f'\nreport written to {args.json}')
+    return 1 if total['requests'] == 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
-path = r"C:\Users\glori\Asset-Tracking-System - Copy\templates\index.html"
+import os
+
+path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "index.html")
 with open(path, "r", encoding="utf-8") as f:
     text = f.read()
 marker = "{% block extra_scripts %}"
@@ -12,7 +14,9 @@ if len(subpost) != 2:
 post = subpost[1]
 new_body = (
     "\n<script src=\"https://cdnjs.cloudflare.com/ajax/libs/qrcodejs/1.0.0/qrcode.min.js\"></script>\n"
-    "{% include 'partials/dashboard_main_script.html' %}\n"
+    "<script src=\"{{ url_for('static', filename='js/chip-multi-select.js') }}\"></script>\n"
+    "<script src=\"{{ url_for('static', filename='js/live-search.js') }}\"></script>\n"
+    "<script src=\"{{ static_url('js/dashboard-main.js') }}\"></script>\n"
 )
 new_text = pre + marker + new_body + "{% endblock %}" + post
 with open(path, "w", encoding="utf-8") as f:
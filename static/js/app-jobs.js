@@ -0,0 +1,135 @@
+/**
+ * Background jobs: large bulk actions and imports are sent with background=1 and
+ * followed through /jobs/<id> with a progress panel and a Cancel button.
+ */
+(function (global) {
+    'use strict';
+
+    // Selections / uploads at least this large run as a job instead of inline.
+    var BACKGROUND_MIN_ITEMS = 500;
+    var BACKGROUND_MIN_BYTES = 1024 * 1024;
+    var POLL_INTERVAL_MS = 1000;
+
+    function wantsBackground(itemCount, file) {
+        if (itemCount && itemCount >= BACKGROUND_MIN_ITEMS) return true;
+        return !!(file && file.size >= BACKGROUND_MIN_BYTES);
+    }
+
+    function createPanel(title, onCancel) {
+        var panel = document.createElement('div');
+        panel.className = 'card shadow position-fixed bottom-0 end-0 m-3';
+        panel.style.zIndex = '2000';
+        panel.style.width = '320px';
+        panel.setAttribute('role', 'status');
+
+        var body = document.createElement('div');
+        body.className = 'card-body';
+        var heading = document.createElement('div');
+        heading.className = 'fw-semibold mb-2';
+        heading.textContent = title;
+        var track = document.createElement('div');
+        track.className = 'progress mb-2';
+        var bar = document.createElement('div');
+        bar.className = 'progress-bar progress-bar-striped progress-bar-animated';
+        bar.style.width = '100%';
+        track.appendChild(bar);
+        var footer = document.createElement('div');
+        footer.className = 'd-flex justify-content-between align-items-center small';
+        var status = document.createElement('span');
+        status.className = 'text-muted';
+        status.textContent = 'Queued…';
+        var cancelBtn = document.createElement('button');
+        cancelBtn.type = 'button';
+        cancelBtn.className = 'btn btn-sm btn-outline-secondary';
+        cancelBtn.textContent = 'Cancel';
+        cancelBtn.addEventListener('click', function () {
+            cancelBtn.disabled = true;
+            status.textContent = 'Cancelling…';
+            onCancel();
+        });
+        footer.appendChild(status);
+        footer.appendChild(cancelBtn);
+        body.appendChild(heading);
+        body.appendChild(track);
+        body.appendChild(footer);
+        panel.appendChild(body);
+        document.body.appendChild(panel);
+
+        return {
+            update: function (job) {
+                if (cancelBtn.disabled) return;
+                var done = (job.progress && job.progress.done) || 0;
+                var total = job.progress && job.progress.total;
+                if (job.status === 'queued') {
+                    status.textContent = 'Queued…';
+                } else if (total) {
+                    var pct = Math.min(100, Math.round(done * 100 / total));
+                    bar.classList.remove('progress-bar-striped', 'progress-bar-animated');
+                    bar.style.width = pct + '%';
+                    status.textContent = fmtNum(done) + ' of ' + fmtNum(total) + ' (' + pct + '%)';
+                } else {
+                    status.textContent = fmtNum(done) + ' processed…';
+                }
+            },
+            close: function () {
+                panel.remove();
+            }
+        };
+    }
+
+    /**
+     * Resolve a fetch Response to its JSON result. A 202 job response is polled until
+     * the job finishes and resolves to the job's result, or to { error } when it
+     * failed or was cancelled, so callers handle both paths the same way.
+     */
+    function follow(response, opts) {
+        if (response.status !== 202) return response.json();
+        var title = (opts && opts.title) || 'Working…';
+        return response.json().then(function (queued) {
+            if (!queued || !queued.status_url) return queued;
+            return new Promise(function (resolve, reject) {
+                var panel = createPanel(title, function () {
+                    fetch(queued.cancel_url, { method: 'POST' }).catch(function () {});
+                });
+
+                function finish(value) {
+                    panel.close();
+                    resolve(value);
+                }
+
+                function poll() {
+                    fetch(queued.status_url)
+                        .then(function (r) { return r.json(); })
+                        .then(function (job) {
+                            if (job.error && !job.status) {
+                                finish({ error: job.error });
+                            } else if (job.status === 'succeeded') {
+                                finish(job.result || { success: true });
+                            } else if (job.status === 'failed') {
+                                finish({ error: job.error || 'The job failed.' });
+                            } else if (job.status === 'cancelled') {
+                                finish({
+                                    error: 'Cancelled. Work finished before the cancel is kept; reload to see the current state.',
+                                    cancelled: true
+                                });
+                            } else {
+                                panel.update(job);
+                                setTimeout(poll, POLL_INTERVAL_MS);
+                            }
+                        })
+                        .catch(function (err) {
+                            panel.close();
+                            reject(err);
+                        });
+                }
+
+                poll();
+            });
+        });
+    }
+
+    global.AppJobs = {
+        follow: follow,
+        wantsBackground: wantsBackground
+    };
+})(window);
@@ -1,4 +1,3 @@
-<script>
 /**
  * ASSET TRACKING SYSTEM - MAIN JAVASCRIPT
  * ========================================
@@ -1823,6 +1822,27 @@ function appDeleteConfirm(message, title) {
         });
     })();
 
+    // .csv/.xlsx imports are uploaded as-is and parsed on the server in batches;
+    // legacy .xls files are still parsed in the browser.
+    function isServerParsedImportFile(file) {
+        return /\.(csv|xlsx|xlsm)$/i.test((file && file.name) || '');
+    }
+
+    function postImport(url, rows, file, dryRun) {
+        if (file) {
+            const formData = new FormData();
+            formData.append('file', file);
+            if (dryRun) formData.append('dry_run', '1');
+            else if (AppJobs.wantsBackground(0, file)) formData.append('background', '1');
+            return fetch(url + '/upload', { method: 'POST', body: formData });
+        }
+        return fetch(url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(dryRun ? { rows: rows, dry_run: true } : { rows: rows })
+        });
+    }
+
     // Handle importing branches & brands from an Excel file
     (function bindBranchImport() {
         const importBtn = document.getElementById('importBranchesBtn');
@@ -1889,12 +1909,12 @@ function appDeleteConfirm(message, title) {
             return rows;
         }
 
-        function sendImport(rows) {
+        function applyImport(planId) {
             importBtn.disabled = true;
-            fetch('/admin/import-branches', {
+            fetch('/admin/import-branches/apply', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ rows: rows })
+                body: JSON.stringify({ plan_id: planId })
             })
             .then(function (r) { return r.json(); })
             .then(function (data) {
@@ -1929,11 +1949,44 @@ function appDeleteConfirm(message, title) {
             .finally(function () { importBtn.disabled = false; });
         }
 
+        // Dry run first: nothing is written until the previewed plan is confirmed.
+        // rows is null when the file is uploaded and parsed on the server.
+        function confirmImport(rows, file) {
+            importBtn.disabled = true;
+            postImport('/admin/import-branches', rows, rows ? null : file, true)
+            .then(function (r) { return r.json(); })
+            .then(function (preview) {
+                if (!preview || preview.error) {
+                    alert((preview && preview.error) || 'Import failed.');
+                    return;
+                }
+                const changes = preview.changes || {};
+                const lines = [
+                    'Brands to add: ' + (changes.brands || 0),
+                    'Branches to add: ' + (changes.branches || 0) + (preview.branches_skipped ? ' (' + preview.branches_skipped + ' already exist)' : ''),
+                    'Existing branches to fill in (brand / code): ' + (changes.backfills || 0),
+                    'Branch managers to add: ' + (changes.managers || 0) + (preview.employees_skipped ? ' (' + preview.employees_skipped + ' already exist)' : '')
+                ];
+                const message = 'Preview of "' + file.name + '":\n\n' + lines.join('\n') + '\n\nExisting entries are kept.';
+                const doIt = function () { applyImport(preview.plan_id); };
+                if (window.AppDialogs && AppDialogs.confirm) {
+                    AppDialogs.confirm({
+                        title: 'Import branches & brands',
+                        message: message,
+                        confirmText: 'Import'
+                    }).then(function (ok) { if (ok) doIt(); });
+                } else if (confirm(message)) {
+                    doIt();
+                }
+            })
+            .catch(function (err) {
+                console.error('Import preview error:', err);
+                alert('Import failed. Please try again.');
+            })
+            .finally(function () { importBtn.disabled = false; });
+        }
+
         importBtn.addEventListener('click', function () {
-            if (typeof XLSX === 'undefined') {
-                alert('The spreadsheet library did not load. Please refresh the page and try again.');
-                return;
-            }
             fileInput.value = '';
             fileInput.click();
         });
@@ -1941,6 +1994,14 @@ function appDeleteConfirm(message, title) {
         fileInput.addEventListener('change', function () {
             const file = fileInput.files && fileInput.files[0];
             if (!file) return;
+            if (isServerParsedImportFile(file)) {
+                confirmImport(null, file);
+                return;
+            }
+            if (typeof XLSX === 'undefined') {
+                alert('The spreadsheet library did not load. Please refresh the page and try again.');
+                return;
+            }
             const reader = new FileReader();
             reader.onload = function (e) {
                 let rows;
@@ -1956,16 +2017,7 @@ function appDeleteConfirm(message, title) {
                     alert('No branch rows were found in the file. Make sure it has "Code", "Type", and "Brand" columns with Type = "Branch".');
                     return;
                 }
-                const doIt = function () { sendImport(rows); };
-                if (window.AppDialogs && AppDialogs.confirm) {
-                    AppDialogs.confirm({
-                        title: 'Import branches & brands',
-                        message: 'Found ' + rows.length + ' branch row(s) in "' + file.name + '".\n\nThis will create any new brands, branches, and branch managers. Existing entries are kept.',
-                        confirmText: 'Import'
-                    }).then(function (ok) { if (ok) doIt(); });
-                } else if (confirm('Import ' + rows.length + ' branch row(s)?')) {
-                    doIt();
-                }
+                confirmImport(rows, file);
             };
             reader.readAsArrayBuffer(file);
         });
@@ -2073,14 +2125,10 @@ function appDeleteConfirm(message, title) {
             return rows;
         }
 
-        function sendImport(rows) {
+        function sendImport(rows, file) {
             importBtn.disabled = true;
-            fetch('/admin/import-office-employees', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ rows: rows })
-            })
-            .then(function (r) { return r.json(); })
+            postImport('/admin/import-office-employees', rows, file)
+            .then(function (r) { return AppJobs.follow(r, { title: 'Importing employees' }); })
             .then(function (data) {
                 if (!data || data.error) {
                     alert((data && data.error) || 'Import failed.');
@@ -2117,11 +2165,24 @@ function appDeleteConfirm(message, title) {
             .finally(function () { importBtn.disabled = false; });
         }
 
-        importBtn.addEventListener('click', function () {
-            if (typeof XLSX === 'undefined') {
-                alert('The spreadsheet library did not load. Please refresh the page and try again.');
-                return;
+        // rows is null when the file is uploaded and parsed on the server.
+        function confirmImport(rows, file) {
+            const found = rows
+                ? 'Found ' + rows.length + ' importable employee row(s) in "' + file.name + '".'
+                : 'Import employees from "' + file.name + '"?';
+            const doIt = function () { sendImport(rows, rows ? null : file); };
+            if (window.AppDialogs && AppDialogs.confirm) {
+                AppDialogs.confirm({
+                    title: 'Import employees',
+                    message: found + '\n\nOnly fields used by the system are imported. Extra columns are ignored, existing employees are skipped, and blank cells stay blank.',
+                    confirmText: 'Import'
+                }).then(function (ok) { if (ok) doIt(); });
+            } else if (confirm(rows ? 'Import ' + rows.length + ' employee row(s)?' : 'Import "' + file.name + '"?')) {
+                doIt();
             }
+        }
+
+        importBtn.addEventListener('click', function () {
             fileInput.value = '';
             fileInput.click();
         });
@@ -2129,6 +2190,14 @@ function appDeleteConfirm(message, title) {
         fileInput.addEventListener('change', function () {
             const file = fileInput.files && fileInput.files[0];
             if (!file) return;
+            if (isServerParsedImportFile(file)) {
+                confirmImport(null, file);
+                return;
+            }
+            if (typeof XLSX === 'undefined') {
+                alert('The spreadsheet library did not load. Please refresh the page and try again.');
+                return;
+            }
             const reader = new FileReader();
             reader.onload = function (e) {
                 let rows;
@@ -2144,16 +2213,7 @@ function appDeleteConfirm(message, title) {
                     alert('No importable employee rows were found. The importer only uses Employee ID, Name, Department, Email, and Mobile, and ignores extra/location-only rows.');
                     return;
                 }
-                const doIt = function () { sendImport(rows); };
-                if (window.AppDialogs && AppDialogs.confirm) {
-                    AppDialogs.confirm({
-                        title: 'Import employees',
-                        message: 'Found ' + rows.length + ' importable employee row(s) in "' + file.name + '".\n\nOnly fields used by the system are imported. Extra columns are ignored, existing employees are skipped, and blank cells stay blank.',
-                        confirmText: 'Import'
-                    }).then(function (ok) { if (ok) doIt(); });
-                } else if (confirm('Import ' + rows.length + ' employee row(s)?')) {
-                    doIt();
-                }
+                confirmImport(rows, file);
             };
             reader.readAsArrayBuffer(file);
         });
@@ -6490,12 +6550,13 @@ function appDeleteConfirm(message, title) {
             const formData = new FormData();
             selectedAssets.forEach(asset => formData.append('asset_ids[]', asset.id));
             formData.append('archive_reason', archiveReason || 'Assets bulk archived by user');
+            if (AppJobs.wantsBackground(selectedAssets.length)) formData.append('background', '1');
 
             fetch('/assets/bulk_delete', {
                 method: 'POST',
                 body: formData
             })
-            .then(response => response.json())
+            .then(response => AppJobs.follow(response, { title: 'Archiving assets' }))
             .then(data => {
                 if (data.success) {
                     alert(data.message || `Successfully archived ${selectedAssets.length} assets!`);
@@ -6956,5 +7017,3 @@ function appDeleteConfirm(message, title) {
             setEditAssetModalReady();
         });
     }
-
-  </script>
@@ -0,0 +1,159 @@
+"""Set-based moves between ``assets`` and ``archived_assets``."""
+from __future__ import annotations
+
+import uuid
+
+from models.database import ASSET_KIND_BRANCH, ASSET_KIND_SHARED, sql_id_set
+from utils.asset_documents import delete_documents_for_asset_id_set
+
+
+def archive_assets(cur, asset_ids, archived_by, archive_reason):
+    """
+    Move the given active assets into archived_assets.
+
+    One ``INSERT INTO archived_assets ... SELECT`` copies every row and one ``DELETE``
+    removes them, so the Python work stays constant however many ids are selected.
+    Large selections are joined through a TEMP table (see ``sql_id_set``).
+    Returns the number of archived rows. Does not commit; caller owns the transaction.
+    """
+    id_set, params = sql_id_set(cur, asset_ids, temp_table='archive_asset_ids')
+    cur.execute(
+        f'''
+        INSERT INTO archived_assets (
+            original_id, name, price, owner, branch, department, asset_code,
+            qr_random_code, used_status, asset_type, asset_kind, shared_group_id,
+            asset_date, archived_by, archive_reason
+        )
+        SELECT
+            id, name, COALESCE(price, 0.0), owner, branch, department, asset_code,
+            qr_random_code, used_status, asset_type,
+            COALESCE(NULLIF(asset_kind, ''), ?), shared_group_id,
+            asset_date, ?, ?
+        FROM assets
+        WHERE id IN {id_set}
+        ORDER BY id
+        ''',
+        [ASSET_KIND_BRANCH, archived_by, archive_reason] + params,
+    )
+    archived = cur.rowcount
+    if archived <= 0:
+        return 0
+
+    delete_documents_for_asset_id_set(cur, id_set, params)
+    cur.execute(f'DELETE FROM assets WHERE id IN {id_set}', params)
+    return archived
+
+
+def _missing_archived_ids(cur, archived_ids, id_set, params):
+    """Requested ids (as given) that have no archived_assets row."""
+    cur.execute(f'SELECT id FROM archived_assets WHERE id IN {id_set}', params)
+    found = {row[0] for row in cur.fetchall()}
+    missing = []
+    for raw_id in archived_ids or []:
+        try:
+            if int(raw_id) in found:
+                continue
+        except (TypeError, ValueError):
+            pass
+        missing.append(raw_id)
+    return missing
+
+
+# Restore key: asset_code for branch assets; shared siblings share one SHR code across
+# branches, so for them the key is (asset_code, branch).
+_RESTORE_KEY_MATCH_SQL = (
+    'x.asset_code = a.asset_code '
+    'AND (COALESCE(NULLIF(a.asset_kind, \'\'), ?) != ? OR x.branch IS a.branch)'
+)
+_RESTORE_KEY_PARTITION_SQL = (
+    'a.asset_code, CASE WHEN COALESCE(NULLIF(a.asset_kind, \'\'), ?) = ? THEN a.branch END'
+)
+
+
+def restore_archived_assets(cur, archived_ids):
+    """
+    Move archived rows back into assets.
+
+    The selection is staged once, then a single join against ``assets.asset_code``
+    decides which rows collide with an active asset. Colliding rows refresh that asset
+    with ``UPDATE ... FROM``; the rest come back with one ``INSERT ... SELECT``. When the
+    selection itself holds several rows for the same key, the most recently archived
+    one wins (one ``ROW_NUMBER()`` pass over the selection). Returns
+    ``(restored_count, missing_ids)``; does not commit.
+    """
+    id_set, params = sql_id_set(cur, archived_ids, temp_table='restore_archived_ids')
+    missing = _missing_archived_ids(cur, archived_ids, id_set, params)
+    key_params = [ASSET_KIND_BRANCH, ASSET_KIND_SHARED]
+
+    cur.execute(
+        'CREATE TEMP TABLE IF NOT EXISTS restore_plan '
+        '(archived_id INTEGER PRIMARY KEY, target_id INTEGER)'
+    )
+    cur.execute('DELETE FROM restore_plan')
+    # Rows without an asset_code never collide, so each of them is its own winner.
+    cur.execute(
+        f'''
+        INSERT INTO restore_plan (archived_id, target_id)
+        SELECT a.id, MIN(x.id)
+        FROM (
+            SELECT
+                a.id,
+                a.asset_code IS NULL OR ROW_NUMBER() OVER (
+                    PARTITION BY {_RESTORE_KEY_PARTITION_SQL} ORDER BY a.id DESC
+                ) = 1 AS newest
+            FROM archived_assets a
+            WHERE a.id IN {id_set}
+        ) s
+        JOIN archived_assets a ON a.id = s.id
+        LEFT JOIN assets x ON {_RESTORE_KEY_MATCH_SQL}
+        WHERE s.newest
+        GROUP BY a.id
+        ''',
+        key_params + params + key_params,
+    )
+
+    cur.execute(
+        '''
+        UPDATE assets SET
+            used_status = a.used_status,
+            asset_type = a.asset_type,
+            asset_kind = COALESCE(NULLIF(a.asset_kind, ''), ?),
+            shared_group_id = a.shared_group_id,
+            price = COALESCE(a.price, 0.0)
+        FROM restore_plan p
+        JOIN archived_assets a ON a.id = p.archived_id
+        WHERE p.target_id IS NOT NULL AND assets.id = p.target_id
+        ''',
+        (ASSET_KIND_BRANCH,),
+    )
+
+    cur.connection.create_function('new_qr_random_code', 0, lambda: str(uuid.uuid4()))
+    cur.execute(
+        '''
+        INSERT INTO assets (
+            name, price, owner, branch, department, asset_code, qr_random_code,
+            used_status, asset_type, asset_kind, shared_group_id, asset_date
+        )
+        SELECT
+            a.name, COALESCE(a.price, 0.0), a.owner, a.branch, a.department, a.asset_code,
+            COALESCE(NULLIF(a.qr_random_code, ''), new_qr_random_code()),
+            a.used_status, a.asset_type, COALESCE(NULLIF(a.asset_kind, ''), ?),
+            a.shared_group_id, a.asset_date
+        FROM restore_plan p
+        JOIN archived_assets a ON a.id = p.archived_id
+        WHERE p.target_id IS NULL
+        ORDER BY a.id
+        ''',
+        (ASSET_KIND_BRANCH,),
+    )
+
+    cur.execute(f'DELETE FROM archived_assets WHERE id IN {id_set}', params)
+    return max(cur.rowcount, 0), missing
+
+
+def permanent_delete_archived_assets(cur, archived_ids):
+    """Delete archived rows in one statement. Returns ``(deleted_count, missing_ids)``; does not commit."""
+    id_set, params = sql_id_set(cur, archived_ids, temp_table='purge_archived_ids')
+    missing = _missing_archived_ids(cur, archived_ids, id_set, params)
+    cur.execute(f'DELETE FROM archived_assets WHERE id IN {id_set}', params)
+    return max(cur.rowcount, 0), missing
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import os
+import shutil
 import uuid
 from pathlib import Path
 
@@ -21,6 +22,13 @@ def get_documents_root():
     return root
 
 
+def get_documents_staging_root():
+    """Uploads saved before their asset rows exist; same filesystem as the documents."""
+    root = get_documents_root() / '.staging'
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
 def allowed_document_filename(filename):
     if not filename or '.' not in filename:
         return False
@@ -118,10 +126,10 @@ def list_documents_grouped_by_asset_ids(cur, asset_ids):
     return grouped
 
 
-def save_uploaded_file_for_asset(cur, asset_id, file_storage):
+def _upload_details(file_storage):
     """
-    Persist one uploaded file for an asset.
-    Returns (doc_dict, None) on success, (None, None) if empty, or (None, error) on failure.
+    Check one upload. Returns ``(details, None)``, ``(None, None)`` if empty, or
+    ``(None, error)``; details hold the original name, size, content type and extension.
     """
     if not file_storage or not getattr(file_storage, 'filename', None):
         return None, None
@@ -141,10 +149,26 @@ def save_uploaded_file_for_asset(cur, asset_id, file_storage):
     ext = ''
     if '.' in safe_base:
         ext = '.' + safe_base.rsplit('.', 1)[-1].lower()
-    stored = f'{asset_id}_{uuid.uuid4().hex}{ext}'
+    return {
+        'original_filename': original,
+        'file_size': size,
+        'content_type': getattr(file_storage, 'content_type', None) or 'application/octet-stream',
+        'ext': ext,
+    }, None
+
+
+def save_uploaded_file_for_asset(cur, asset_id, file_storage):
+    """
+    Persist one uploaded file for an asset.
+    Returns (doc_dict, None) on success, (None, None) if empty, or (None, error) on failure.
+    """
+    details, err = _upload_details(file_storage)
+    if not details:
+        return None, err
+    original, size, content_type = details['original_filename'], details['file_size'], details['content_type']
+    stored = f'{asset_id}_{uuid.uuid4().hex}{details["ext"]}'
     dest = document_path(stored)
     file_storage.save(str(dest))
-    content_type = getattr(file_storage, 'content_type', None) or 'application/octet-stream'
 
     cur.execute(
         '''
@@ -223,6 +247,76 @@ def save_uploaded_files_for_assets(cur, asset_ids, file_storages):
     return saved, None
 
 
+def stage_uploaded_files(file_storages):
+    """
+    Check and save uploads to the staging folder ahead of a write unit, so the writer
+    thread never does file I/O. Returns ``(staged, error_message)``; on error nothing
+    stays staged.
+    """
+    files = [
+        f for f in (file_storages or [])
+        if f and getattr(f, 'filename', None) and str(f.filename).strip()
+    ]
+    if len(files) > MAX_DOCUMENTS_PER_UPLOAD:
+        return [], f'You can upload at most {MAX_DOCUMENTS_PER_UPLOAD} files at once.'
+    staged = []
+    for file_storage in files:
+        details, err = _upload_details(file_storage)
+        if err:
+            discard_staged_documents(staged)
+            return [], err
+        if not details:
+            continue
+        path = get_documents_staging_root() / f'{uuid.uuid4().hex}{details["ext"]}'
+        file_storage.save(str(path))
+        staged.append(dict(details, path=str(path)))
+    return staged, None
+
+
+def attach_staged_documents(cur, asset_ids, staged, placed):
+    """
+    Give every asset each staged file: hard-link it under a new stored name (a copy
+    only if linking is not possible) and insert its row. The bytes were written when
+    staging, so this is cheap inside a write unit. Stored names are appended to
+    ``placed`` as they are linked; if the unit is rolled back the caller removes them
+    with ``remove_placed_documents``. Returns an error message, or None.
+    """
+    for doc in staged:
+        for asset_id in asset_ids:
+            stored = f'{asset_id}_{uuid.uuid4().hex}{doc["ext"]}'
+            dest = document_path(stored)
+            try:
+                try:
+                    os.link(doc['path'], dest)
+                except OSError:
+                    shutil.copyfile(doc['path'], dest)
+            except OSError as exc:
+                return f'Failed to save document: {exc}'
+            placed.append(stored)
+            cur.execute(
+                '''
+                INSERT INTO asset_documents
+                    (asset_id, original_filename, stored_filename, content_type, file_size)
+                VALUES (?, ?, ?, ?, ?)
+                ''',
+                (asset_id, doc['original_filename'], stored, doc['content_type'], doc['file_size']),
+            )
+    return None
+
+
+def remove_placed_documents(placed):
+    for stored in placed:
+        delete_document_file(stored)
+
+
+def discard_staged_documents(staged):
+    for doc in staged:
+        try:
+            os.remove(doc['path'])
+        except OSError:
+            pass
+
+
 def delete_document_record(cur, asset_id, document_id):
     cur.execute(
         'SELECT id, stored_filename FROM asset_documents WHERE id = ? AND asset_id = ?',
@@ -241,13 +335,18 @@ def delete_all_documents_for_assets(cur, asset_ids):
     if not asset_ids:
         return
     placeholders = ','.join(['?'] * len(asset_ids))
+    delete_documents_for_asset_id_set(cur, f'({placeholders})', list(asset_ids))
+
+
+def delete_documents_for_asset_id_set(cur, id_set_sql, params):
+    """Delete documents whose asset_id is ``IN {id_set_sql}`` (inline list or staged TEMP table)."""
     cur.execute(
-        f'SELECT stored_filename FROM asset_documents WHERE asset_id IN ({placeholders})',
-        list(asset_ids),
+        f'SELECT stored_filename FROM asset_documents WHERE asset_id IN {id_set_sql}',
+        list(params),
     )
     for row in cur.fetchall():
         delete_document_file(row[0])
     cur.execute(
-        f'DELETE FROM asset_documents WHERE asset_id IN ({placeholders})',
-        list(asset_ids),
+        f'DELETE FROM asset_documents WHERE asset_id IN {id_set_sql}',
+        list(params),
     )
@@ -0,0 +1,174 @@
+"""Helpers for compressing responses (gzip, and brotli when it is installed).
+
+``init_compression`` adds an ``after_request`` hook that compresses text responses
+(HTML pages and live-search partials, JSON, CSS/JS, CSV, SVG) of at least
+``COMPRESS_MIN_SIZE`` bytes for clients that accept it. Streamed responses are
+compressed chunk by chunk and flushed as they go, so progress still reaches the
+client. Files under ``static/`` are sent from a precompressed ``.br`` / ``.gz``
+sibling when one is at least as new as the file (``scripts/compress_static.py``
+writes them) and compressed on the fly otherwise.
+"""
+from __future__ import annotations
+
+import gzip
+import os
+import zlib
+
+from flask import current_app, request
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+DEFAULT_COMPRESS_MIN_SIZE = 500
+DEFAULT_COMPRESS_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 5
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/x-ndjson',
+    'application/xml',
+    'image/svg+xml',
+})
+PRECOMPRESSED_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+STATIC_ENDPOINTS = ('static', 'static_versioned')
+
+
+def available_encodings():
+    return ('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',)
+
+
+def compress_bytes(data, encoding, level=DEFAULT_COMPRESS_LEVEL, quality=DEFAULT_BROTLI_QUALITY):
+    if encoding == 'br':
+        return brotli.compress(data, quality=quality)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _stream_compressor(chunks, encoding, level, quality):
+    """Compress an iterable of byte chunks, flushing after each one."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=quality)
+        for chunk in chunks:
+            out = compressor.process(chunk) + compressor.flush()
+            if out:
+                yield out
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        out = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def _static_source_path(app):
+    filename = (request.view_args or {}).get('filename')
+    if not filename or not app.static_folder:
+        return None
+    if request.endpoint == 'static_versioned':
+        from utils.static_assets import split_fingerprint
+
+        filename, _ = split_fingerprint(filename)
+        if filename is None:
+            return None
+    return safe_join(app.static_folder, filename)
+
+
+def _precompressed_path(source, encoding):
+    """The ``.br`` / ``.gz`` sibling of ``source`` if it exists and is not stale."""
+    candidate = source + PRECOMPRESSED_SUFFIXES[encoding]
+    try:
+        if os.stat(candidate).st_mtime >= os.stat(source).st_mtime:
+            return candidate
+    except OSError:
+        pass
+    return None
+
+
+def _weaken_etag(response):
+    # Same entity, different bytes: a strong validator must not be shared.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def init_compression(app):
+    """Compress responses; off with ``COMPRESS = False``.
+
+    Call before other hooks that read or rewrite the body: ``after_request``
+    functions run in reverse order, so this one then sees the final response.
+    """
+    if not app.config.get('COMPRESS', True):
+        return
+    min_size = int(app.config.get('COMPRESS_MIN_SIZE', DEFAULT_COMPRESS_MIN_SIZE))
+    level = int(app.config.get('COMPRESS_LEVEL', DEFAULT_COMPRESS_LEVEL))
+    quality = int(app.config.get('COMPRESS_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY))
+    mimetypes = frozenset(app.config.get('COMPRESS_MIMETYPES', COMPRESSIBLE_MIMETYPES))
+    precompressed = app.config.get('COMPRESS_PRECOMPRESSED_STATIC', True)
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in mimetypes:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (
+            response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or request.method == 'HEAD'
+        ):
+            return response
+        encoding = request.accept_encodings.best_match(available_encodings())
+        if encoding is None:
+            return response
+        length = response.content_length
+        if length is not None and length < min_size:
+            return response
+
+        if request.endpoint in STATIC_ENDPOINTS and response.direct_passthrough:
+            source = _static_source_path(current_app)
+            if source is None:
+                return response
+            packed = _precompressed_path(source, encoding) if precompressed else None
+            if packed is None and encoding == 'br' and precompressed and request.accept_encodings['gzip']:
+                packed = _precompressed_path(source, 'gzip')
+                if packed is not None:
+                    encoding = 'gzip'
+            if packed is not None:
+                response.close()
+                response.response = wrap_file(request.environ, open(packed, 'rb'))
+                response.content_length = os.path.getsize(packed)
+            else:
+                with open(source, 'rb') as f:
+                    data = f.read()
+                response.close()
+                response.direct_passthrough = False
+                response.set_data(compress_bytes(data, encoding, level, quality))
+            response.headers['Content-Encoding'] = encoding
+            _weaken_etag(response)
+            return response
+
+        if response.is_streamed:
+            response.response = _stream_compressor(response.iter_encoded(), encoding, level, quality)
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+            response.headers['Content-Encoding'] = encoding
+            _weaken_etag(response)
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(compress_bytes(data, encoding, level, quality))
+        response.headers['Content-Encoding'] = encoding
+        _weaken_etag(response)
+        return response
@@ -0,0 +1,83 @@
+"""Helpers for conditional GET (weak ETag / 304) keyed on table data versions.
+
+``@etag_from_data_versions(tables)`` reads the tables' write counters (bumped by
+triggers, see ``DATA_VERSION_TABLES``) before the view runs. If the client already
+holds the matching ETag the view is skipped and a bodiless 304 is returned; otherwise
+the view's 200 response is tagged. The ETag also covers the URL, the user (pages
+differ by role) and the deployed code, so a deploy or another login never gets a
+stale 304. Versions are read before the view's own queries, so a write that lands
+in between only costs one extra full response, never a stale one.
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+
+from flask import Response, current_app, request
+from flask_login import current_user
+
+from models.database import get_data_versions, get_db_connection
+
+CODE_FINGERPRINT_DIRS = ('templates', 'routes', 'utils', 'models')
+
+_code_fingerprint = None
+
+
+def code_fingerprint():
+    """Hash of the deployed templates and code (same in every worker of a deploy)."""
+    global _code_fingerprint
+    if _code_fingerprint is None:
+        digest = hashlib.sha1()
+        root = current_app.root_path
+        for folder in CODE_FINGERPRINT_DIRS:
+            for dirpath, dirnames, filenames in os.walk(os.path.join(root, folder)):
+                dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+                for name in sorted(filenames):
+                    stat = os.stat(os.path.join(dirpath, name))
+                    digest.update(f'{dirpath}/{name}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+        _code_fingerprint = digest.hexdigest()[:12]
+    return _code_fingerprint
+
+
+def data_version_etag(cur, tables):
+    """Weak-ETag value for the current request given ``tables``' data versions."""
+    versions = get_data_versions(cur, tables)
+    user = f'{current_user.get_id()}:{current_user.role}' if current_user.is_authenticated else '-'
+    key = '|'.join((
+        code_fingerprint(),
+        request.full_path,
+        str(user),
+        ','.join(f'{table}={versions[table]}' for table in sorted(versions)),
+    ))
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def etag_from_data_versions(tables, when=None):
+    """Decorate a GET view whose output depends only on ``tables`` (and the user / URL).
+
+    ``when`` limits it to some requests, e.g. ``lambda: request.args.get('partial') == '1'``.
+    """
+    tables = tuple(tables)
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or (when is not None and not when()):
+                return view(*args, **kwargs)
+            conn = get_db_connection()
+            try:
+                etag = data_version_etag(conn.cursor(), tables)
+            finally:
+                conn.close()
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
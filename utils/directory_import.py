@@ -0,0 +1,754 @@
+"""Helpers for importing branches and employees from spreadsheet rows.
+
+``BranchImporter`` / ``EmployeeImporter`` hold the row rules used by both the JSON
+import endpoints and the raw-file upload endpoints; rows can be fed in any number
+of batches. ``iter_branch_import_rows`` / ``iter_employee_import_rows`` map sheet
+rows to import dicts with the same header detection as the dashboard importer.
+"""
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import string
+import uuid
+
+from models.database import RESTAURANT_DEFAULT_DEPARTMENT_NAME, get_data_versions
+
+IMPORT_BATCH_SIZE = 500
+# Header rows are looked for in the first rows of each sheet only.
+HEADER_SCAN_ROWS = 200
+
+_LOCATION_DEPARTMENTS = ('muscat', 'al batinah', 'al dakhilia', 'al sharqiah', 'al dhahira', 'office')
+
+
+def batched(rows, size=IMPORT_BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Tables a directory import reads; a stored plan only applies while they are unchanged.
+DIRECTORY_TABLES = ('brands', 'branches', 'departments', 'users')
+IMPORT_PLAN_TTL_HOURS = 24
+
+
+def _empty_branch_plan():
+    return {'brands': [], 'branches': [], 'backfills': [], 'departments': [], 'managers': []}
+
+
+class BranchImporter:
+    """
+    Brands, restaurant branches and their managers; existing rows are kept (matched by name).
+
+    Rows are first turned into a change plan against an in-memory snapshot of brands,
+    branches, default departments and managers (``plan_rows``), then the plan is written
+    with one ``executemany`` per kind of change (``apply_branch_plan``). ``import_rows``
+    does both; a dry run only plans.
+    """
+
+    def __init__(self, cur):
+        self.cur = cur
+        self.rows_seen = 0
+        self.summary = {
+            'brands_created': 0,
+            'branches_created': 0,
+            'branches_skipped': 0,
+            'employees_created': 0,
+            'employees_skipped': 0,
+            'errors': [],
+        }
+        self.plan = _empty_branch_plan()
+        self.base_versions = None
+        self._loaded = False
+        self._brand_cache = {}
+        self._brands = set()
+        self._branches = {}
+        self._has_default_department = set()
+        self._managers = set()
+
+    def _load(self):
+        """Read the snapshot (and the data versions it corresponds to) in one read transaction."""
+        cur = self.cur
+        owns_transaction = not cur.connection.in_transaction
+        if owns_transaction:
+            cur.execute('BEGIN')
+        try:
+            self.base_versions = get_data_versions(cur, DIRECTORY_TABLES)
+            cur.execute('SELECT name FROM brands')
+            self._brands = {row[0] for row in cur.fetchall()}
+            cur.execute('SELECT id, name, brand_id, branch_code FROM branches')
+            for branch_id, name, brand_id, code in cur.fetchall():
+                self._branches[name] = {'id': branch_id, 'brand': brand_id, 'code': code}
+            cur.execute(
+                '''
+                SELECT b.name, d.id
+                FROM departments d
+                JOIN branches b ON d.branch_id = b.id
+                WHERE d.name = ?
+                ORDER BY d.id
+                ''',
+                (RESTAURANT_DEFAULT_DEPARTMENT_NAME,),
+            )
+            default_departments = {}
+            for branch_name, dep_id in cur.fetchall():
+                default_departments.setdefault(branch_name, dep_id)
+            self._has_default_department = set(default_departments)
+            cur.execute('SELECT name, department_id FROM users WHERE department_id IS NOT NULL')
+            by_department = {dep_id: branch_name for branch_name, dep_id in default_departments.items()}
+            self._managers = {
+                (name, by_department[dep_id])
+                for name, dep_id in cur.fetchall()
+                if dep_id in by_department
+            }
+        finally:
+            if owns_transaction:
+                cur.execute('COMMIT')
+        self._loaded = True
+
+    def _brand_ref(self, brand_name, plan):
+        key = brand_name.lower()
+        if key in self._brand_cache:
+            return self._brand_cache[key]
+        if brand_name not in self._brands:
+            self._brands.add(brand_name)
+            plan['brands'].append(brand_name)
+            self.summary['brands_created'] += 1
+        self._brand_cache[key] = brand_name
+        return brand_name
+
+    def plan_rows(self, rows):
+        """Add ``rows`` to ``self.plan`` and return the changes for just these rows."""
+        if not self._loaded:
+            self._load()
+        summary = self.summary
+        plan = _empty_branch_plan()
+        for row in rows:
+            self.rows_seen += 1
+            if not isinstance(row, dict):
+                continue
+            name = (row.get('name') or '').strip()
+            if not name:
+                continue
+            code = ((row.get('code') or '').strip().upper()) or None
+            brand_name = (row.get('brand') or '').strip()
+            manager = (row.get('manager') or '').strip()
+            email = (row.get('email') or '').strip()
+
+            brand = self._brand_ref(brand_name, plan) if brand_name else None
+            existing = self._branches.get(name)
+            if existing:
+                summary['branches_skipped'] += 1
+                backfill = {}
+                if brand and not existing['brand']:
+                    backfill['brand'] = existing['brand'] = brand
+                if code and not existing['code']:
+                    backfill['code'] = existing['code'] = code
+                if backfill:
+                    plan['backfills'].append(dict(backfill, branch=name))
+            else:
+                self._branches[name] = {'id': None, 'brand': brand, 'code': code}
+                plan['branches'].append({'name': name, 'brand': brand, 'code': code})
+                summary['branches_created'] += 1
+
+            if name not in self._has_default_department:
+                self._has_default_department.add(name)
+                plan['departments'].append(name)
+
+            if manager:
+                if (manager, name) in self._managers:
+                    summary['employees_skipped'] += 1
+                else:
+                    self._managers.add((manager, name))
+                    plan['managers'].append({'branch': name, 'name': manager, 'email': email or None})
+                    summary['employees_created'] += 1
+
+        for key, changes in plan.items():
+            self.plan[key].extend(changes)
+        return plan
+
+    def _snapshot(self):
+        """Copy of the in-memory state a batch changes, for ``_restore`` if it fails."""
+        return {
+            'rows_seen': self.rows_seen,
+            'counts': {key: value for key, value in self.summary.items() if key != 'errors'},
+            'plan': {key: len(changes) for key, changes in self.plan.items()},
+            'brand_cache': dict(self._brand_cache),
+            'brands': set(self._brands),
+            'branches': {name: dict(branch) for name, branch in self._branches.items()},
+            'has_default_department': set(self._has_default_department),
+            'managers': set(self._managers),
+        }
+
+    def _restore(self, snapshot):
+        self.rows_seen = snapshot['rows_seen']
+        self.summary.update(snapshot['counts'])
+        for key, length in snapshot['plan'].items():
+            del self.plan[key][length:]
+        self._brand_cache = snapshot['brand_cache']
+        self._brands = snapshot['brands']
+        self._branches = snapshot['branches']
+        self._has_default_department = snapshot['has_default_department']
+        self._managers = snapshot['managers']
+
+    def _apply(self, plan):
+        """Write ``plan`` under a savepoint; returns the error, or None when it was written."""
+        cur = self.cur
+        if not cur.connection.in_transaction:
+            cur.execute('BEGIN')
+        cur.execute('SAVEPOINT branch_import')
+        try:
+            apply_branch_plan(cur, plan)
+            cur.execute('RELEASE branch_import')
+            return None
+        except sqlite3.Error as e:
+            cur.execute('ROLLBACK TO branch_import')
+            cur.execute('RELEASE branch_import')
+            return e
+
+    def import_rows(self, rows):
+        if not self._loaded:
+            self._load()
+        rows = list(rows)
+        snapshot = self._snapshot()
+        if self._apply(self.plan_rows(rows)) is None:
+            return
+        # Undo the failed batch's bookkeeping, then write it one row at a time so
+        # only the offending rows are lost and each error names its row.
+        self._restore(snapshot)
+        for row in rows:
+            snapshot = self._snapshot()
+            error = self._apply(self.plan_rows([row]))
+            if error is None:
+                continue
+            self._restore(snapshot)
+            self.rows_seen += 1
+            name = (row.get('name') or '').strip()
+            self.summary['errors'].append(f'Row {self.rows_seen} ("{name}"): {str(error)}')
+
+
+def apply_branch_plan(cur, plan):
+    """Write a branch import plan: one statement batch per kind of change. Caller commits."""
+    cur.executemany('INSERT INTO brands (name) VALUES (?)', [(name,) for name in plan['brands']])
+    cur.execute('SELECT name, id FROM brands')
+    brand_ids = dict(cur.fetchall())
+
+    def brand_id(ref):
+        return brand_ids.get(ref) if isinstance(ref, str) else ref
+
+    cur.executemany(
+        'INSERT INTO branches (name, brand_id, branch_code) VALUES (?, ?, ?)',
+        [(b['name'], brand_id(b['brand']), b['code']) for b in plan['branches']],
+    )
+    cur.execute('SELECT name, id FROM branches')
+    branch_ids = dict(cur.fetchall())
+
+    cur.executemany(
+        'UPDATE branches SET brand_id = ? WHERE id = ?',
+        [(brand_id(b['brand']), branch_ids[b['branch']]) for b in plan['backfills'] if b.get('brand')],
+    )
+    cur.executemany(
+        'UPDATE branches SET branch_code = ? WHERE id = ?',
+        [(b['code'], branch_ids[b['branch']]) for b in plan['backfills'] if b.get('code')],
+    )
+    cur.executemany(
+        'INSERT INTO departments (name, branch_id) VALUES (?, ?)',
+        [(RESTAURANT_DEFAULT_DEPARTMENT_NAME, branch_ids[name]) for name in plan['departments']],
+    )
+    if plan['managers']:
+        cur.execute(
+            '''
+            SELECT b.name, MIN(d.id)
+            FROM departments d
+            JOIN branches b ON d.branch_id = b.id
+            WHERE d.name = ?
+            GROUP BY b.id
+            ''',
+            (RESTAURANT_DEFAULT_DEPARTMENT_NAME,),
+        )
+        department_ids = dict(cur.fetchall())
+        cur.executemany(
+            'INSERT INTO users (name, employee_id, mobile, email, department_id) VALUES (?, NULL, NULL, ?, ?)',
+            [(m['name'], m['email'], department_ids[m['branch']]) for m in plan['managers']],
+        )
+
+
+def save_import_plan(cur, kind, plan, base_versions, created_by=None):
+    """Store a previewed plan and return its id; plans older than a day are dropped."""
+    cur.execute(
+        "DELETE FROM import_plans WHERE created_at < datetime('now', ?)",
+        (f'-{IMPORT_PLAN_TTL_HOURS} hours',),
+    )
+    plan_id = uuid.uuid4().hex
+    cur.execute(
+        'INSERT INTO import_plans (id, kind, plan, base_versions, created_by) VALUES (?, ?, ?, ?, ?)',
+        (plan_id, kind, json.dumps(plan), json.dumps(base_versions), created_by),
+    )
+    return plan_id
+
+
+def load_import_plan(cur, plan_id, kind):
+    """``(plan, base_versions)`` of a stored plan, or None when missing or expired."""
+    cur.execute(
+        f'''
+        SELECT plan, base_versions FROM import_plans
+        WHERE id = ? AND kind = ? AND created_at >= datetime('now', '-{IMPORT_PLAN_TTL_HOURS} hours')
+        ''',
+        (plan_id, kind),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    return json.loads(row[0]), json.loads(row[1])
+
+
+def branch_plan_counts(plan):
+    return {key: len(changes) for key, changes in plan.items()}
+
+
+def _optional_text(value):
+    text = (value or '').strip()
+    return text or None
+
+
+def is_office_department_name(dept_name):
+    value = (dept_name or '').strip().lower()
+    return value not in ('', 'restaurant') + _LOCATION_DEPARTMENTS
+
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+_BACKFILL_COLUMNS = ('employee_id', 'mobile', 'email', 'department_id')
+
+
+def _name_key(value):
+    """Python twin of SQLite's ``LOWER(TRIM(name))`` (spaces only, ASCII-only case folding)."""
+    return (value or '').strip(' ').translate(_ASCII_LOWER)
+
+
+class EmployeeImporter:
+    """
+    Office employees and restaurant managers; existing employees are skipped and backfilled.
+
+    Existing users and departments are loaded once into in-memory indexes (employee id,
+    name + department, name + venue, name), so matching a row costs no queries. Inserts
+    and backfills are queued and written with ``executemany`` at the end of each
+    ``import_rows`` call; rows later in the file see earlier rows' changes through the
+    same indexes.
+    """
+
+    def __init__(self, cur):
+        self.cur = cur
+        self.rows_seen = 0
+        self.summary = {
+            'departments_created': 0,
+            'office_employees_created': 0,
+            'restaurant_employees_created': 0,
+            'employees_created': 0,
+            'employees_skipped': 0,
+            'employees_updated': 0,
+            'errors': [],
+        }
+        self._loaded = False
+        self._dept_cache = {}
+        self._office_departments = {}
+        self._restaurant_departments = {}
+        self._department_branch = {}
+        self._by_employee_id = {}
+        self._by_name_department = {}
+        self._by_name_venue = {}
+        self._by_name = {}
+        self._pending_inserts = []
+        self._pending_updates = {}
+
+    def _load(self):
+        cur = self.cur
+        cur.execute('SELECT id, name, branch_id FROM departments')
+        for dep_id, dep_name, branch_id in cur.fetchall():
+            self._department_branch[dep_id] = branch_id
+            if branch_id is None:
+                self._office_departments.setdefault(dep_name, dep_id)
+        cur.execute(
+            '''
+            SELECT UPPER(COALESCE(b.branch_code, '')), d.id
+            FROM departments d
+            JOIN branches b ON d.branch_id = b.id
+            WHERE d.name = ?
+            ''',
+            (RESTAURANT_DEFAULT_DEPARTMENT_NAME,),
+        )
+        for code, dep_id in cur.fetchall():
+            if code:
+                self._restaurant_departments.setdefault(code, dep_id)
+        cur.execute('SELECT id, name, employee_id, mobile, email, department_id FROM users')
+        for user_id, name, employee_id, mobile, email, department_id in cur.fetchall():
+            self._index({
+                'id': user_id,
+                'name': name,
+                'employee_id': employee_id,
+                'mobile': mobile,
+                'email': email,
+                'department_id': department_id,
+            })
+        self._loaded = True
+
+    def _venue(self, department_id):
+        if department_id is not None and self._department_branch.get(department_id) is not None:
+            return 'restaurant'
+        return 'office'
+
+    def _index_keys(self, record):
+        key = _name_key(record['name'])
+        keys = [
+            (self._by_name, key),
+            (self._by_name_venue, (key, self._venue(record['department_id']))),
+        ]
+        if record['department_id'] is not None:
+            keys.append((self._by_name_department, (key, record['department_id'])))
+        if record['employee_id']:
+            keys.append((self._by_employee_id, record['employee_id']))
+        return keys
+
+    def _index(self, record):
+        for index, key in self._index_keys(record):
+            index.setdefault(key, []).append(record)
+
+    def _unindex(self, record):
+        for index, key in self._index_keys(record):
+            remaining = [r for r in index.get(key, ()) if r is not record]
+            if remaining:
+                index[key] = remaining
+            else:
+                index.pop(key, None)
+
+    def _get_or_create_office_department(self, dept_name):
+        key = dept_name.lower()
+        if key in self._dept_cache:
+            return self._dept_cache[key]
+        found = self._office_departments.get(dept_name)
+        if found:
+            self._dept_cache[key] = found
+            return found
+        self.cur.execute(
+            'INSERT INTO departments (name, branch_id) VALUES (?, NULL)',
+            (dept_name,),
+        )
+        self.summary['departments_created'] += 1
+        dep_id = self.cur.lastrowid
+        self._office_departments[dept_name] = dep_id
+        self._department_branch[dep_id] = None
+        self._dept_cache[key] = dep_id
+        return dep_id
+
+    def _backfill_employee_rows(self, existing_rows, new_values, row_name):
+        changed = False
+        for record in list(existing_rows):
+            updates = {
+                column: value
+                for column, value in new_values.items()
+                if value and not record[column]
+            }
+            if not updates:
+                continue
+            self._unindex(record)
+            record.update(updates)
+            self._index(record)
+            record['row'], record['row_name'] = self.rows_seen, row_name
+            if record['id'] is not None:
+                record.setdefault('dirty', set()).update(updates)
+                self._pending_updates[record['id']] = record
+            changed = True
+        return changed
+
+    def import_rows(self, rows):
+        if not self._loaded:
+            self._load()
+        summary = self.summary
+        for row in rows:
+            self.rows_seen += 1
+            if not isinstance(row, dict):
+                continue
+            name = (row.get('name') or '').strip()
+            if not name:
+                continue
+            department = (row.get('department') or '').strip()
+            employee_id = _optional_text(row.get('employee_id'))
+            mobile = _optional_text(row.get('mobile'))
+            email = _optional_text(row.get('email'))
+            venue = ((row.get('venue') or 'office').strip().lower()) or 'office'
+            branch_code = _optional_text((row.get('branch_code') or '').upper())
+
+            try:
+                dep_id = None
+                if venue == 'restaurant':
+                    dep_id = self._restaurant_departments.get(branch_code) if branch_code else None
+                elif is_office_department_name(department):
+                    dep_id = self._get_or_create_office_department(department)
+            except sqlite3.Error as e:
+                summary['errors'].append(f'Row {self.rows_seen} ("{name}"): {str(e)}')
+                continue
+
+            new_values = {
+                'employee_id': employee_id,
+                'mobile': mobile,
+                'email': email,
+                'department_id': dep_id,
+            }
+            if employee_id and employee_id in self._by_employee_id:
+                if self._backfill_employee_rows(self._by_employee_id[employee_id], new_values, name):
+                    summary['employees_updated'] += 1
+                summary['employees_skipped'] += 1
+                continue
+
+            key = _name_key(name)
+            existing_rows = self._by_name_department.get((key, dep_id)) if dep_id else None
+            if not existing_rows:
+                existing_rows = self._by_name_venue.get(
+                    (key, 'restaurant' if venue == 'restaurant' else 'office')
+                )
+            if not existing_rows:
+                existing_rows = self._by_name.get(key)
+            if existing_rows:
+                if self._backfill_employee_rows(existing_rows, new_values, name):
+                    summary['employees_updated'] += 1
+                summary['employees_skipped'] += 1
+                continue
+
+            if venue == 'restaurant' and not dep_id:
+                summary['errors'].append(
+                    f'Row {self.rows_seen} ("{name}"): could not determine the restaurant branch/location.'
+                )
+                continue
+
+            record = dict(new_values, id=None, name=name, row=self.rows_seen, row_name=name, venue=venue)
+            self._index(record)
+            self._pending_inserts.append(record)
+            summary['employees_created'] += 1
+            if venue == 'restaurant':
+                summary['restaurant_employees_created'] += 1
+            else:
+                summary['office_employees_created'] += 1
+        self._flush()
+
+    def _update_statements(self):
+        grouped = {}
+        for record in self._pending_updates.values():
+            columns = tuple(c for c in _BACKFILL_COLUMNS if c in record['dirty'])
+            grouped.setdefault(columns, []).append(record)
+        for columns, records in grouped.items():
+            sql = 'UPDATE users SET ' + ', '.join(f'{c} = ?' for c in columns) + ' WHERE id = ?'
+            yield sql, records, [[r[c] for c in columns] + [r['id']] for r in records]
+
+    def _insert_params(self, record):
+        return (record['name'], record['employee_id'], record['mobile'], record['email'], record['department_id'])
+
+    def _flush(self):
+        if not self._pending_inserts and not self._pending_updates:
+            return
+        cur = self.cur
+        if not cur.connection.in_transaction:
+            cur.execute('BEGIN')
+        cur.execute('SAVEPOINT employee_import')
+        try:
+            for sql, _, params in self._update_statements():
+                cur.executemany(sql, params)
+            if self._pending_inserts:
+                # The write lock is held from here on, so every id above the old
+                # maximum belongs to this batch, in insertion order.
+                cur.execute('SELECT COALESCE(MAX(id), 0) FROM users')
+                last_id = cur.fetchone()[0]
+                cur.executemany(_INSERT_USER_SQL, [self._insert_params(r) for r in self._pending_inserts])
+                cur.execute('SELECT id FROM users WHERE id > ? ORDER BY id', (last_id,))
+                for record, (user_id,) in zip(self._pending_inserts, cur.fetchall()):
+                    record['id'] = user_id
+            cur.execute('RELEASE employee_import')
+        except sqlite3.Error:
+            cur.execute('ROLLBACK TO employee_import')
+            cur.execute('RELEASE employee_import')
+            self._flush_row_by_row()
+        for record in self._pending_updates.values():
+            record.pop('dirty', None)
+        self._pending_inserts = []
+        self._pending_updates = {}
+
+    def _flush_row_by_row(self):
+        """Fallback when a batch hits a constraint: report the offending rows like a per-row import would."""
+        cur = self.cur
+        summary = self.summary
+        for sql, records, params in self._update_statements():
+            for record, values in zip(records, params):
+                try:
+                    cur.execute(sql, values)
+                except sqlite3.Error as e:
+                    summary['errors'].append(f'Row {record["row"]} ("{record["row_name"]}"): {str(e)}')
+        for record in self._pending_inserts:
+            try:
+                cur.execute(_INSERT_USER_SQL, self._insert_params(record))
+                record['id'] = cur.lastrowid
+            except sqlite3.Error as e:
+                summary['errors'].append(f'Row {record["row"]} ("{record["row_name"]}"): {str(e)}')
+                self._unindex(record)
+                summary['employees_created'] -= 1
+                if record['venue'] == 'restaurant':
+                    summary['restaurant_employees_created'] -= 1
+                else:
+                    summary['office_employees_created'] -= 1
+
+
+_INSERT_USER_SQL = (
+    'INSERT INTO users (name, employee_id, mobile, email, department_id) '
+    'VALUES (?, ?, ?, ?, ?)'
+)
+
+
+# --- Sheet rows -> import dicts (mirrors the dashboard's client-side parser) ---
+
+def _col_index(header, candidates):
+    for candidate in candidates:
+        if candidate in header:
+            return header.index(candidate)
+    return -1
+
+
+def _cell(row, index):
+    if index == -1 or index >= len(row):
+        return ''
+    return row[index] or ''
+
+
+def _find_header(reader, sheet_name, matches):
+    for idx, row in enumerate(reader.iter_rows(sheet_name)):
+        if idx >= HEADER_SCAN_ROWS:
+            break
+        lowered = [(cell or '').strip().lower() for cell in row]
+        if matches(lowered):
+            return idx, lowered
+    return None
+
+
+def _rows_after(reader, sheet_name, header_idx):
+    for idx, row in enumerate(reader.iter_rows(sheet_name)):
+        if idx > header_idx:
+            yield row
+
+
+def _is_branch_header(header):
+    return 'code' in header and ('brand' in header or 'type' in header)
+
+
+def iter_branch_import_rows(reader):
+    """Yield ``{code, name, brand, manager, email}`` for Type = Branch rows of the best sheet."""
+    best = None
+    for sheet_name in reader.sheet_names:
+        found = _find_header(reader, sheet_name, _is_branch_header)
+        if not found:
+            continue
+        header = found[1]
+        has_manager = 'branch manager' in header or 'manager' in header
+        if not best or (has_manager and not best[2]):
+            best = (sheet_name, found, has_manager)
+    if not best:
+        return
+    sheet_name, (header_idx, header), _ = best
+    ci = {
+        'code': _col_index(header, ['code']),
+        'name': _col_index(header, ['branch / flat name', 'branch/flat name', 'branch name', 'name']),
+        'type': _col_index(header, ['type']),
+        'brand': _col_index(header, ['brand']),
+        'manager': _col_index(header, ['branch manager', 'manager']),
+        'email': _col_index(header, ['email']),
+    }
+    for row in _rows_after(reader, sheet_name, header_idx):
+        row_type = _cell(row, ci['type']).strip().lower() if ci['type'] != -1 else 'branch'
+        if row_type and row_type != 'branch':
+            continue
+        name = _cell(row, ci['name']).strip()
+        if not name:
+            continue
+        yield {
+            'code': _cell(row, ci['code']).strip(),
+            'name': name,
+            'brand': _cell(row, ci['brand']).strip(),
+            'manager': _cell(row, ci['manager']).strip(),
+            'email': _cell(row, ci['email']).strip(),
+        }
+
+
+def _employee_norm(value):
+    text = (value or '').strip()
+    if re.fullmatch(r'\d+\.0', text):
+        text = text[:-2]
+    return text
+
+
+_EMPLOYEE_NAME_HEADERS = ['first name', 'employee name', 'name']
+_EMPLOYEE_DEPT_HEADERS = ['department', 'dept']
+_BRANCH_CODE_IN_EMAIL = re.compile(r'\b([bckmt]-[a-z]{2}\d{3}|cn-\d{3}|in-\d{3})@', re.IGNORECASE)
+_LOCATION_NAME_WORDS = re.compile(
+    r'\b(flat|villa|gate|city|mall|kucu|boom|thoum|cartoon|mishmisha|staff)\b', re.IGNORECASE
+)
+
+
+def _is_employee_header(header):
+    return (
+        _col_index(header, _EMPLOYEE_NAME_HEADERS) != -1
+        and _col_index(header, _EMPLOYEE_DEPT_HEADERS) != -1
+    )
+
+
+def _derive_branch_code(email):
+    match = _BRANCH_CODE_IN_EMAIL.search((email or '').lower())
+    return match.group(1).upper() if match else ''
+
+
+def _looks_like_location_row(employee_id, name, department):
+    eid = (employee_id or '').lower()
+    dep = (department or '').lower()
+    if re.search(r'[a-z]+-[a-z]{2}\d{3}-', eid) or re.fullmatch(r'(cn|in)-\d{3}', eid):
+        return True
+    is_location = dep.strip() in _LOCATION_DEPARTMENTS
+    if is_location and _LOCATION_NAME_WORDS.search(name or ''):
+        return True
+    if is_location and re.search(r'\d', name or ''):
+        return True
+    return False
+
+
+def iter_employee_import_rows(reader):
+    """Yield employee import dicts from the sheet whose name/department header comes first."""
+    best = None
+    for sheet_name in reader.sheet_names:
+        found = _find_header(reader, sheet_name, _is_employee_header)
+        if found and (not best or found[0] < best[1][0]):
+            best = (sheet_name, found)
+    if not best:
+        return
+    sheet_name, (header_idx, header) = best
+    ci = {
+        'employee_id': _col_index(header, ['employee id', 'employee_id', 'emp id', 'emp_id']),
+        'name': _col_index(header, _EMPLOYEE_NAME_HEADERS),
+        'department': _col_index(header, _EMPLOYEE_DEPT_HEADERS),
+        'mobile': _col_index(header, ['mobile no.', 'mobile no', 'mobile number', 'mobile', 'phone', 'phone number']),
+        'email': _col_index(header, ['email', 'e-mail', 'email address']),
+    }
+    for row in _rows_after(reader, sheet_name, header_idx):
+        values = {key: _employee_norm(_cell(row, index)) for key, index in ci.items()}
+        name = values['name']
+        if not name:
+            continue
+        if _looks_like_location_row(values['employee_id'], name, values['department']):
+            continue
+        is_restaurant = values['department'].strip().lower() == 'restaurant'
+        yield {
+            'employee_id': values['employee_id'],
+            'name': name,
+            'department': values['department'],
+            'mobile': values['mobile'],
+            'email': values['email'],
+            'venue': 'restaurant' if is_restaurant else 'office',
+            'branch_code': _derive_branch_code(values['email']) if is_restaurant else '',
+        }
@@ -0,0 +1,263 @@
+"""Helpers for the SQLite-backed background job queue.
+
+Routes enqueue work with ``enqueue_job`` and answer 202 with the job id; the worker
+(``scripts/job_worker.py``) claims queued jobs one at a time and runs the handler
+registered for the job's kind with ``@job_handler``. Handlers report progress through
+``JobContext.progress``, which is also where a requested cancel takes effect.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+import traceback
+import uuid
+from pathlib import Path
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+# Spooled files younger than this are kept even if no job refers to them yet.
+SPOOL_SWEEP_MIN_AGE_SECONDS = 600
+
+_HANDLERS = {}
+
+_JOB_COLUMNS = (
+    'id, kind, status, payload, result, error, progress_done, progress_total, '
+    'cancel_requested, created_by_id, created_by, worker, created_at, started_at, '
+    'heartbeat_at, finished_at'
+)
+
+
+class JobCancelled(Exception):
+    """Raised from ``JobContext.progress`` once a cancel has been requested."""
+
+
+def job_handler(kind):
+    """Register ``func(ctx, payload) -> result dict`` as the handler for ``kind`` jobs."""
+    def register(func):
+        _HANDLERS[kind] = func
+        return func
+    return register
+
+
+def get_job_spool_root():
+    """Directory for files a job needs after the request is gone (e.g. uploads)."""
+    root = Path(__file__).resolve().parent.parent / 'cache' / 'jobs'
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def spool_upload(file_storage):
+    """Save an uploaded file for a job; returns the path as a string."""
+    suffix = Path(file_storage.filename or '').suffix.lower()
+    path = get_job_spool_root() / f'{uuid.uuid4().hex}{suffix}'
+    file_storage.save(str(path))
+    return str(path)
+
+
+def sweep_job_spool(conn, min_age_seconds=SPOOL_SWEEP_MIN_AGE_SECONDS):
+    """
+    Delete spooled files that no queued or running job refers to (cancelled before
+    they ran, failed as stale, ...); returns how many were removed. Recent files are
+    skipped: the request that spooled one may not have queued its job yet.
+    """
+    cur = conn.cursor()
+    cur.execute('SELECT payload FROM jobs WHERE status IN (?, ?)', (JOB_QUEUED, JOB_RUNNING))
+    live = set()
+    for (payload,) in cur.fetchall():
+        path = json.loads(payload or '{}').get('path')
+        if path:
+            live.add(str(Path(path).resolve()))
+    cutoff = time.time() - min_age_seconds
+    removed = 0
+    for path in get_job_spool_root().iterdir():
+        if str(path) in live:
+            continue
+        try:
+            if not path.is_file() or path.stat().st_mtime > cutoff:
+                continue
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def enqueue_job(cur, kind, payload, created_by_id=None, created_by=None):
+    """Queue a job and return its id (caller commits)."""
+    if kind not in _HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    cur.execute(
+        'INSERT INTO jobs (kind, payload, created_by_id, created_by) VALUES (?, ?, ?, ?)',
+        (kind, json.dumps(payload), created_by_id, created_by),
+    )
+    return cur.lastrowid
+
+
+def _job_dict(row):
+    (job_id, kind, status, payload, result, error, done, total, cancel_requested,
+     created_by_id, created_by, worker, created_at, started_at, heartbeat_at, finished_at) = row
+    return {
+        'id': job_id,
+        'kind': kind,
+        'status': status,
+        'payload': json.loads(payload or '{}'),
+        'result': json.loads(result) if result else None,
+        'error': error,
+        'progress': {'done': done, 'total': total},
+        'cancel_requested': bool(cancel_requested),
+        'created_by_id': created_by_id,
+        'created_by': created_by,
+        'worker': worker,
+        'created_at': created_at,
+        'started_at': started_at,
+        'heartbeat_at': heartbeat_at,
+        'finished_at': finished_at,
+    }
+
+
+def get_job(cur, job_id):
+    cur.execute(f'SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?', (job_id,))
+    row = cur.fetchone()
+    return _job_dict(row) if row else None
+
+
+def list_jobs(cur, created_by_id=None, limit=50):
+    """Most recent jobs first, optionally only those created by one user."""
+    if created_by_id is None:
+        cur.execute(f'SELECT {_JOB_COLUMNS} FROM jobs ORDER BY id DESC LIMIT ?', (limit,))
+    else:
+        cur.execute(
+            f'SELECT {_JOB_COLUMNS} FROM jobs WHERE created_by_id = ? ORDER BY id DESC LIMIT ?',
+            (created_by_id, limit),
+        )
+    return [_job_dict(row) for row in cur.fetchall()]
+
+
+def request_job_cancel(cur, job_id):
+    """
+    Cancel a queued job outright, or flag a running one so its handler stops at the
+    next progress report. Returns the resulting status, or None if the job is finished.
+    """
+    cur.execute(
+        '''
+        UPDATE jobs SET status = ?, cancel_requested = 1, finished_at = CURRENT_TIMESTAMP
+        WHERE id = ? AND status = ?
+        ''',
+        (JOB_CANCELLED, job_id, JOB_QUEUED),
+    )
+    if cur.rowcount:
+        return JOB_CANCELLED
+    cur.execute(
+        'UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?',
+        (job_id, JOB_RUNNING),
+    )
+    return JOB_RUNNING if cur.rowcount else None
+
+
+def claim_next_job(conn, worker_id):
+    """Atomically move the oldest queued job to running and return it (or None)."""
+    cur = conn.cursor()
+    cur.execute('BEGIN IMMEDIATE')
+    try:
+        cur.execute('SELECT id FROM jobs WHERE status = ? ORDER BY id LIMIT 1', (JOB_QUEUED,))
+        row = cur.fetchone()
+        if not row:
+            conn.rollback()
+            return None
+        cur.execute(
+            '''
+            UPDATE jobs
+            SET status = ?, worker = ?, started_at = CURRENT_TIMESTAMP,
+                heartbeat_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            ''',
+            (JOB_RUNNING, worker_id, row[0]),
+        )
+        job = get_job(cur, row[0])
+        conn.commit()
+        return job
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+def fail_stale_jobs(conn, stale_seconds):
+    """Mark running jobs whose worker stopped reporting as failed; returns how many."""
+    cur = conn.cursor()
+    cur.execute(
+        '''
+        UPDATE jobs
+        SET status = ?, error = 'The worker stopped before the job finished.',
+            finished_at = CURRENT_TIMESTAMP
+        WHERE status = ? AND COALESCE(heartbeat_at, started_at) < datetime('now', ?)
+        ''',
+        (JOB_FAILED, JOB_RUNNING, f'-{int(stale_seconds)} seconds'),
+    )
+    conn.commit()
+    return cur.rowcount
+
+
+class JobContext:
+    """
+    Handed to job handlers. Bookkeeping goes through its own connection so progress
+    is visible immediately without committing the handler's work early.
+    """
+
+    def __init__(self, conn, job):
+        self._conn = conn
+        self.job_id = job['id']
+        self.created_by = job['created_by']
+        self.created_by_id = job['created_by_id']
+
+    def progress(self, done, total=None):
+        """Record progress and raise ``JobCancelled`` if a cancel has been requested."""
+        cur = self._conn.cursor()
+        cur.execute(
+            '''
+            UPDATE jobs
+            SET progress_done = ?, progress_total = COALESCE(?, progress_total),
+                heartbeat_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            ''',
+            (done, total, self.job_id),
+        )
+        self._conn.commit()
+        cur.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (self.job_id,))
+        row = cur.fetchone()
+        if row and row[0]:
+            raise JobCancelled()
+
+
+def _finish_job(conn, job_id, status, result=None, error=None):
+    conn.execute(
+        '''
+        UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+        ''',
+        (status, json.dumps(result) if result is not None else None, error, job_id),
+    )
+    conn.commit()
+
+
+def run_job(conn, job):
+    """Run a claimed job to completion and record the outcome; returns the final status."""
+    handler = _HANDLERS.get(job['kind'])
+    if handler is None:
+        _finish_job(conn, job['id'], JOB_FAILED, error=f'No handler for job kind "{job["kind"]}".')
+        return JOB_FAILED
+    try:
+        result = handler(JobContext(conn, job), job['payload'])
+    except JobCancelled:
+        _finish_job(conn, job['id'], JOB_CANCELLED)
+        return JOB_CANCELLED
+    except Exception as e:
+        traceback.print_exc()
+        _finish_job(conn, job['id'], JOB_FAILED, error=str(e) or e.__class__.__name__)
+        return JOB_FAILED
+    _finish_job(conn, job['id'], JOB_SUCCEEDED, result=result)
+    return JOB_SUCCEEDED
@@ -0,0 +1,188 @@
+"""Helpers for the Prometheus-style metrics registry served at ``/metrics``.
+
+Counters and histograms are updated as requests run; gauges that describe the
+database (asset counts, job queue, document bytes) are read by collectors when the
+endpoint is scraped. Everything lives in this process, so with several workers each
+one is scraped (or summed) separately.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_START_ENVIRON_KEY = 'asset_tracker.metrics_started'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels_text(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f'{self.name}{_labels_text(self.labelnames, key)} {_number(value)}' for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = self.header()
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = (('le', _number(float(bound))),)
+                lines.append(f'{self.name}_bucket{_labels_text(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels_text(self.labelnames, key)} {_number(round(total, 6))}')
+            lines.append(f'{self.name}_count{_labels_text(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics updated in place plus collectors evaluated at scrape time."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, func):
+        """Register ``func() -> [(name, kind, help, [(labels dict, value), ...]), ...]``."""
+        self._collectors.append(func)
+        return func
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for name, kind, documentation, samples in collect():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    names = tuple(labels)
+                    lines.append(f'{name}{_labels_text(names, [labels[n] for n in names])} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'asset_tracker_http_request_duration_seconds', 'Request latency by endpoint.', ('endpoint', 'method'),
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    'asset_tracker_http_requests_total', 'Requests by endpoint and status.', ('endpoint', 'method', 'status'),
+)
+DB_CONNECT_SECONDS = REGISTRY.histogram(
+    'asset_tracker_db_connect_seconds', 'Time to open a SQLite connection.',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5),
+)
+DB_STATEMENTS = REGISTRY.counter(
+    'asset_tracker_db_statements_total', 'SQL statements run while handling requests.', ('endpoint',),
+)
+DB_STATEMENT_SECONDS = REGISTRY.counter(
+    'asset_tracker_db_statement_seconds_total', 'Time spent in SQL (execute + fetch) by endpoint.', ('endpoint',),
+)
+
+
+def observe_db_connect(seconds):
+    DB_CONNECT_SECONDS.observe(seconds)
+
+
+def init_metrics(app):
+    """Count and time every request into the process-wide ``REGISTRY``."""
+    from flask import request
+
+    from utils.request_metrics import current_request_stats
+
+    @app.before_request
+    def start_request_timer():
+        request.environ[METRICS_START_ENVIRON_KEY] = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = request.environ.get(METRICS_START_ENVIRON_KEY)
+        if started is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        stats = current_request_stats()
+        if stats is not None:
+            DB_STATEMENTS.inc(stats.sql_count, endpoint=endpoint)
+            DB_STATEMENT_SECONDS.inc(round(stats.sql_seconds, 6), endpoint=endpoint)
+        return response
@@ -0,0 +1,59 @@
+"""Helpers for caching small reference tables in process, keyed by data version.
+
+Branch codes and the asset-name catalog change rarely but are read on almost every
+request. ``cached_reference(cur, name, tables, load)`` keeps ``load(cur)``'s result
+together with the tables' data versions (bumped by triggers on every write, from any
+process) and reloads only when a version moved.
+During a GET request the versions are read once and reused, so repeat lookups are
+dictionary hits; requests that write re-check on every lookup so they see their own
+changes. Rollbacks and admin mutations call ``invalidate_reference_data`` so nothing
+loaded inside a transaction that was undone is served afterwards.
+
+Cached values are shared between threads: treat them as read-only.
+"""
+from __future__ import annotations
+
+import threading
+
+from flask import g, has_request_context, request
+
+from models.database import get_data_versions
+
+_REQUEST_VERSIONS_KEY = '_reference_data_versions'
+_SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_entries = {}
+_lock = threading.Lock()
+
+
+def _current_versions(cur, tables):
+    memo = None
+    if has_request_context() and request.method in _SAFE_METHODS:
+        memo = g.setdefault(_REQUEST_VERSIONS_KEY, {})
+        if all(table in memo for table in tables):
+            return tuple(memo[table] for table in tables)
+    versions = get_data_versions(cur, tables)
+    if memo is not None:
+        memo.update(versions)
+    return tuple(versions[table] for table in tables)
+
+
+def cached_reference(cur, name, tables, load):
+    """``load(cur)`` cached until one of ``tables`` is written."""
+    tables = tuple(tables)
+    versions = _current_versions(cur, tables)
+    entry = _entries.get(name)
+    if entry is not None and entry[0] == versions:
+        return entry[1]
+    value = load(cur)
+    with _lock:
+        _entries[name] = (versions, value)
+    return value
+
+
+def invalidate_reference_data():
+    """Drop every cached table (and this request's version memo)."""
+    with _lock:
+        _entries.clear()
+    if has_request_context():
+        g.pop(_REQUEST_VERSIONS_KEY, None)
@@ -0,0 +1,358 @@
+"""Helpers for streaming the active asset register as CSV, NDJSON or XLSX."""
+from __future__ import annotations
+
+import csv
+import datetime
+import hashlib
+import io
+import json
+import os
+import uuid
+from pathlib import Path
+
+from models.database import ASSET_KIND_BRANCH, get_data_versions
+from utils.xlsx_writer import iter_xlsx_chunks
+
+EXPORT_PAGE_SIZE = 1000
+EXPORT_CACHE_MAX_FILES = 20
+
+# (key, CSV header) in output order.
+EXPORT_COLUMNS = (
+    ('id', 'ID'),
+    ('name', 'Asset Name'),
+    ('asset_code', 'Asset Code'),
+    ('branch', 'Branch'),
+    ('department', 'Department'),
+    ('owner', 'Owner'),
+    ('price', 'Price (OMR)'),
+    ('used_status', 'Status'),
+    ('asset_type', 'Asset Category'),
+    ('asset_kind', 'Asset Type'),
+    ('asset_date', 'Asset Date'),
+)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Tables an XLSX export reads; their data versions key the export cache.
+WORKBOOK_SOURCE_TABLES = (
+    'assets',
+    'archived_assets',
+    'asset_ownership_history',
+    'asset_spec_values',
+    'asset_name_spec_fields',
+)
+
+_ARCHIVE_SHEET = (
+    'Archive',
+    ['ID', 'Original ID', 'Asset Name', 'Asset Code', 'Branch', 'Department', 'Owner',
+     'Price (OMR)', 'Status', 'Asset Category', 'Asset Type', 'Asset Date',
+     'Archived At', 'Archived By', 'Archive Reason'],
+    '''
+    SELECT id, original_id, name, asset_code, branch, department, owner,
+           COALESCE(price, 0.0), used_status, asset_type, asset_kind, asset_date,
+           archived_at, archived_by, archive_reason
+    FROM archived_assets
+    ''',
+    'id',
+)
+_HISTORY_SHEET = (
+    'Ownership History',
+    ['ID', 'Asset ID', 'Asset Code', 'From Owner', 'To Owner', 'From Branch', 'To Branch',
+     'From Department', 'To Department', 'Handed Over By', 'Notes', 'Handed Over At',
+     'Split From Shared', 'From Shared Branches'],
+    '''
+    SELECT id, asset_id, asset_code, from_owner, to_owner, from_branch, to_branch,
+           from_department, to_department, handed_over_by, notes, handed_over_at,
+           split_from_shared, from_shared_branches
+    FROM asset_ownership_history
+    ''',
+    'id',
+)
+
+
+def _where_clauses(where_sql):
+    """``'WHERE a AND b'`` (from the register filter builders) -> ``['a AND b']``."""
+    where_sql = (where_sql or '').strip()
+    if not where_sql:
+        return []
+    return [where_sql[len('WHERE '):]]
+
+
+def iter_keyset_pages(cur, select_sql, clauses, params, key='id', page_size=EXPORT_PAGE_SIZE):
+    """
+    Yield raw row lists of ``select_sql`` filtered by ``clauses``, ordered by ``key``.
+
+    Pages use a keyset cursor (``key > last``) so each query is an index range scan,
+    no read transaction stays open between pages, and memory is bounded by
+    ``page_size`` however large the table is.
+    """
+    where = ' AND '.join([f'({clause})' for clause in clauses] + [f'{key} > ?'])
+    last = 0
+    while True:
+        cur.execute(
+            f'{select_sql} WHERE {where} ORDER BY {key} LIMIT ?',
+            list(params) + [last, page_size],
+        )
+        rows = cur.fetchall()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1][0]
+
+
+def iter_register_pages(
+    cur, where_sql, params, page_size=EXPORT_PAGE_SIZE, extra_clauses=(), extra_params=(),
+):
+    """Yield lists of export dicts for active assets matching ``where_sql``, ordered by id."""
+    pages = iter_keyset_pages(
+        cur,
+        '''
+        SELECT id, name, asset_code, branch, department, owner, price,
+               used_status, asset_type, asset_kind, asset_date
+        FROM assets
+        ''',
+        _where_clauses(where_sql) + list(extra_clauses),
+        list(params) + list(extra_params),
+        page_size=page_size,
+    )
+    for rows in pages:
+        yield [
+            {
+                'id': row[0],
+                'name': row[1],
+                'asset_code': row[2],
+                'branch': row[3],
+                'department': row[4],
+                'owner': row[5] or 'Not Specified',
+                'price': row[6] or 0.0,
+                'used_status': row[7] or 'Not Specified',
+                'asset_type': row[8] or 'Not Specified',
+                'asset_kind': row[9] or ASSET_KIND_BRANCH,
+                'asset_date': row[10],
+            }
+            for row in rows
+        ]
+
+
+def iter_csv_chunks(pages):
+    """Encode pages as CSV text, one chunk per page (header + BOM first for Excel)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([label for _, label in EXPORT_COLUMNS])
+    yield '\ufeff' + buffer.getvalue()
+    for page in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([row[key] for key, _ in EXPORT_COLUMNS] for row in page)
+        yield buffer.getvalue()
+
+
+def iter_ndjson_chunks(pages):
+    """Encode pages as newline-delimited JSON, one chunk per page."""
+    for page in pages:
+        yield ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in page)
+
+
+def _register_rows(pages):
+    for page in pages:
+        yield [[row[key] for key, _ in EXPORT_COLUMNS] for row in page]
+
+
+def _omr(value):
+    return round(float(value or 0.0), 3)
+
+
+def iter_price_analysis_sheets(cur, where_sql, params):
+    """
+    The price analysis summary sheets (system overview, branch and department totals)
+    for the active assets matching ``where_sql``; aggregated in SQL, one row per group.
+    """
+    cur.execute(
+        f'SELECT COUNT(*), COALESCE(SUM(price), 0.0) FROM assets {where_sql}', list(params),
+    )
+    total_assets, total_value = cur.fetchone()
+    yield 'System Overview', None, iter([[
+        ['ASSET PRICE ANALYSIS REPORT'],
+        [],
+        ['Report Generated:', datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
+        ['Total System Value (OMR):', _omr(total_value)],
+        ['Total Assets:', total_assets],
+        [],
+        ['Currency: Omani Rial (OMR)'],
+    ]])
+
+    cur.execute(
+        f'''
+        SELECT branch, COUNT(*), COALESCE(SUM(price), 0.0)
+        FROM assets {where_sql}
+        GROUP BY branch
+        ORDER BY branch COLLATE NOCASE
+        ''',
+        list(params),
+    )
+    branch_rows = [
+        [branch or 'No Branch', count, _omr(value), _omr(value / count)]
+        for branch, count, value in cur.fetchall()
+    ]
+    branch_rows.append([])
+    branch_rows.append([
+        'TOTAL', total_assets, _omr(total_value),
+        _omr(total_value / total_assets) if total_assets else 0.0,
+    ])
+    yield (
+        'Branch Analysis',
+        ['Branch Name', 'Total Assets', 'Total Value (OMR)', 'Average Value per Asset (OMR)'],
+        iter([branch_rows]),
+    )
+
+    cur.execute(
+        f'''
+        SELECT branch, department, COUNT(*), COALESCE(SUM(price), 0.0) AS total
+        FROM assets {where_sql}
+        GROUP BY branch, department
+        ORDER BY total DESC, branch COLLATE NOCASE, department COLLATE NOCASE
+        ''',
+        list(params),
+    )
+    yield (
+        'Department Analysis',
+        ['Branch', 'Department', 'Total Assets', 'Total Value (OMR)',
+         'Average Value per Asset (OMR)'],
+        iter([[
+            [branch or 'No Branch', department or '', count, _omr(value), _omr(value / count)]
+            for branch, department, count, value in cur.fetchall()
+        ]]),
+    )
+
+
+def iter_workbook_sheets(
+    cur, where_sql, params, per_branch=False, include_archive=False, analysis=False,
+):
+    """
+    ``(title, header, pages)`` for the register workbook: the price analysis summaries
+    when ``analysis`` is set, assets (one sheet, or one per branch), spec values of those
+    assets, and for IT users the archive and ownership history. Sheets are produced
+    lazily so only one query is in flight at a time.
+    """
+    if analysis:
+        yield from iter_price_analysis_sheets(cur, where_sql, params)
+
+    header = [label for _, label in EXPORT_COLUMNS]
+    if per_branch:
+        cur.execute(
+            f'SELECT DISTINCT branch FROM assets {where_sql} ORDER BY branch COLLATE NOCASE',
+            list(params),
+        )
+        branches = [row[0] for row in cur.fetchall()]
+        for branch in branches:
+            yield (
+                branch or 'No Branch',
+                header,
+                _register_rows(iter_register_pages(
+                    cur, where_sql, params, extra_clauses=['branch IS ?'], extra_params=[branch],
+                )),
+            )
+        if not branches:
+            yield 'Assets', header, iter(())
+    else:
+        yield 'Assets', header, _register_rows(iter_register_pages(cur, where_sql, params))
+
+    yield (
+        'Spec Values',
+        ['ID', 'Asset ID', 'Asset Code', 'Asset Name', 'Branch', 'Specification', 'Value'],
+        iter_keyset_pages(
+            cur,
+            '''
+            SELECT sv.id, sv.asset_id, a.asset_code, a.name, a.branch, f.label, sv.value
+            FROM asset_spec_values sv
+            JOIN assets a ON a.id = sv.asset_id
+            JOIN asset_name_spec_fields f ON f.id = sv.spec_field_id
+            ''',
+            [f'sv.asset_id IN (SELECT id FROM assets {where_sql})'],
+            list(params),
+            key='sv.id',
+        ),
+    )
+
+    if include_archive:
+        for title, sheet_header, select_sql, key in (_ARCHIVE_SHEET, _HISTORY_SHEET):
+            yield title, sheet_header, iter_keyset_pages(cur, select_sql, [], [], key=key)
+
+
+def iter_register_xlsx_chunks(
+    cur, where_sql, params, per_branch=False, include_archive=False, analysis=False,
+):
+    return iter_xlsx_chunks(
+        iter_workbook_sheets(cur, where_sql, params, per_branch, include_archive, analysis)
+    )
+
+
+def get_export_cache_root():
+    root = Path(__file__).resolve().parent.parent / 'cache' / 'exports'
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def workbook_cache_key(cur, where_sql, params, per_branch, include_archive, analysis=False):
+    """Stable key for an XLSX export: filters, options and the source tables' data versions."""
+    payload = json.dumps(
+        {
+            'where': where_sql,
+            'params': list(params),
+            'per_branch': bool(per_branch),
+            'include_archive': bool(include_archive),
+            'analysis': bool(analysis),
+            'versions': get_data_versions(cur, WORKBOOK_SOURCE_TABLES),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def cached_export_path(key):
+    """Path of a finished cached export for ``key``, or None."""
+    path = get_export_cache_root() / f'{key}.xlsx'
+    return path if path.is_file() else None
+
+
+def tee_to_export_cache(chunks, key):
+    """
+    Pass ``chunks`` through while writing them to the cache; the file only becomes
+    visible (atomic rename) once the whole export has been produced.
+    """
+    root = get_export_cache_root()
+    part = root / f'{key}.{uuid.uuid4().hex}.part'
+    completed = False
+    try:
+        with open(part, 'wb') as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+                yield chunk
+        os.replace(part, root / f'{key}.xlsx')
+        completed = True
+    finally:
+        if not completed:
+            try:
+                part.unlink()
+            except OSError:
+                pass
+    _prune_export_cache(root)
+
+
+def _prune_export_cache(root):
+    try:
+        files = sorted(root.glob('*.xlsx'), key=lambda p: p.stat().st_mtime, reverse=True)
+    except OSError:
+        return
+    for stale in files[EXPORT_CACHE_MAX_FILES:]:
+        try:
+            stale.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,285 @@
+"""Helpers for per-request performance accounting.
+
+``get_db_connection`` (and the write queue) open connections with
+``InstrumentedConnection``; while a request is being handled, every statement run on
+them is counted and timed into that request's ``RequestStats``. Template render time
+comes from Flask's render signals. ``init_request_metrics`` reports the totals as a
+``Server-Timing`` header and one structured log line per request. Statements slower
+than the slow-query threshold also go to the app's ``SlowQueryLog``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from flask import before_render_template, has_request_context, request, template_rendered
+
+REQUEST_STATS_ENVIRON_KEY = 'asset_tracker.request_stats'
+SLOWEST_SQL_LOG_CHARS = 300
+SQL_TIMELINE_LIMIT = 5000
+
+logger = logging.getLogger('asset_tracker.requests')
+
+
+class RequestStats:
+    """Counters for one request; shared with write units run on its behalf."""
+
+    def __init__(self, slow_log=None):
+        self.slow_log = slow_log
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+        self.slowest_sql = None
+        self.slowest_seconds = 0.0
+        self.template_seconds = 0.0
+        self._template_started = []
+        self._sql_repeats = {}
+        self.timeline = None
+        self.timeline_dropped = 0
+
+    def start_timeline(self):
+        """Keep every statement from now on (used by the request profiler)."""
+        self.timeline = []
+
+    def record_statement(self, sql, seconds, started=None):
+        """Count a statement; returns its timeline entry when a timeline is kept."""
+        self.sql_count += 1
+        self.sql_seconds += seconds
+        self._sql_repeats[sql] = self._sql_repeats.get(sql, 0) + 1
+        self._note_slow(sql, seconds)
+        if self.timeline is None or started is None:
+            return None
+        if len(self.timeline) >= SQL_TIMELINE_LIMIT:
+            self.timeline_dropped += 1
+            return None
+        from utils.slow_queries import normalize_sql
+
+        entry = {
+            'start_ms': _ms(started - self.started),
+            'duration_ms': _ms(seconds),
+            'rows': 0,
+            'thread': threading.current_thread().name,
+            'sql': normalize_sql(sql),
+        }
+        self.timeline.append(entry)
+        return entry
+
+    def record_fetch(self, sql, statement_seconds, seconds, rows):
+        """Fetch time counts towards the statement it belongs to."""
+        self.sql_seconds += seconds
+        self.rows += rows
+        self._note_slow(sql, statement_seconds)
+
+    def _note_slow(self, sql, seconds):
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_sql = sql
+
+    @property
+    def max_sql_repeat(self):
+        """How often the most repeated statement ran (a high number usually means N+1)."""
+        return max(self._sql_repeats.values(), default=0)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current_request_stats():
+    """The ``RequestStats`` of the request being handled, or None outside requests."""
+    if not has_request_context():
+        return None
+    return request.environ.get(REQUEST_STATS_ENVIRON_KEY)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports statement and fetch timings to the current request."""
+
+    _stats = None
+    _sql = None
+    _params = None
+    _many = False
+    _sql_seconds = 0.0
+    _sql_rows = 0
+    _slow_entry = None
+    _timeline_entry = None
+
+    def _timed(self, sql, params, many, call, *args):
+        stats = current_request_stats()
+        if stats is None:
+            self._stats = None
+            return call(*args)
+        started = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            seconds = time.perf_counter() - started
+            self._stats, self._sql, self._params, self._many = stats, sql, params, many
+            self._sql_seconds, self._sql_rows, self._slow_entry = seconds, 0, None
+            self._timeline_entry = stats.record_statement(sql, seconds, started)
+            self._check_slow()
+
+    def execute(self, sql, parameters=()):
+        return self._timed(sql, parameters, False, super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(sql, None, True, super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._timed(sql_script, None, True, super().executescript, sql_script)
+
+    def _check_slow(self):
+        slow_log = self._stats.slow_log
+        if slow_log is None or self._sql_seconds < slow_log.threshold_seconds:
+            return
+        if self._slow_entry is None:
+            self._slow_entry = slow_log.record(
+                self.connection, self._sql, self._params, self._sql_seconds, self._sql_rows,
+                many=self._many,
+            )
+        else:
+            self._slow_entry['duration_ms'] = round(self._sql_seconds * 1000, 1)
+            self._slow_entry['rows'] = self._sql_rows
+
+    def _fetched(self, started, rows):
+        seconds = time.perf_counter() - started
+        self._sql_seconds += seconds
+        self._sql_rows += rows
+        self._stats.record_fetch(self._sql, self._sql_seconds, seconds, rows)
+        if self._timeline_entry is not None:
+            self._timeline_entry['duration_ms'] = _ms(self._sql_seconds)
+            self._timeline_entry['rows'] = self._sql_rows
+        self._check_slow()
+
+    def fetchone(self):
+        if self._stats is None:
+            return super().fetchone()
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        if self._stats is None:
+            return super().fetchmany(self.arraysize if size is None else size)
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        if self._stats is None:
+            return super().fetchall()
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        return rows
+
+    def __next__(self):
+        if self._stats is None:
+            return super().__next__()
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0)
+            raise
+        self._fetched(started, 1)
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """``sqlite3.connect(..., factory=InstrumentedConnection)`` hands out ``InstrumentedCursor``s."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def _template_started(sender, template, context, **extra):
+    stats = current_request_stats()
+    if stats is not None:
+        stats._template_started.append(time.perf_counter())
+
+
+def _template_finished(sender, template, context, **extra):
+    stats = current_request_stats()
+    if stats is not None and stats._template_started:
+        started = stats._template_started.pop()
+        if not stats._template_started:
+            # Nested render_template calls are already inside the outer one's time.
+            stats.template_seconds += time.perf_counter() - started
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+def server_timing_header(stats, total_seconds):
+    return ', '.join((
+        f'app;dur={_ms(total_seconds)}',
+        f'db;dur={_ms(stats.sql_seconds)};desc="{stats.sql_count} queries, {stats.rows} rows"',
+        f'db-slowest;dur={_ms(stats.slowest_seconds)}',
+        f'tpl;dur={_ms(stats.template_seconds)}',
+    ))
+
+
+def request_log_record(stats, response, total_seconds):
+    slowest = ' '.join((stats.slowest_sql or '').split())
+    return {
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'duration_ms': _ms(total_seconds),
+        'sql_count': stats.sql_count,
+        'sql_ms': _ms(stats.sql_seconds),
+        'sql_rows': stats.rows,
+        'sql_max_repeat': stats.max_sql_repeat,
+        'sql_slowest_ms': _ms(stats.slowest_seconds),
+        'sql_slowest': slowest[:SLOWEST_SQL_LOG_CHARS],
+        'template_ms': _ms(stats.template_seconds),
+    }
+
+
+def init_request_metrics(app):
+    """Time every request; off with ``REQUEST_METRICS = False``."""
+    if not app.config.get('REQUEST_METRICS', True):
+        return
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(message)s'))
+        logger.addHandler(handler)
+        if logger.level == logging.NOTSET:
+            logger.setLevel(logging.INFO)
+
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+
+    @app.before_request
+    def start_request_stats():
+        request.environ[REQUEST_STATS_ENVIRON_KEY] = RequestStats(
+            slow_log=app.extensions.get('slow_query_log'),
+        )
+
+    @app.after_request
+    def report_request_stats(response):
+        stats = current_request_stats()
+        if stats is None:
+            return response
+        total = stats.elapsed()
+        response.headers['Server-Timing'] = server_timing_header(stats, total)
+        if request.endpoint != 'static':
+            logger.info(json.dumps(request_log_record(stats, response, total)))
+        return response
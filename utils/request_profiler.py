@@ -0,0 +1,221 @@
+"""Helpers for profiling single live requests on demand.
+
+An IT user adds ``?_profile=1`` to a URL (or sends ``X-Profile: 1``). That request is
+sampled by a background thread reading the handling thread's stack every
+``PROFILE_SAMPLE_INTERVAL_MS``, and its SQL statements are kept as a timeline by the
+instrumented cursor. The result goes to the app's ``ProfileStore``; the response
+carries ``X-Profile-Id`` and the profile is read back from ``/admin/profiles/<id>``
+(``/collapsed`` gives folded stacks for flamegraph.pl / speedscope).
+
+A sampler rather than cProfile: it needs no hooks in the profiled thread, adds little
+overhead at the default interval and yields real stacks for a flame graph. One
+request is profiled at a time; others asking meanwhile get ``X-Profile: busy``.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+from flask import current_app, g, request
+
+PROFILE_QUERY_ARG = '_profile'
+PROFILE_HEADER = 'X-Profile'
+DEFAULT_PROFILE_SAMPLE_INTERVAL_MS = 1.0
+DEFAULT_PROFILE_STORE_SIZE = 20
+PROFILE_TOP_FRAMES = 40
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_profile_lock = threading.Lock()
+
+
+def _frame_label(code):
+    path = code.co_filename
+    if path.startswith(_APP_ROOT):
+        path = path[len(_APP_ROOT):]
+    elif 'site-packages' + os.sep in path:
+        path = path.split('site-packages' + os.sep, 1)[1]
+    else:
+        path = os.sep.join(path.split(os.sep)[-2:])
+    # ';' separates frames in the folded format.
+    return f'{code.co_name} ({path}:{code.co_firstlineno})'.replace(';', ':')
+
+
+class StackSampler:
+    """Counts the stacks of one thread, sampled from a background thread."""
+
+    def __init__(self, thread_id, interval_seconds):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            # Drop the server / WSGI plumbing above Flask.
+            for i, code in enumerate(codes):
+                if code.co_name == 'wsgi_app':
+                    codes = codes[i:]
+                    break
+            stack = tuple(codes)
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.samples += 1
+
+    def collapsed(self):
+        """Folded stacks, one ``frame;frame;frame count`` line per distinct stack."""
+        lines = []
+        for stack, count in self.stacks.items():
+            lines.append(';'.join(_frame_label(code) for code in stack) + f' {count}')
+        return '\n'.join(sorted(lines)) + ('\n' if lines else '')
+
+    def top_frames(self, limit=PROFILE_TOP_FRAMES):
+        """Frames by samples on top of the stack (self) and anywhere in it (total)."""
+        own, total = {}, {}
+        for stack, count in self.stacks.items():
+            if not stack:
+                continue
+            own[stack[-1]] = own.get(stack[-1], 0) + count
+            for code in set(stack):
+                total[code] = total.get(code, 0) + count
+        ranked = sorted(total, key=lambda code: (own.get(code, 0), total[code]), reverse=True)
+        return [
+            {'frame': _frame_label(code), 'self_samples': own.get(code, 0), 'total_samples': total[code]}
+            for code in ranked[:limit]
+        ]
+
+
+class ProfileStore:
+    """Thread-safe ring buffer of finished request profiles."""
+
+    def __init__(self, size=DEFAULT_PROFILE_STORE_SIZE):
+        self._profiles = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def add(self, profile):
+        with self._lock:
+            profile['id'] = self._next_id
+            self._next_id += 1
+            self._profiles.append(profile)
+        return profile['id']
+
+    def get(self, profile_id):
+        with self._lock:
+            for profile in self._profiles:
+                if profile['id'] == profile_id:
+                    return profile
+        return None
+
+    def summaries(self):
+        """Newest first, without stacks and timelines."""
+        with self._lock:
+            profiles = list(reversed(self._profiles))
+        return [
+            {key: value for key, value in profile.items() if key not in ('collapsed', 'timeline', 'top_frames')}
+            for profile in profiles
+        ]
+
+
+def profiling_requested():
+    flag = request.args.get(PROFILE_QUERY_ARG) or request.headers.get(PROFILE_HEADER) or ''
+    return flag.strip().lower() in ('1', 'true', 'yes')
+
+
+def _finish_profile(response=None):
+    sampler = g.pop('request_profiler', None)
+    if sampler is None:
+        return None
+    try:
+        sampler.stop()
+    finally:
+        _profile_lock.release()
+    from utils.request_metrics import current_request_stats
+
+    stats = current_request_stats()
+    profile = {
+        'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'endpoint': request.endpoint,
+        'status': response.status_code if response is not None else None,
+        'user': g.pop('profiled_by', None),
+        'duration_ms': round((time.perf_counter() - g.pop('profile_started')) * 1000, 1),
+        'interval_ms': round(sampler.interval_seconds * 1000, 3),
+        'samples': sampler.samples,
+        'sql_count': stats.sql_count if stats else None,
+        'sql_ms': round(stats.sql_seconds * 1000, 1) if stats else None,
+        'template_ms': round(stats.template_seconds * 1000, 1) if stats else None,
+        'timeline': stats.timeline if stats and stats.timeline is not None else [],
+        'timeline_dropped': stats.timeline_dropped if stats else 0,
+        'top_frames': sampler.top_frames(),
+        'collapsed': sampler.collapsed(),
+    }
+    return current_app.extensions['request_profiles'].add(profile)
+
+
+def init_request_profiler(app):
+    """Profile requests asked for by IT users; off with ``REQUEST_PROFILING = False``.
+
+    Call after ``init_request_metrics`` so the request's ``RequestStats`` exists.
+    """
+    app.extensions['request_profiles'] = ProfileStore(
+        size=int(app.config.get('PROFILE_STORE_SIZE', DEFAULT_PROFILE_STORE_SIZE)),
+    )
+    if not app.config.get('REQUEST_PROFILING', True):
+        return
+    interval = float(app.config.get('PROFILE_SAMPLE_INTERVAL_MS', DEFAULT_PROFILE_SAMPLE_INTERVAL_MS)) / 1000.0
+
+    @app.before_request
+    def start_request_profile():
+        if request.endpoint == 'static' or not profiling_requested():
+            return
+        from flask_login import current_user
+
+        from utils.request_metrics import current_request_stats
+
+        if not (current_user.is_authenticated and current_user.has_it_access()):
+            return
+        if not _profile_lock.acquire(blocking=False):
+            g.profile_busy = True
+            return
+        stats = current_request_stats()
+        if stats is not None:
+            stats.start_timeline()
+        g.profiled_by = current_user.email
+        g.profile_started = time.perf_counter()
+        g.request_profiler = StackSampler(threading.get_ident(), interval)
+        g.request_profiler.start()
+
+    @app.after_request
+    def finish_request_profile(response):
+        if g.pop('profile_busy', False):
+            response.headers[PROFILE_HEADER] = 'busy'
+            return response
+        profile_id = _finish_profile(response)
+        if profile_id is not None:
+            response.headers['X-Profile-Id'] = str(profile_id)
+        return response
+
+    @app.teardown_request
+    def stop_request_profile(exc):
+        # after_request is skipped when the view raises; never leave a sampler running.
+        _finish_profile()
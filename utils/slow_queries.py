@@ -0,0 +1,162 @@
+"""Helpers for recording slow SQL statements with their query plans.
+
+Instrumented cursors (``utils.request_metrics``) hand any statement that runs longer
+than ``SLOW_QUERY_MS`` to the app's ``SlowQueryLog``: a fixed-size ring buffer of the
+normalized SQL, the shape of its parameters, how long it took and the
+``EXPLAIN QUERY PLAN`` output, so full table scans show up without a profiler.
+"""
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from flask import has_request_context, request
+
+DEFAULT_SLOW_QUERY_MS = 100
+DEFAULT_SLOW_QUERY_LOG_SIZE = 200
+PARAM_SHAPE_LIMIT = 20
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_NO_PLAN_PREFIXES = ('BEGIN', 'COMMIT', 'END', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA')
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and replace literals / ``IN (?, ?, …)`` lists with ``?``."""
+    sql = _WHITESPACE.sub(' ', sql or '').strip()
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    return _PLACEHOLDER_LIST.sub('(?…)', sql)
+
+
+def _value_shape(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, (bool, int)):
+        return 'int'
+    if isinstance(value, float):
+        return 'real'
+    if isinstance(value, str):
+        return f'text({len(value)})'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f'blob({len(value)})'
+    return type(value).__name__
+
+
+def param_shapes(params):
+    """Types (and text/blob lengths) of bound parameters, never their values."""
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {key: _value_shape(value) for key, value in list(params.items())[:PARAM_SHAPE_LIMIT]}
+    params = list(params)
+    shapes = [_value_shape(value) for value in params[:PARAM_SHAPE_LIMIT]]
+    if len(params) > PARAM_SHAPE_LIMIT:
+        shapes.append(f'…+{len(params) - PARAM_SHAPE_LIMIT} more')
+    return shapes
+
+
+def explain_query_plan(conn, sql, params):
+    """``EXPLAIN QUERY PLAN`` rows as strings (plain cursor, so it is not timed itself)."""
+    if sql.lstrip().upper().startswith(_NO_PLAN_PREFIXES):
+        return []
+    cur = sqlite3.Cursor(conn)
+    try:
+        cur.execute('EXPLAIN QUERY PLAN ' + sql, params if params is not None else ())
+        return [row[3] for row in cur.fetchall()]
+    finally:
+        cur.close()
+
+
+def full_scans(plan):
+    """Plan lines that read a whole table without an index."""
+    return [line for line in plan if line.startswith('SCAN ') and ' USING ' not in line]
+
+
+class SlowQueryLog:
+    """Thread-safe ring buffer of slow statements."""
+
+    def __init__(self, threshold_ms=DEFAULT_SLOW_QUERY_MS, size=DEFAULT_SLOW_QUERY_LOG_SIZE):
+        self.threshold_seconds = threshold_ms / 1000.0
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def record(self, conn, sql, params, seconds, rows, many=False):
+        """Add an entry and return it; the caller may update its timing as fetching goes on."""
+        plan_params = params
+        if many:
+            # Only the statement text survives executemany; bind NULLs to get a plan.
+            plan_params = [None] * sql.count('?')
+        try:
+            plan = explain_query_plan(conn, sql, plan_params)
+            plan_error = None
+        except sqlite3.Error as e:
+            plan, plan_error = [], str(e)
+        entry = {
+            'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'sql': normalize_sql(sql),
+            'params': 'executemany' if many else param_shapes(params),
+            'duration_ms': round(seconds * 1000, 1),
+            'rows': rows,
+            'plan': plan,
+            'plan_error': plan_error,
+            'full_scans': full_scans(plan),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'path': request.path if has_request_context() else None,
+        }
+        with self._lock:
+            entry['id'] = self._next_id
+            self._next_id += 1
+            self._entries.append(entry)
+        return entry
+
+    @property
+    def recorded_count(self):
+        """Entries ever recorded, including those that fell out of the buffer."""
+        return self._next_id - 1
+
+    def entries(self):
+        """Newest first."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def summary(self):
+        """Entries grouped by normalized SQL, slowest total first."""
+        groups = {}
+        for entry in self.entries():
+            group = groups.get(entry['sql'])
+            if group is None:
+                group = groups[entry['sql']] = {
+                    'sql': entry['sql'],
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'full_scans': entry['full_scans'],
+                    'plan': entry['plan'],
+                    'endpoints': [],
+                    'last_seen': entry['recorded_at'],
+                }
+            group['count'] += 1
+            group['total_ms'] = round(group['total_ms'] + entry['duration_ms'], 1)
+            group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+            if entry['endpoint'] and entry['endpoint'] not in group['endpoints']:
+                group['endpoints'].append(entry['endpoint'])
+        return sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def init_slow_query_log(app):
+    """Attach the app's ``SlowQueryLog`` (``SLOW_QUERY_MS``, ``SLOW_QUERY_LOG_SIZE``)."""
+    app.extensions['slow_query_log'] = SlowQueryLog(
+        threshold_ms=float(app.config.get('SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS)),
+        size=int(app.config.get('SLOW_QUERY_LOG_SIZE', DEFAULT_SLOW_QUERY_LOG_SIZE)),
+    )
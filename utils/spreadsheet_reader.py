@@ -0,0 +1,202 @@
+"""Helpers for reading uploaded CSV / XLSX files row by row.
+
+XLSX worksheets are parsed with ``iterparse`` straight out of the zip entry and each
+finished ``<row>`` is dropped from the tree, so memory follows the widest row (plus
+the workbook's shared-strings table), not the number of rows. Legacy ``.xls`` is not
+supported server-side.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import posixpath
+import re
+import zipfile
+import zlib
+from xml.etree.ElementTree import iterparse
+
+_REL_ATTR = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+_CELL_REF = re.compile(r'([A-Za-z]+)')
+# Malformed XML (ParseError is a SyntaxError) or a damaged zip entry.
+_XLSX_READ_ERRORS = (KeyError, SyntaxError, zipfile.BadZipFile, zlib.error, EOFError)
+
+
+class SpreadsheetError(ValueError):
+    """Raised when an upload cannot be read as CSV or XLSX."""
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _column_index(ref):
+    match = _CELL_REF.match(ref or '')
+    if not match:
+        return None
+    index = 0
+    for ch in match.group(1).upper():
+        index = index * 26 + (ord(ch) - 64)
+    return index - 1
+
+
+def _number_text(raw):
+    """Render a numeric cell like a spreadsheet would show it (``96123456``, not ``96123456.0``)."""
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        return raw or ''
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _text_of(elem):
+    """Concatenate ``<t>`` runs of a shared/inline string, skipping phonetic ``<rPh>`` runs."""
+    parts = []
+    for child in elem:
+        name = _local(child.tag)
+        if name == 't':
+            parts.append(child.text or '')
+        elif name == 'r':
+            parts.extend(t.text or '' for t in child if _local(t.tag) == 't')
+    return ''.join(parts)
+
+
+class _CsvSheetSource:
+    sheet_names = ('Sheet1',)
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def iter_rows(self, sheet_name):
+        self._stream.seek(0)
+        text = io.TextIOWrapper(self._stream, encoding='utf-8-sig', errors='replace', newline='')
+        try:
+            for row in csv.reader(text):
+                yield [cell.strip() if isinstance(cell, str) else '' for cell in row]
+        except csv.Error as exc:
+            raise SpreadsheetError(f'The CSV file could not be read: {exc}') from exc
+        finally:
+            text.detach()
+
+
+class _XlsxSheetSource:
+    def __init__(self, stream):
+        try:
+            self._zip = zipfile.ZipFile(stream)
+        except zipfile.BadZipFile as exc:
+            raise SpreadsheetError('The file is not a valid .xlsx workbook.') from exc
+        self._sheet_paths = self._read_sheet_paths()
+        self.sheet_names = tuple(self._sheet_paths)
+        self._shared_strings = None
+
+    def _read_sheet_paths(self):
+        try:
+            rels = {}
+            with self._zip.open('xl/_rels/workbook.xml.rels') as fh:
+                for _, elem in iterparse(fh):
+                    if _local(elem.tag) == 'Relationship':
+                        target = elem.get('Target') or ''
+                        if target.startswith('/'):
+                            target = target.lstrip('/')
+                        else:
+                            target = posixpath.normpath(posixpath.join('xl', target))
+                        rels[elem.get('Id')] = target
+            paths = {}
+            with self._zip.open('xl/workbook.xml') as fh:
+                for _, elem in iterparse(fh):
+                    if _local(elem.tag) == 'sheet':
+                        target = rels.get(elem.get(_REL_ATTR))
+                        if target:
+                            paths[elem.get('name') or target] = target
+            return paths
+        except _XLSX_READ_ERRORS as exc:
+            raise SpreadsheetError('The workbook structure could not be read.') from exc
+
+    def _strings(self):
+        if self._shared_strings is None:
+            self._shared_strings = []
+            try:
+                fh = self._zip.open('xl/sharedStrings.xml')
+            except KeyError:
+                return self._shared_strings
+            with fh:
+                for _, elem in iterparse(fh):
+                    if _local(elem.tag) == 'si':
+                        self._shared_strings.append(_text_of(elem))
+                        elem.clear()
+        return self._shared_strings
+
+    def _cell_value(self, cell):
+        kind = cell.get('t')
+        if kind == 'inlineStr':
+            for child in cell:
+                if _local(child.tag) == 'is':
+                    return _text_of(child)
+            return ''
+        raw = None
+        for child in cell:
+            if _local(child.tag) == 'v':
+                raw = child.text
+                break
+        if raw is None:
+            return ''
+        if kind == 's':
+            strings = self._strings()
+            try:
+                return strings[int(raw)]
+            except (ValueError, IndexError):
+                return ''
+        if kind == 'b':
+            return 'TRUE' if raw == '1' else 'FALSE'
+        if kind in ('str', 'e'):
+            return raw
+        return _number_text(raw)
+
+    def iter_rows(self, sheet_name):
+        path = self._sheet_paths.get(sheet_name)
+        if not path:
+            return
+        try:
+            with self._zip.open(path) as fh:
+                parent = None
+                for event, elem in iterparse(fh, events=('start', 'end')):
+                    name = _local(elem.tag)
+                    if event == 'start':
+                        if name == 'sheetData':
+                            parent = elem
+                        continue
+                    if name != 'row':
+                        continue
+                    values = []
+                    for cell in elem:
+                        if _local(cell.tag) != 'c':
+                            continue
+                        col = _column_index(cell.get('r'))
+                        if col is None:
+                            col = len(values)
+                        while len(values) < col:
+                            values.append('')
+                        values.append(self._cell_value(cell).strip())
+                    if parent is not None:
+                        parent.remove(elem)
+                    else:
+                        elem.clear()
+                    yield values
+        except _XLSX_READ_ERRORS as exc:
+            raise SpreadsheetError(f'Sheet "{sheet_name}" could not be read; the file may be damaged.') from exc
+
+
+def open_spreadsheet(file_storage):
+    """
+    Return a reader with ``sheet_names`` and ``iter_rows(sheet_name)`` (lists of cell
+    strings) for an uploaded ``.csv`` or ``.xlsx`` file.
+    """
+    filename = (getattr(file_storage, 'filename', '') or '').strip().lower()
+    stream = file_storage.stream
+    if filename.endswith('.csv'):
+        return _CsvSheetSource(stream)
+    if filename.endswith('.xlsx') or filename.endswith('.xlsm'):
+        stream.seek(0)
+        return _XlsxSheetSource(stream)
+    raise SpreadsheetError('Unsupported file type. Upload a .csv or .xlsx file.')
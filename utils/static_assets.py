@@ -0,0 +1,86 @@
+"""Helpers for serving static files under content-hashed URLs.
+
+``static_url('js/dashboard-main.js')`` in a template yields
+``/static/v/js/dashboard-main.<hash>.js``, where the hash is taken from the file's
+content. That URL is served with a one-year ``immutable`` Cache-Control, so browsers
+keep the file until it changes, and a changed file gets a new URL without a build
+step. The hash is recomputed only when the file's mtime or size changes.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+
+from flask import abort, current_app, send_from_directory, url_for
+
+STATIC_FINGERPRINT_LENGTH = 12
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_FINGERPRINTED_NAME = re.compile(
+    r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{%d})(?P<ext>\.[A-Za-z0-9]+)$' % STATIC_FINGERPRINT_LENGTH
+)
+_fingerprints = {}
+
+
+def static_fingerprint(filename):
+    """Content hash of a file under the static folder, or None if it does not exist."""
+    path = os.path.join(current_app.static_folder, filename)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    cached = _fingerprints.get(path)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    fingerprint = digest.hexdigest()[:STATIC_FINGERPRINT_LENGTH]
+    _fingerprints[path] = ((stat.st_mtime_ns, stat.st_size), fingerprint)
+    return fingerprint
+
+
+def static_url(filename):
+    """Jinja: long-cacheable URL for a static file (plain ``/static/`` if it is missing)."""
+    fingerprint = static_fingerprint(filename)
+    if fingerprint is None:
+        return url_for('static', filename=filename)
+    stem, ext = os.path.splitext(filename)
+    return url_for('static_versioned', filename=f'{stem}.{fingerprint}{ext}')
+
+
+def split_fingerprint(filename):
+    """``('js/app.js', '<hash>')`` for ``'js/app.<hash>.js'``, or ``(None, None)``."""
+    match = _FINGERPRINTED_NAME.match(filename)
+    if not match:
+        return None, None
+    return match.group('stem') + match.group('ext'), match.group('digest')
+
+
+def send_versioned_static(filename):
+    source, digest = split_fingerprint(filename)
+    if source is None:
+        abort(404)
+    fingerprint = static_fingerprint(source)
+    if fingerprint is None:
+        abort(404)
+    if fingerprint != digest:
+        # A page rendered before the file changed: send the current file, but do not
+        # let it be cached under the old hash.
+        response = send_from_directory(current_app.static_folder, source, max_age=0)
+        response.cache_control.no_cache = True
+        return response
+    response = send_from_directory(current_app.static_folder, source, max_age=STATIC_IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_static_assets(app):
+    """Register ``/static/v/<name>.<hash>.<ext>`` and the ``static_url`` template global."""
+    app.add_url_rule(
+        f'{app.static_url_path}/v/<path:filename>', endpoint='static_versioned', view_func=send_versioned_static,
+    )
+    app.add_template_global(static_url)
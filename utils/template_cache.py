@@ -0,0 +1,51 @@
+"""Helpers for caching compiled Jinja templates on disk.
+
+Compiling the dashboard's template tree (``index.html`` alone is ~1.4k lines, plus
+partials and macros) costs every new worker its first render. With the bytecode
+cache the compiled code is written under ``cache/jinja`` and later workers load it
+instead of re-parsing. Entries are keyed by template name and checked against a hash of the
+source, so a deploy that changes a template recompiles just that one.
+``scripts/compile_templates.py`` fills the cache ahead of time.
+"""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from jinja2 import FileSystemBytecodeCache, TemplateError
+
+TEMPLATE_SUFFIXES = ('.html', '.txt', '.xml')
+
+
+def get_template_cache_root(app):
+    root = app.config.get('TEMPLATE_CACHE_DIR')
+    root = Path(root) if root else Path(__file__).resolve().parent.parent / 'cache' / 'jinja'
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def init_template_cache(app):
+    """Use a filesystem bytecode cache unless ``TEMPLATE_BYTECODE_CACHE = False``.
+
+    Also warns when templates would be re-checked on every render outside debug mode.
+    """
+    if app.config.get('TEMPLATE_BYTECODE_CACHE', True):
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(str(get_template_cache_root(app)))
+    if app.jinja_env.auto_reload and not app.debug:
+        app.logger.warning(
+            'TEMPLATES_AUTO_RELOAD is on without DEBUG: every render stats its template files'
+        )
+
+
+def precompile_templates(app):
+    """Compile every template into the bytecode cache; returns ``(compiled, seconds, errors)``."""
+    env = app.jinja_env
+    names = [name for name in env.list_templates() if name.endswith(TEMPLATE_SUFFIXES)]
+    errors = {}
+    started = time.perf_counter()
+    for name in names:
+        try:
+            env.get_template(name)
+        except TemplateError as e:
+            errors[name] = str(e)
+    return len(names) - len(errors), time.perf_counter() - started, errors
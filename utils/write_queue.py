@@ -0,0 +1,303 @@
+"""Helpers for funnelling SQLite writes through one writer connection per process.
+
+Request threads hand a write unit (``fn(cur)``) to ``run_write``; a single writer
+thread runs queued units back to back on its own connection. Whatever is queued when
+the writer picks up work is committed together (group commit): each unit runs in its
+own savepoint, so a failing unit is rolled back alone and only its caller sees the
+error. Units run inside the submitting request's context, so ``current_user``,
+``request`` and ``current_app`` work as they do in the route. A caller waits at most
+``WRITE_TIMEOUT_SECONDS`` for its unit; after that ``WriteTimeout`` is raised and the
+app answers 503. Keep slow non-database work (e.g. saving uploads) out of units.
+"""
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from flask import (
+    copy_current_request_context,
+    current_app,
+    has_app_context,
+    has_request_context,
+    jsonify,
+)
+
+from utils.reference_cache import invalidate_reference_data
+from utils.request_metrics import InstrumentedConnection
+
+WRITE_GROUP_MAX_UNITS = 64
+DEFAULT_WRITE_TIMEOUT_SECONDS = 30
+
+
+class WriteRejected(Exception):
+    """Raise from a write unit to roll it back and hand a message back to the route."""
+
+
+class WriteTimeout(Exception):
+    """
+    ``run_write`` stopped waiting for the writer thread; the app answers 503.
+    ``cancelled`` is True when the unit never ran, False when it may still commit.
+    """
+
+    def __init__(self, message, cancelled):
+        super().__init__(message)
+        self.cancelled = cancelled
+
+
+class _WriteUnit:
+    __slots__ = ('fn', 'future', 'enqueued_at')
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class WriteCoordinator:
+    """One writer thread + connection; ``submit`` queues a unit, ``metrics`` reports on it."""
+
+    def __init__(self, database, group_window=0.0, max_group=WRITE_GROUP_MAX_UNITS, timeout=10,
+                 result_timeout=DEFAULT_WRITE_TIMEOUT_SECONDS):
+        self.database = database
+        self.group_window = group_window
+        self.max_group = max_group
+        self.timeout = timeout
+        self.result_timeout = result_timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'units_submitted': 0,
+            'units_committed': 0,
+            'units_failed': 0,
+            'units_timed_out': 0,
+            'groups_committed': 0,
+            'groups_failed': 0,
+            'max_group_size': 0,
+            'max_queue_depth': 0,
+            'queue_wait_seconds_total': 0.0,
+            'queue_wait_seconds_max': 0.0,
+            'lock_wait_seconds_total': 0.0,
+            'lock_wait_seconds_max': 0.0,
+            'execute_seconds_total': 0.0,
+            'commit_seconds_total': 0.0,
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self._thread.start()
+
+    def in_writer_thread(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, fn):
+        """Queue ``fn(cur)``; returns a Future with its result (or exception)."""
+        self._ensure_started()
+        unit = _WriteUnit(fn)
+        self._queue.put(unit)
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._stats['units_submitted'] += 1
+            if depth > self._stats['max_queue_depth']:
+                self._stats['max_queue_depth'] = depth
+        return unit.future
+
+    def record_timeout(self):
+        with self._stats_lock:
+            self._stats['units_timed_out'] += 1
+
+    def metrics(self):
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        snapshot['queue_depth'] = self._queue.qsize()
+        groups = snapshot['groups_committed']
+        snapshot['avg_group_size'] = round(snapshot['units_committed'] / groups, 2) if groups else 0.0
+        snapshot['writer_alive'] = bool(self._thread and self._thread.is_alive())
+        return snapshot
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database, timeout=self.timeout, check_same_thread=False, isolation_level=None,
+            factory=InstrumentedConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _next_group(self):
+        group = [self._queue.get()]
+        deadline = time.perf_counter() + self.group_window
+        while len(group) < self.max_group:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    group.append(self._queue.get(timeout=remaining))
+                else:
+                    group.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return group
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            group = self._next_group()
+            try:
+                self._run_group(conn, group)
+            except Exception as e:
+                # Savepoint bookkeeping failed: fail whoever is still waiting and
+                # start over on a fresh connection.
+                for unit in group:
+                    if not unit.future.done():
+                        unit.future.set_exception(e)
+                try:
+                    conn.rollback()
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+                invalidate_reference_data()
+                conn = self._connect()
+
+    def _run_group(self, conn, group):
+        # Units whose caller timed out and cancelled them are dropped here.
+        group = [unit for unit in group if unit.future.set_running_or_notify_cancel()]
+        if not group:
+            return
+        started = time.perf_counter()
+        queue_waits = [started - unit.enqueued_at for unit in group]
+        cur = conn.cursor()
+        try:
+            cur.execute('BEGIN IMMEDIATE')
+        except sqlite3.Error as e:
+            self._record_group(group, queue_waits, time.perf_counter() - started, 0.0, 0.0, failed=True)
+            for unit in group:
+                unit.future.set_exception(e)
+            return
+        lock_wait = time.perf_counter() - started
+
+        outcomes = []
+        for unit in group:
+            cur.execute('SAVEPOINT write_unit')
+            try:
+                result = unit.fn(cur)
+            except Exception as e:
+                cur.execute('ROLLBACK TO write_unit')
+                cur.execute('RELEASE write_unit')
+                invalidate_reference_data()
+                outcomes.append((unit, None, e))
+            else:
+                cur.execute('RELEASE write_unit')
+                outcomes.append((unit, result, None))
+        executed = time.perf_counter()
+
+        try:
+            cur.execute('COMMIT')
+        except sqlite3.Error as e:
+            conn.rollback()
+            invalidate_reference_data()
+            self._record_group(group, queue_waits, lock_wait, executed - started - lock_wait, 0.0, failed=True)
+            for unit in group:
+                unit.future.set_exception(e)
+            return
+        self._record_group(
+            group, queue_waits, lock_wait, executed - started - lock_wait, time.perf_counter() - executed,
+            failed_units=sum(1 for _, _, error in outcomes if error is not None),
+        )
+        for unit, result, error in outcomes:
+            if error is not None:
+                unit.future.set_exception(error)
+            else:
+                unit.future.set_result(result)
+
+    def _record_group(self, group, queue_waits, lock_wait, execute_seconds, commit_seconds,
+                      failed=False, failed_units=0):
+        with self._stats_lock:
+            stats = self._stats
+            stats['queue_wait_seconds_total'] += sum(queue_waits)
+            stats['queue_wait_seconds_max'] = max([stats['queue_wait_seconds_max']] + queue_waits)
+            stats['lock_wait_seconds_total'] += lock_wait
+            stats['lock_wait_seconds_max'] = max(stats['lock_wait_seconds_max'], lock_wait)
+            stats['execute_seconds_total'] += execute_seconds
+            stats['commit_seconds_total'] += commit_seconds
+            if failed:
+                stats['groups_failed'] += 1
+                stats['units_failed'] += len(group)
+                return
+            stats['groups_committed'] += 1
+            stats['units_committed'] += len(group) - failed_units
+            stats['units_failed'] += failed_units
+            stats['max_group_size'] = max(stats['max_group_size'], len(group))
+
+
+def init_write_coordinator(app):
+    """Attach the app's coordinator; the writer thread starts on the first write."""
+    app.extensions['write_coordinator'] = WriteCoordinator(
+        app.config['DATABASE'],
+        group_window=app.config.get('WRITE_GROUP_WINDOW_MS', 0) / 1000.0,
+        result_timeout=app.config.get('WRITE_TIMEOUT_SECONDS', DEFAULT_WRITE_TIMEOUT_SECONDS),
+    )
+    app.register_error_handler(WriteTimeout, _write_timeout_response)
+
+
+def _write_timeout_response(error):
+    response = jsonify({'error': str(error)})
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    return response
+
+
+def get_write_coordinator():
+    return current_app.extensions['write_coordinator']
+
+
+def _bind_context(fn):
+    if has_request_context():
+        return copy_current_request_context(fn)
+    if has_app_context():
+        app = current_app._get_current_object()
+
+        def in_app_context(cur):
+            with app.app_context():
+                return fn(cur)
+        return in_app_context
+    return fn
+
+
+def run_write(fn, timeout=None):
+    """
+    Run ``fn(cur)`` on the writer connection and return its result. The unit is
+    committed before this returns; if it raises, only its own changes are rolled back
+    and the exception is re-raised here. Raises ``WriteTimeout`` after ``timeout``
+    seconds (default ``WRITE_TIMEOUT_SECONDS``); a unit that had not started by then
+    is cancelled.
+    """
+    coordinator = get_write_coordinator()
+    if coordinator.in_writer_thread():
+        raise RuntimeError('run_write() cannot be nested inside a write unit; use the unit\'s cursor.')
+    future = coordinator.submit(_bind_context(fn))
+    try:
+        return future.result(timeout=coordinator.result_timeout if timeout is None else timeout)
+    except FutureTimeoutError:
+        if future.done():
+            # The unit itself raised TimeoutError, or finished just as the wait ran out.
+            return future.result()
+        coordinator.record_timeout()
+        if future.cancel():
+            raise WriteTimeout(
+                'The server is busy and the change was not saved. Please try again.', cancelled=True,
+            )
+        raise WriteTimeout(
+            'The server is busy and the change is still being saved. Refresh before trying again.',
+            cancelled=False,
+        )
+
+
+def get_write_metrics():
+    return get_write_coordinator().metrics()
@@ -0,0 +1,214 @@
+"""Helpers for writing XLSX workbooks as a byte stream with bounded memory.
+
+Worksheet XML is written row by row into a deflated zip entry on an unseekable sink,
+strings are inlined (no shared-strings table), and the workbook parts that list the
+sheets are written last. Nothing grows with the number of rows.
+"""
+from __future__ import annotations
+
+import math
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+_SHEET_NAME_BAD_CHARS = re.compile(r'[\[\]:*?/\\]')
+MAX_CELL_TEXT = 32767
+MAX_SHEET_NAME = 31
+
+_STYLES_XML = (
+    _XML_DECL
+    + f'<styleSheet xmlns="{_MAIN_NS}">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+_HEADER_STYLE = 1
+
+
+class ChunkSink:
+    """Write-only, unseekable file object that hands buffered bytes back via ``drain``."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def column_letter(index):
+    """0-based column index -> Excel column letters (0 -> A, 26 -> AA)."""
+    letters = ''
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _cell_xml(ref, value, style=None):
+    style_attr = f' s="{style}"' if style else ''
+    if value is None or value == '':
+        return f'<c r="{ref}"{style_attr}/>' if style else ''
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, (int, float)) and math.isfinite(value):
+        return f'<c r="{ref}"{style_attr}><v>{value!r}</v></c>'
+    text = _ILLEGAL_XML_CHARS.sub('', str(value))[:MAX_CELL_TEXT]
+    return (
+        f'<c r="{ref}"{style_attr} t="inlineStr"><is>'
+        f'<t xml:space="preserve">{escape(text)}</t></is></c>'
+    )
+
+
+class StreamingXlsxWriter:
+    """Sequential sheet writer: ``begin_sheet`` -> ``write_row``* -> ``end_sheet``, then ``close``."""
+
+    def __init__(self, fileobj):
+        self._zip = zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED)
+        self._sheet_names = []
+        self._sheet = None
+        self._row_number = 0
+        self._columns = []
+
+    def _unique_sheet_name(self, title):
+        base = _SHEET_NAME_BAD_CHARS.sub(' ', str(title or '')).strip().strip("'")
+        base = base[:MAX_SHEET_NAME] or 'Sheet'
+        name = base
+        suffix = 2
+        taken = {existing.lower() for existing in self._sheet_names}
+        while name.lower() in taken:
+            tail = f' ({suffix})'
+            name = base[:MAX_SHEET_NAME - len(tail)] + tail
+            suffix += 1
+        return name
+
+    def begin_sheet(self, title, header=None):
+        if self._sheet is not None:
+            self.end_sheet()
+        self._sheet_names.append(self._unique_sheet_name(title))
+        index = len(self._sheet_names)
+        self._sheet = self._zip.open(f'xl/worksheets/sheet{index}.xml', 'w', force_zip64=True)
+        self._row_number = 0
+        self._columns = []
+        pane = ''
+        if header:
+            pane = (
+                '<sheetViews><sheetView workbookViewId="0">'
+                '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                '</sheetView></sheetViews>'
+            )
+        self._sheet.write(
+            (_XML_DECL + f'<worksheet xmlns="{_MAIN_NS}">{pane}<sheetData>').encode('utf-8')
+        )
+        if header:
+            self.write_row(header, style=_HEADER_STYLE)
+
+    def write_row(self, values, style=None):
+        self._row_number += 1
+        row = self._row_number
+        values = list(values)
+        while len(self._columns) < len(values):
+            self._columns.append(column_letter(len(self._columns)))
+        cells = ''.join(
+            _cell_xml(f'{self._columns[i]}{row}', value, style)
+            for i, value in enumerate(values)
+        )
+        self._sheet.write(f'<row r="{row}">{cells}</row>'.encode('utf-8'))
+
+    def end_sheet(self):
+        if self._sheet is None:
+            return
+        self._sheet.write(b'</sheetData></worksheet>')
+        self._sheet.close()
+        self._sheet = None
+
+    def close(self):
+        self.end_sheet()
+        if not self._sheet_names:
+            self.begin_sheet('Sheet')
+            self.end_sheet()
+        count = len(self._sheet_names)
+        sheets = ''.join(
+            f'<sheet name={quoteattr(name)} sheetId="{i}" r:id="rId{i}"/>'
+            for i, name in enumerate(self._sheet_names, start=1)
+        )
+        sheet_rels = ''.join(
+            f'<Relationship Id="rId{i}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, count + 1)
+        )
+        sheet_types = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, count + 1)
+        )
+        self._zip.writestr(
+            'xl/workbook.xml',
+            _XML_DECL + f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>{sheets}</sheets></workbook>',
+        )
+        self._zip.writestr(
+            'xl/_rels/workbook.xml.rels',
+            _XML_DECL + f'<Relationships xmlns="{_PKG_REL_NS}">{sheet_rels}'
+            f'<Relationship Id="rId{count + 1}" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+            '</Relationships>',
+        )
+        self._zip.writestr('xl/styles.xml', _STYLES_XML)
+        self._zip.writestr(
+            '_rels/.rels',
+            _XML_DECL + f'<Relationships xmlns="{_PKG_REL_NS}">'
+            f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>',
+        )
+        self._zip.writestr(
+            '[Content_Types].xml',
+            _XML_DECL + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{sheet_types}</Types>',
+        )
+        self._zip.close()
+
+
+def iter_xlsx_chunks(sheets):
+    """
+    Yield XLSX bytes for ``sheets``: an iterable of ``(title, header, pages)`` where
+    ``pages`` yields lists of row value lists. Output is flushed after every page.
+    """
+    sink = ChunkSink()
+    writer = StreamingXlsxWriter(sink)
+    for title, header, pages in sheets:
+        writer.begin_sheet(title, header)
+        for page in pages:
+            for values in page:
+                writer.write_row(values)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        writer.end_sheet()
+    writer.close()
+    yield sink.drain()